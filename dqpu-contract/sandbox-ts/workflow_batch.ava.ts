@@ -0,0 +1,101 @@
+// Copyright 2024 Davide Gessa
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+// http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+import { NEAR } from 'near-workspaces';
+import { setDefaultResultOrder } from 'dns'; setDefaultResultOrder('ipv4first'); // temp fix for node >v17
+import { createTestObject } from './factory';
+
+// Global context
+const test = createTestObject();
+
+test('handle many jobs with batch calls', async (t) => {
+    const { root, contract, alice, bob, owner } = t.context.accounts;
+
+    const jids: string[] = [];
+    for (let i = 0; i < 4; i++) {
+        jids.push(await alice.call(contract, 'submit_job', {
+            qubits: 2, depth: 8, shots: 128, job_file: `a12bff${i}`
+        }, { attachedDeposit: NEAR.parse('1 N') }));
+    }
+    t.deepEqual(jids, ['1', '2', '3', '4']);
+
+    // Only verifiers can set the validity
+    await t.throwsAsync(async () => { await bob.call(contract, 'set_job_validity_batch', {
+        items: [{ id: '1', valid: true, trapped_file: 'ta12bff0' }]
+    }); });
+
+    // Jobs not pending-validation are skipped
+    t.deepEqual(await owner.call(contract, 'set_job_validity_batch', {
+        items: [
+            { id: '1', valid: true, trapped_file: 'ta12bff0' },
+            { id: '2', valid: true, trapped_file: 'ta12bff1' },
+            { id: '3', valid: true, trapped_file: 'ta12bff2' },
+            { id: '4', valid: false },
+            { id: '1', valid: false },
+            { id: '99', valid: true, trapped_file: 'ta12bff9' },
+        ]
+    }), ['1', '2', '3', '4']);
+
+    t.is(await contract.view('get_job_status', { id: '1' }), 'waiting');
+    t.is(await contract.view('get_job_status', { id: '4' }), 'invalid');
+    t.is((await contract.view('get_job', { id: '2' }) as any)['job_file'], 'ta12bff1');
+
+    // The deposit should cover a tenth of the reward of every job
+    await t.throwsAsync(async () => { await bob.call(contract, 'submit_job_result_batch', {
+        items: [{ id: '1', result_file: 'b21aa' }, { id: '2', result_file: 'b21ab' }]
+    }, { attachedDeposit: NEAR.parse('0.15 N') }); });
+
+    // Jobs owned or verified by the sampler are skipped, without failing the batch
+    t.deepEqual(await alice.call(contract, 'submit_job_result_batch', {
+        items: [{ id: '1', result_file: 'b21aa' }]
+    }, { attachedDeposit: NEAR.parse('0.1 N') }), []);
+    t.deepEqual(await owner.call(contract, 'submit_job_result_batch', {
+        items: [{ id: '2', result_file: 'b21ab' }]
+    }, { attachedDeposit: NEAR.parse('0.1 N') }), []);
+    t.is(await contract.view('get_job_status', { id: '1' }), 'waiting');
+
+    t.deepEqual(await bob.call(contract, 'submit_job_result_batch', {
+        items: [
+            { id: '1', result_file: 'b21aa' },
+            { id: '2', result_file: 'b21ab' },
+            { id: '3', result_file: 'b21ac' },
+            { id: '4', result_file: 'b21ad' },
+        ]
+    }, { attachedDeposit: NEAR.parse('0.5 N') }), ['1', '2', '3']);
+
+    t.is(await contract.view('get_job_status', { id: '3' }), 'validating-result');
+    t.is((await contract.view('get_job', { id: '3' }) as any)['sampler_id'], bob.accountId);
+
+    // A valid result needs a trap file
+    await t.throwsAsync(async () => { await owner.call(contract, 'set_result_validity_batch', {
+        items: [{ id: '1', valid: true }]
+    }); });
+
+    t.deepEqual(await owner.call(contract, 'set_result_validity_batch', {
+        items: [
+            { id: '1', valid: true, trap_file: 'asdasd' },
+            { id: '2', valid: false },
+            { id: '4', valid: true, trap_file: 'asdasd' },
+        ]
+    }), ['1', '2']);
+
+    t.is(await contract.view('get_job_status', { id: '1' }), 'executed');
+    t.is(await contract.view('get_job_status', { id: '2' }), 'waiting');
+    t.is(await contract.view('get_job_status', { id: '3' }), 'validating-result');
+
+    const stats = await contract.view('get_jobs_stats') as any;
+    t.is(stats['executed'], 1);
+    t.is(stats['waiting'], 1);
+    t.is(stats['validating-result'], 1);
+    t.is(stats['invalid'], 1);
+});
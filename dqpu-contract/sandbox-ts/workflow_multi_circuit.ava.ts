@@ -0,0 +1,47 @@
+// Copyright 2024 Davide Gessa
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+// http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+import { NEAR } from 'near-workspaces';
+import { setDefaultResultOrder } from 'dns'; setDefaultResultOrder('ipv4first'); // temp fix for node >v17
+import { createTestObject } from './factory';
+
+
+// Global context
+const test = createTestObject();
+
+test('submit a multi-circuit job', async (t) => {
+    const { root, contract, alice, bob, owner } = t.context.accounts;
+
+    await alice.call(contract, 'submit_job', {
+        qubits: 2, depth: 8, shots: 128, job_file: 'a12bff'
+    }, { attachedDeposit: NEAR.parse('1 N') });
+    t.is((await contract.view('get_job', { id: '1' }) as any).circuits, 1);
+
+    await alice.call(contract, 'submit_job', {
+        qubits: 4, depth: 24, shots: 128, job_file: 'a12bfe', circuits: 3
+    }, { attachedDeposit: NEAR.parse('1 N') });
+    t.is((await contract.view('get_job', { id: '2' }) as any).circuits, 3);
+
+    for (const circuits of [0, 301]) {
+        await t.throwsAsync(async () => { await alice.call(contract, 'submit_job', {
+            qubits: 2, depth: 8, shots: 128, job_file: 'a12bfd', circuits: circuits
+        }, { attachedDeposit: NEAR.parse('1 N') }); });
+    }
+    t.is(await contract.view('get_number_of_jobs', {}), 2);
+
+    // The workflow is the same of a single circuit job
+    await owner.call(contract, 'set_job_validity', { id: '2', valid: true, trapped_file: 'ta12bfe' });
+    await bob.call(contract, 'submit_job_result', { id: '2', result_file: 'b21aa' }, { attachedDeposit: NEAR.parse('0.1 N') });
+    await owner.call(contract, 'set_result_validity', { id: '2', valid: true, trap_file: 'asdasd' });
+    t.is(await contract.view('get_job_status', { id: '2' }), 'executed');
+});
@@ -0,0 +1,81 @@
+// Copyright 2024 Davide Gessa
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+// http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+import { NEAR } from 'near-workspaces';
+import { setDefaultResultOrder } from 'dns'; setDefaultResultOrder('ipv4first'); // temp fix for node >v17
+import { createTestObject } from './factory';
+
+// Global context
+const test = createTestObject();
+
+const ids = (jobs: any) => jobs.map((j: any) => j.id).sort();
+
+test('list the jobs by status', async (t) => {
+    const { root, contract, alice, bob, owner } = t.context.accounts;
+
+    for (let i = 0; i < 3; i++) {
+        await alice.call(contract, 'submit_job', {
+            qubits: 2, depth: 8, shots: 128, job_file: `a12bff${i}`
+        }, { attachedDeposit: NEAR.parse('1 N') });
+    }
+    t.deepEqual(ids(await contract.view('get_jobs_by_status', { status: 'pending-validation' })), ['1', '2', '3']);
+    t.deepEqual(await contract.view('get_jobs_by_status', { status: 'waiting' }), []);
+
+    await owner.call(contract, 'set_job_validity', { id: '1', valid: true, trapped_file: 'ta12bff0' });
+    await owner.call(contract, 'set_job_validity', { id: '2', valid: true, trapped_file: 'ta12bff1' });
+    t.deepEqual(ids(await contract.view('get_jobs_by_status', { status: 'pending-validation' })), ['3']);
+    t.deepEqual(ids(await contract.view('get_jobs_by_status', { status: 'waiting' })), ['1', '2']);
+
+    // Pagination
+    t.is((await contract.view('get_jobs_by_status', { status: 'waiting', from_index: 1, limit: 5 }) as any).length, 1);
+
+    await bob.call(contract, 'submit_job_result', { id: '1', result_file: 'b21aa' }, { attachedDeposit: NEAR.parse('0.1 N') });
+    t.deepEqual(ids(await contract.view('get_jobs_by_status', { status: 'waiting' })), ['2']);
+    t.deepEqual(ids(await contract.view('get_jobs_by_status', { status: 'validating-result' })), ['1']);
+
+    await owner.call(contract, 'set_result_validity', { id: '1', valid: true, trap_file: 'asdasd' });
+    t.deepEqual(await contract.view('get_jobs_by_status', { status: 'validating-result' }), []);
+
+    await alice.call(contract, 'remove_job', { id: '2' });
+    t.deepEqual(await contract.view('get_jobs_by_status', { status: 'waiting' }), []);
+
+    // Final statuses are not indexed
+    await t.throwsAsync(async () => { await contract.view('get_jobs_by_status', { status: 'executed' }); });
+
+    // Rebuilding the index is idempotent, and only allowed to the owner
+    await t.throwsAsync(async () => { await alice.call(contract, 'rebuild_status_index', {}); });
+    await owner.call(contract, 'rebuild_status_index', { from_index: 0, limit: 10 });
+    t.deepEqual(ids(await contract.view('get_jobs_by_status', { status: 'pending-validation' })), ['3']);
+});
+
+test('get the state of many jobs at once', async (t) => {
+    const { root, contract, alice, bob, owner } = t.context.accounts;
+
+    for (let i = 0; i < 2; i++) {
+        await alice.call(contract, 'submit_job', {
+            qubits: 2, depth: 8, shots: 128, job_file: `a12bff${i}`
+        }, { attachedDeposit: NEAR.parse('1 N') });
+    }
+    await owner.call(contract, 'set_job_validity', { id: '1', valid: true, trapped_file: 'ta12bff0' });
+    await bob.call(contract, 'submit_job_result', { id: '1', result_file: 'b21aa' }, { attachedDeposit: NEAR.parse('0.1 N') });
+    await owner.call(contract, 'set_result_validity', { id: '1', valid: true, trap_file: 'asdasd' });
+
+    t.deepEqual(await contract.view('get_jobs_by_ids', { ids: ['2', '1', '7'] }), [
+        { id: '2', status: 'pending-validation', result_file: '', trap_file: '' },
+        { id: '1', status: 'executed', result_file: 'b21aa', trap_file: 'asdasd' },
+        null,
+    ]);
+
+    const many = Array.from({ length: 101 }, (_, i) => `${i}`);
+    await t.throwsAsync(async () => { await contract.view('get_jobs_by_ids', { ids: many }); });
+});
@@ -14,9 +14,21 @@
 
 import { NearBindgen, near, call, view, UnorderedMap, assert, initialize } from 'near-sdk-js';
 import { AccountId } from 'near-sdk-js/lib/types';
-import { Job, JobStatus } from './model';
+import { Job, JobState, JobStatus } from './model';
 
-const CONTRACT_VERSION = 6;
+const CONTRACT_VERSION = 8;
+
+// Maximum number of jobs handled by a batch call, to stay within the gas limit
+const MAX_BATCH_SIZE = 32;
+
+// Maximum number of jobs returned by get_jobs_by_ids
+const MAX_IDS = 100;
+
+// Maximum number of circuits of a multi-circuit job
+const MAX_CIRCUITS = 300;
+
+// Statuses of the jobs nodes act on, indexed by get_jobs_by_status
+const INDEXED_STATUSES: JobStatus[] = ['pending-validation', 'waiting', 'validating-result'];
 
 // const MAX_JOBS_STORED = 128;
 // TODO: add max_job handling
@@ -36,19 +48,26 @@ class DQPU {
         'invalid': 0
     };
 
+    // Ids of the jobs in every indexed status
+    jobs_pending_validation = new UnorderedMap<string>('jpv-1');
+    jobs_waiting = new UnorderedMap<string>('jw-1');
+    jobs_validating_result = new UnorderedMap<string>('jvr-1');
+
     @initialize({ privateFunction: true })
     init({ owner }: { owner: AccountId }) {
         this.owner = owner;
         this.verifiers.set(this.owner, this.owner);
     }
 
-    // Submit a new quantum job
+    // Submit a new quantum job; a multi-circuit job file holds `circuits` circuits,
+    // `qubits` is the largest of them and `depth` the sum of their depths
     @call({ payableFunction: true })
-    submit_job({ qubits, depth, shots, job_file }: { qubits: number, depth: number, shots: number, job_file: string }) {
+    submit_job({ qubits, depth, shots, job_file, circuits = 1 }: { qubits: number, depth: number, shots: number, job_file: string, circuits?: number }) {
         this.latest_jid += BigInt(1);
 
         const reward: bigint = near.attachedDeposit() as bigint;
         assert(reward > BigInt(0), 'Reward amount should be greater than 0');
+        assert(circuits >= 1 && circuits <= MAX_CIRCUITS, `Circuits should be between 1 and ${MAX_CIRCUITS}`);
 
         const j: Job = {
             id: this.latest_jid.toString(),
@@ -60,6 +79,7 @@ class DQPU {
             qubits: qubits,
             depth: depth,
             shots: shots,
+            circuits: circuits,
 
             job_file: job_file,
             result_file: '',
@@ -69,6 +89,7 @@ class DQPU {
             sampler_id: '',
         };
         this.jobs_stats[j.status] += 1;
+        this.index_job(j);
 
         this.jobs.set(j.id, j);
         this.money_handled += j.reward_amount;
@@ -90,9 +111,40 @@ class DQPU {
         near.promiseBatchActionTransfer(promise, j.reward_amount);
 
         this.jobs_stats[j.status] -= 1;
+        this.unindex_job(j);
         this.jobs.remove(id);
     }
 
+    status_index(status: JobStatus): UnorderedMap<string> | null {
+        switch (status) {
+            case 'pending-validation': return this.jobs_pending_validation;
+            case 'waiting': return this.jobs_waiting;
+            case 'validating-result': return this.jobs_validating_result;
+            default: return null;
+        }
+    }
+
+    index_job(j: Job) {
+        const index = this.status_index(j.status);
+        if (index)
+            index.set(j.id, j.id);
+    }
+
+    unindex_job(j: Job) {
+        const index = this.status_index(j.status);
+        if (index)
+            index.remove(j.id);
+    }
+
+    // Move a job to a new status, updating the stats and the status indexes
+    set_status(j: Job, status: JobStatus) {
+        this.jobs_stats[j.status] -= 1;
+        this.unindex_job(j);
+        j.status = status;
+        this.jobs_stats[j.status] += 1;
+        this.index_job(j);
+    }
+
 
     // Called by validators, set the validity of a pending-validation job
     @call({})
@@ -104,20 +156,41 @@ class DQPU {
 
         assert(j.status == 'pending-validation', `Job ${id} is not in 'pending-validation' state`);
 
+        this.apply_job_validity(j, valid, trapped_file);
+    }
+
+    // Called by validators, set the validity of many pending-validation jobs; jobs
+    // no longer pending-validation are skipped. Return the ids of the updated jobs
+    @call({})
+    set_job_validity_batch({ items }: { items: { id: string, valid: boolean, trapped_file: string }[] }): string[] {
+        assert(this.verifiers.get(near.predecessorAccountId()) != null, 'Only a verifier can set job validity');
+        assert(items.length <= MAX_BATCH_SIZE, `Batch size should be at most ${MAX_BATCH_SIZE}`);
+
+        const done: string[] = [];
+        for (const { id, valid, trapped_file = null } of items) {
+            const j: Job = this.jobs.get(id);
+            if (!j || j.status != 'pending-validation')
+                continue;
+
+            this.apply_job_validity(j, valid, trapped_file);
+            done.push(id);
+        }
+        return done;
+    }
+
+    apply_job_validity(j: Job, valid: boolean, trapped_file: string) {
         j.verifier_id = near.predecessorAccountId();
 
-        this.jobs_stats[j.status] -= 1;
         if (valid) {
             j.job_file = trapped_file;
-            j.status = 'waiting';
+            this.set_status(j, 'waiting');
         } else {
-            j.status = 'invalid';
+            this.set_status(j, 'invalid');
 
             // Send the reward back to the client
             const promise = near.promiseBatchCreate(j.owner_id);
             near.promiseBatchActionTransfer(promise, j.reward_amount);
         }
-        this.jobs_stats[j.status] += 1;
 
         this.jobs.set(j.id, j);
     }
@@ -134,13 +207,50 @@ class DQPU {
         assert(j.owner_id != near.predecessorAccountId(), `Job owner and Sampler can't be the same account`);
         assert(j.verifier_id != near.predecessorAccountId(), `Sampler and Verifier can't be the same account`);
 
-        this.jobs_stats[j.status] -= 1;
+        this.apply_job_result(j, result_file, deposit);
+    }
+
+    // Submit the results of many waiting jobs; the attached deposit is split in the
+    // caution of every job (a tenth of its reward), the rest is sent back. Jobs no
+    // longer waiting, or owned or verified by the sampler, are skipped. Return the
+    // ids of the updated jobs
+    @call({ payableFunction: true })
+    submit_job_result_batch({ items }: { items: { id: string, result_file: string }[] }): string[] {
+        assert(items.length <= MAX_BATCH_SIZE, `Batch size should be at most ${MAX_BATCH_SIZE}`);
+
+        let deposit: bigint = near.attachedDeposit() as bigint;
+
+        const done: string[] = [];
+        for (const { id, result_file } of items) {
+            const j: Job = this.jobs.get(id);
+            if (!j || j.status != 'waiting')
+                continue;
+
+            // Job owner and Verifier can't be the Sampler
+            if (j.owner_id == near.predecessorAccountId() || j.verifier_id == near.predecessorAccountId())
+                continue;
+
+            const caution = j.reward_amount / BigInt(10);
+            assert(deposit >= caution, `Deposit should be greater than the sum of the job rewards / 10`);
+            deposit -= caution;
+
+            this.apply_job_result(j, result_file, caution);
+            done.push(id);
+        }
+
+        if (deposit > BigInt(0)) {
+            const promise = near.promiseBatchCreate(near.predecessorAccountId());
+            near.promiseBatchActionTransfer(promise, deposit);
+        }
+        return done;
+    }
+
+    apply_job_result(j: Job, result_file: string, deposit: bigint) {
         j.result_file = result_file;
-        j.status = 'validating-result';
+        this.set_status(j, 'validating-result');
         j.sampler_id = near.predecessorAccountId();
         j.sampler_deposit = deposit;
         this.money_handled += deposit;
-        this.jobs_stats[j.status] += 1;
 
         this.jobs.set(j.id, j);
     }
@@ -154,11 +264,36 @@ class DQPU {
         const j: Job = this.jobs.get(id);
 
         assert(j.status == 'validating-result', `Job ${id} is not in 'validating-result' state`);
-        this.jobs_stats[j.status] -= 1;
+        if (valid)
+            assert(trap_file.length > 0, "Empty trap file not allowed");
 
+        this.apply_result_validity(j, valid, trap_file);
+    }
+
+    // Called by validators, set the validity of the results of many
+    // 'validating-result' jobs; other jobs are skipped. Return the ids of the
+    // updated jobs
+    @call({})
+    set_result_validity_batch({ items }: { items: { id: string, valid: boolean, trap_file: string }[] }): string[] {
+        assert(this.verifiers.get(near.predecessorAccountId()) != null, 'Only a verifier can set job validity');
+        assert(items.length <= MAX_BATCH_SIZE, `Batch size should be at most ${MAX_BATCH_SIZE}`);
+
+        const done: string[] = [];
+        for (const { id, valid, trap_file = "" } of items) {
+            const j: Job = this.jobs.get(id);
+            if (!j || j.status != 'validating-result')
+                continue;
+
+            assert(!valid || trap_file.length > 0, "Empty trap file not allowed");
+            this.apply_result_validity(j, valid, trap_file);
+            done.push(id);
+        }
+        return done;
+    }
+
+    apply_result_validity(j: Job, valid: boolean, trap_file: string) {
         if (valid) {
-            assert(trap_file.length > 0, "Empty trap file not allowed");
-            j.status = 'executed';
+            this.set_status(j, 'executed');
             j.trap_file = trap_file;
 
             // Send the sampler deposit to verifier
@@ -169,7 +304,7 @@ class DQPU {
             const promise2 = near.promiseBatchCreate(j.sampler_id);
             near.promiseBatchActionTransfer(promise2, j.reward_amount);
         } else {
-            j.status = 'waiting';
+            this.set_status(j, 'waiting');
             j.sampler_id = '';
 
             // Send the sampler deposit to verifier
@@ -178,7 +313,6 @@ class DQPU {
 
             j.sampler_deposit = BigInt(0);
         }
-        this.jobs_stats[j.status] += 1;
 
         this.jobs.set(j.id, j);
     }
@@ -205,7 +339,7 @@ class DQPU {
     get_jobs({ from_index = 0, limit = 50 }: { from_index: number, limit: number }): Job[] {
         const ret: Job[] = [];
 
-        for (let i = BigInt(from_index); i <= BigInt(from_index + limit); i++) {
+        for (let i = BigInt(from_index); i < BigInt(from_index + limit); i++) {
             const j: Job = this.jobs.get(i.toString());
             if (j)
                 ret.push(j);
@@ -214,6 +348,35 @@ class DQPU {
         return ret;
     }
 
+    // Get the jobs in an indexed status (pending-validation, waiting or
+    // validating-result), paginated over the status index
+    @view({})
+    get_jobs_by_status({ status, from_index = 0, limit = 50 }: { status: JobStatus, from_index: number, limit: number }): Job[] {
+        const index = this.status_index(status);
+        assert(index != null, `Jobs in '${status}' state are not indexed`);
+
+        const ret: Job[] = [];
+        for (const id of index.keys({ start: from_index, limit })) {
+            const j: Job = this.jobs.get(id);
+            if (j)
+                ret.push(j);
+        }
+        return ret;
+    }
+
+    // Get the status and the result files of many jobs, null for missing ones
+    @view({})
+    get_jobs_by_ids({ ids }: { ids: string[] }): JobState[] {
+        assert(ids.length <= MAX_IDS, `At most ${MAX_IDS} ids per call`);
+
+        return ids.map((id) => {
+            const j: Job = this.jobs.get(id);
+            if (!j)
+                return null;
+            return { id: j.id, status: j.status, result_file: j.result_file, trap_file: j.trap_file };
+        });
+    }
+
     // Get a single quantum job by its id
     @view({})
     get_job({ id }: { id: string }): Job {
@@ -285,11 +448,26 @@ class DQPU {
         this.owner = new_owner;
     }
 
+    // Add the jobs with id in [from_index, from_index + limit) to the status
+    // indexes, for jobs created before the indexes existed
+    @call({})
+    rebuild_status_index({ from_index = 0, limit = 50 }: { from_index: number, limit: number }) {
+        assert(near.predecessorAccountId() == this.owner, 'Only callable by owner');
+
+        for (let i = BigInt(from_index); i < BigInt(from_index + limit); i++) {
+            const j: Job = this.jobs.get(i.toString());
+            if (j)
+                this.index_job(j);
+        }
+    }
+
     // Clear all jobs
     @call({})
     clear_jobs() {
         assert(near.predecessorAccountId() == this.owner, 'Only callable by owner');
         this.jobs.clear();
+        for (const status of INDEXED_STATUSES)
+            this.status_index(status).clear();
 
         this.jobs_stats = {
             'pending-validation': 0,
@@ -25,6 +25,8 @@ export class Job {
     qubits: number;
     depth: number;
     shots: number;
+    // Number of circuits in the job file, each sampled for `shots` shots
+    circuits: number;
 
     job_file: string;
     result_file: string;
@@ -32,4 +34,12 @@ export class Job {
 
     verifier_id: AccountId;
     sampler_id: AccountId;
-}
\ No newline at end of file
+}
+
+// Status and result files of a job, returned by get_jobs_by_ids
+export class JobState {
+    id: string;
+    status: JobStatus;
+    result_file: string;
+    trap_file: string;
+}
@@ -18,7 +18,9 @@ import tempfile
 from ..blockchain import repeat_until_done
 
 
-def submit_job(nb, ipfs, qasm_data, num_qubits, depth, options):
+def submit_job(nb, ipfs, qasm_data, num_qubits, depth, options, circuits=1):
+    """Upload the job file `qasm_data` (of `circuits` circuits, see dqpu.jobfile)
+    and submit the job, returning its id"""
     fp = tempfile.NamedTemporaryFile(mode="w", delete=False)
     fp.write(qasm_data)
     fp.close()
@@ -27,7 +29,7 @@ def submit_job(nb, ipfs, qasm_data, num_qubits, depth, options):
 
     repeat_until_done(
         lambda: nb.submit_job(
-            num_qubits, depth, options["shots"], job_file, options["reward"]
+            num_qubits, depth, options["shots"], job_file, options["reward"], circuits
         )
     )
     return repeat_until_done(lambda: nb.get_latest_jobs())[-1]["id"]
@@ -41,8 +43,10 @@ def job_remove(nb, jid):
     return repeat_until_done(lambda: nb.remove_job(jid))
 
 
-def job_result(nb, ipfs, jid):
-    j = repeat_until_done(lambda: nb.get_job(jid))
+def job_result(nb, ipfs, jid, state=None):
+    """Download the result and the traps of job `jid`; `state` is its already
+    fetched state, if any"""
+    j = state or repeat_until_done(lambda: nb.get_job(jid))
     data = json.loads(ipfs.get(j["result_file"]))
     trap_list = json.loads(ipfs.get(j["trap_file"]))
     return data, trap_list
@@ -0,0 +1,156 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import random
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+from ..jobsync import FINAL_STATUSES
+
+
+class JobMonitor:
+    """Track the outstanding jobs of a blockchain client, polling their state in
+    a single get_jobs_by_ids call per round from a background thread. Every
+    watched job gets a future, resolved with its state (id, status, result_file,
+    trap_file) once it reaches a final status; the job is then forgotten, so the
+    final state is only kept by the future.
+
+    Rounds follow each other every `min_interval` seconds while jobs change,
+    backing off exponentially up to `max_interval` while they don't (or the
+    calls fail); intervals are randomized by +-`jitter` so many clients don't
+    poll in lockstep."""
+
+    _shared: Dict[int, "JobMonitor"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        nb,
+        min_interval: float = 2.0,
+        max_interval: float = 60.0,
+        backoff: float = 1.5,
+        jitter: float = 0.2,
+        rand: Callable[[], float] = random.random,
+    ):
+        self.nb = nb
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.rand = rand
+
+        self.futures: Dict[str, Future] = {}
+        self.states: Dict[str, Optional[dict]] = {}
+        self.interval = min_interval
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = False
+        self.thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def shared(cls, nb) -> "JobMonitor":
+        """Return the process wide monitor of `nb`"""
+        with cls._shared_lock:
+            if id(nb) not in cls._shared:
+                cls._shared[id(nb)] = cls(nb)
+            return cls._shared[id(nb)]
+
+    def watch(self, job_id: str) -> Future:
+        """Start tracking `job_id`, returning the future of its final state"""
+        with self.lock:
+            if job_id in self.futures:
+                return self.futures[job_id]
+
+            f: Future = Future()
+            self.futures[job_id] = f
+            self.states.setdefault(job_id, None)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+            self.interval = self.min_interval
+            self.wakeup.set()
+            return f
+
+    def state(self, job_id: str) -> Optional[dict]:
+        """Return the latest polled state of `job_id`, while it is watched"""
+        with self.lock:
+            return self.states.get(job_id)
+
+    def _forget(self, job_id: str):
+        del self.futures[job_id]
+        del self.states[job_id]
+
+    def pending(self):
+        """Return the watched jobs, forgetting those whose future was cancelled"""
+        with self.lock:
+            for jid in [jid for jid, f in self.futures.items() if f.done()]:
+                self._forget(jid)
+            return list(self.futures)
+
+    def poll(self) -> bool:
+        """Poll the state of the pending jobs once, returning True if any of them
+        changed"""
+        ids = self.pending()
+        if not ids:
+            return False
+
+        changed = False
+        states = self.nb.get_jobs_by_ids(ids)
+        with self.lock:
+            for jid, s in zip(ids, states):
+                f = self.futures.get(jid)
+                if f is None:
+                    continue
+                if s != self.states.get(jid):
+                    changed = True
+                self.states[jid] = s
+
+                if s is None:
+                    self._forget(jid)
+                    f.set_exception(KeyError(f"Job {jid} not found"))
+                elif s["status"] in FINAL_STATUSES:
+                    self._forget(jid)
+                    f.set_result(s)
+        return changed
+
+    def _next_interval(self, changed: bool):
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+        return self.interval * (1 + self.jitter * (2 * self.rand() - 1))
+
+    def _run(self):
+        while not self.stopped:
+            if not self.pending():
+                self.wakeup.wait()
+                self.wakeup.clear()
+                continue
+
+            try:
+                changed = self.poll()
+            except Exception as e:
+                print("JobMonitor: failed to poll the jobs:", e)
+                changed = False
+
+            self.wakeup.clear()
+            self.wakeup.wait(self._next_interval(changed))
+
+    def stop(self):
+        self.stopped = True
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join()
@@ -21,6 +21,7 @@ from qiskit.providers import Options, convert_to_target
 from qiskit.providers.models import BackendConfiguration
 
 from ...blockchain import IPFSGateway, NearBlockchain
+from ...jobfile import dumps_circuits
 from ..base import submit_job
 from .dqpujob import DQPUJob
 
@@ -58,6 +59,9 @@ BASIS_GATES = sorted(
     ]
 )
 
+# Maximum number of circuits of a job, as enforced by the contract
+MAX_CIRCUITS = 300
+
 
 class DQPUBackend(Backend):
     def __init__(self, network: str = "testnet", provider=None):
@@ -106,14 +110,15 @@ class DQPUBackend(Backend):
 
     @property
     def max_circuits(self):
-        return 1
+        return MAX_CIRCUITS
 
     @classmethod
     def _default_options(cls):
         return Options(shots=1024, reward=0.0001)
 
-    def run(self, circuit, **kwargs):
-        # serialize circuits submit to backend and create a job
+    def run(self, circuits, **kwargs):
+        # serialize circuits submit to backend and create a job; a list of circuits
+        # is submitted as a single multi-circuit job
         for kwarg in kwargs:
             if not hasattr(self.options, kwarg):
                 warnings.warn(
@@ -126,14 +131,20 @@ class DQPUBackend(Backend):
             "reward": kwargs.get("reward", self.options.reward),
         }
 
-        qasm_data = qasm2.dumps(circuit)
+        if not isinstance(circuits, list):
+            circuits = [circuits]
+        if not 0 < len(circuits) <= MAX_CIRCUITS:
+            raise ValueError(f"A job runs from 1 to {MAX_CIRCUITS} circuits")
+
+        qasm_data = dumps_circuits([qasm2.dumps(c) for c in circuits])
 
         job_id = submit_job(
             self.near_blockchain,
             self.ipfs_gateway,
             qasm_data,
-            circuit.num_qubits,
-            circuit.depth(),
+            max(c.num_qubits for c in circuits),
+            sum(c.depth() for c in circuits),
             options,
+            len(circuits),
         )
-        return DQPUJob(self, job_id, options, circuit)
+        return DQPUJob(self, job_id, options, circuits)
@@ -12,71 +12,90 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import time
+from concurrent import futures
 
 from qiskit.providers import JobError, JobTimeoutError
 from qiskit.providers import JobV1 as Job
 from qiskit.providers.jobstatus import JobStatus
 from qiskit.result import Result
 
+from ...jobfile import unpack
 from ...verifier import BasicTrapInfo, BasicTrapper
 from ..base import job_remove, job_result, job_status
+from ..monitor import JobMonitor
 
 
 class DQPUJob(Job):
-    def __init__(self, backend, job_id, options, circuit):
+    def __init__(self, backend, job_id, options, circuits):
         super().__init__(backend, job_id)
         self._backend = backend
         self.job_id = job_id
         self.options = options
-        self.circuit = circuit
+        self.circuits = circuits if isinstance(circuits, list) else [circuits]
         self._results = None
+        self._state = None
 
     def submit(self):
         pass
 
-    def _wait_for_result(self, timeout=None, wait=5):
-        start_time = time.time()
+    def _monitor(self):
+        return JobMonitor.shared(self._backend.near_blockchain)
 
-        while True:
-            elapsed = time.time() - start_time
-            if timeout and elapsed >= timeout:
+    def _wait_for_result(self, timeout=None, wait=5):
+        # The job state is polled by the shared monitor, together with the other
+        # pending jobs; `wait` is kept for compatibility
+
+        # The monitor forgets the job once final, the state is kept here
+        if self._state is None:
+            try:
+                self._state = self._monitor().watch(self.job_id).result(timeout)
+            except futures.TimeoutError:
                 raise JobTimeoutError("Timed out waiting for result")
-            status = self.raw_status()
-            if status == "executed":
-                break
-            if status == "invalid":
-                raise JobError("Job has been marked as invalid")
-            time.sleep(wait)
+            except KeyError as e:
+                raise JobError(str(e))
+
+        state = self._state
+        if state["status"] == "invalid":
+            raise JobError("Job has been marked as invalid")
 
         if self._results is None:
             self._results = job_result(
-                self._backend.near_blockchain, self._backend.ipfs_gateway, self.job_id
+                self._backend.near_blockchain,
+                self._backend.ipfs_gateway,
+                self.job_id,
+                state,
             )
         return self._results
 
     def result(self, timeout=None, wait=5):
-        counts, trap_list = self._wait_for_result(timeout, wait)
-
-        # TODO: handle different trap classes
-        traps = list(map(BasicTrapInfo.loads, trap_list))
-        counts = BasicTrapper().untrap_results(traps, counts)
-
-        results = [
-            {
-                "success": True,
-                "header": {"name": self.circuit.name},
-                "shots": len(counts),
-                "data": {"counts": counts},
-            }
-        ]
+        counts_data, trap_data = self._wait_for_result(timeout, wait)
+
+        # Multi-circuit jobs have the counts and the traps of every circuit
+        results = []
+        for circuit, counts, trap_list in zip(
+            self.circuits,
+            unpack(counts_data, len(self.circuits)),
+            unpack(trap_data, len(self.circuits)),
+        ):
+            # TODO: handle different trap classes
+            traps = list(map(BasicTrapInfo.loads, trap_list))
+            counts = BasicTrapper().untrap_results(traps, counts)
+
+            results.append(
+                {
+                    "success": True,
+                    "header": {"name": circuit.name},
+                    "shots": len(counts),
+                    "data": {"counts": counts},
+                }
+            )
         return Result.from_dict(
             {
                 "results": results,
                 "backend_name": self._backend.configuration().backend_name,
                 "backend_version": self._backend.configuration().backend_version,
                 "job_id": self.job_id,
-                "qobj_id": self.circuit.name,
+                "qobj_id": self.circuits[0].name,
                 "success": True,
             }
         )
@@ -85,6 +104,11 @@ class DQPUJob(Job):
         return job_remove(self._backend.near_blockchain, self.job_id)
 
     def raw_status(self):
+        # The latest state polled by the monitor while the job is watched, the
+        # contract is queried only for the jobs not (or not yet) polled
+        state = self._state or self._monitor().state(self.job_id)
+        if state is not None:
+            return state["status"]
         return job_status(self._backend.near_blockchain, self.job_id)
 
     def status(self):
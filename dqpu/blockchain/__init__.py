@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from .asyncnear import AsyncNearBlockchain  # noqa: F401
 from .blockchain import repeat_until_done  # noqa: F401
 from .ipfs_gateway import IPFSGateway, start_ipfs_daemon, stop_ipfs_daemon  # noqa: F401
 from .near import NearBlockchain, from_near, to_near  # noqa: F401
@@ -0,0 +1,257 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import asyncio
+import json
+import time
+from typing import List, Optional
+
+import base58
+from py_near import transactions
+from py_near.account import Account
+from py_near.constants import DEFAULT_ATTACHED_GAS
+from py_near.exceptions.provider import InvalidNonce
+
+from ..nonces import NonceManager
+from .near import from_near, load_credentials, network_config, success_value, to_near
+
+
+class AsyncNearBlockchain:
+    """Coroutine interface to the dqpu contract, to be used from an event loop:
+
+        async with AsyncNearBlockchain("dqpu_alice.testnet") as nb:
+            jobs = await asyncio.gather(*[nb.get_job(i) for i in ids])
+
+    Transactions are signed here with nonces from a NonceManager, so many of
+    them can be sent concurrently from the same account."""
+
+    # Seconds a block hash is reused as the transactions reference block
+    BLOCK_HASH_TTL = 50
+
+    # Attempts of a transaction rejected for its nonce
+    NONCE_RETRIES = 3
+
+    def __init__(self, account: str, network="testnet"):
+        self.network = network
+        self.contract, self.rpc_addr = network_config(network)
+        self.account_id, self.private_key = load_credentials(account, network)
+        self.account: Account = None  # type: ignore  # set by startup
+        self.nonces = NonceManager(self._chain_nonce)
+        self._block_hash: Optional[bytes] = None
+        self._block_hash_ts = 0.0
+
+    async def startup(self):
+        self.account = Account(self.account_id, self.private_key, self.rpc_addr)
+        await self.account.startup()
+        return self
+
+    async def close(self):
+        await self.account.shutdown()
+
+    async def __aenter__(self):
+        return await self.startup()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def balance(self):
+        return from_near(await self.account.get_balance())
+
+    async def _chain_nonce(self) -> int:
+        return (await self.account.get_access_key(self.account.signer)).nonce
+
+    async def _reference_block(self) -> bytes:
+        if self._block_hash is None or time.time() > (
+            self._block_hash_ts + self.BLOCK_HASH_TTL
+        ):
+            status = await self.account.provider.get_status()
+            self._block_hash = base58.b58decode(
+                status["sync_info"]["latest_block_hash"].encode("utf8")
+            )
+            self._block_hash_ts = time.time()
+        return self._block_hash
+
+    async def view(self, view_name: str, params):
+        r = await self.account.view_function(self.contract, view_name, params)
+        return r.result
+
+    async def call(self, function_name: str, params, amount=0):
+        """Call `function_name`, returning the transaction hash"""
+        return (await self._call(function_name, params, amount)).transaction.hash
+
+    async def call_value(self, function_name: str, params, amount=0):
+        """Call `function_name`, returning the value it returned"""
+        return success_value((await self._call(function_name, params, amount)).status)
+
+    async def _call(self, function_name: str, params, amount=0):
+        actions = [
+            transactions.create_function_call_action(
+                function_name,
+                json.dumps(params).encode("utf8"),
+                DEFAULT_ATTACHED_GAS,
+                to_near(amount),
+            )
+        ]
+
+        async def send(nonce):
+            tx = (
+                self.account_id,
+                self.account.signer,
+                self.contract,
+                nonce,
+                actions,
+                await self._reference_block(),
+            )
+            return await self.account.provider.send_tx_and_wait(
+                transactions.sign_and_serialize_transaction(*tx),
+                trx_hash=transactions.calc_trx_hash(*tx),
+                receiver_id=self.contract,
+            )
+
+        r = await self.nonces.send(send, (InvalidNonce,), self.NONCE_RETRIES)
+
+        if "Failure" in r.status:
+            raise Exception(r.status["Failure"])
+        return r
+
+    # Submit a new quantum job, made of `circuits` circuits if greater than 1
+    async def submit_job(self, qubits, depth, shots, job_file, reward, circuits=1):
+        return await self.call(
+            "submit_job",
+            {
+                "qubits": qubits,
+                "depth": depth,
+                "shots": shots,
+                "job_file": job_file,
+                **({"circuits": circuits} if circuits > 1 else {}),
+            },
+            reward,
+        )
+
+    # Remove a pending-validation or waiting job
+    async def remove_job(self, id):
+        return await self.call("remove_job", {"id": id})
+
+    # Called by validators, set the validity of a pending-validation job
+    async def set_job_validity(
+        self, id: int, valid: bool, trapped_file: Optional[str] = None
+    ):
+        return await self.call(
+            "set_job_validity", {"id": id, "valid": valid, "trapped_file": trapped_file}
+        )
+
+    # Submit a result for a waiting job, with the caution
+    async def submit_job_result(self, id: int, result_file: str, deposit: int):
+        return await self.call(
+            "submit_job_result", {"id": id, "result_file": result_file}, deposit
+        )
+
+    # Called by validators, set the validity of a job result for a 'validating-result' job
+    async def set_result_validity(self, id: int, valid: bool, trap_file: str = ""):
+        return await self.call(
+            "set_result_validity", {"id": id, "valid": valid, "trap_file": trap_file}
+        )
+
+    # Called by validators, set the validity of many pending-validation jobs; items
+    # are dicts with id, valid and trapped_file. Return the ids of the updated jobs
+    async def set_job_validity_batch(self, items: List[dict]):
+        return await self.call_value("set_job_validity_batch", {"items": items})
+
+    # Submit the results of many waiting jobs, items are dicts with id and
+    # result_file; the deposit in excess of the cautions is sent back. Return the
+    # ids of the updated jobs
+    async def submit_job_result_batch(self, items: List[dict], deposit: float):
+        return await self.call_value(
+            "submit_job_result_batch", {"items": items}, deposit
+        )
+
+    # Called by validators, set the validity of many job results; items are dicts
+    # with id, valid and trap_file. Return the ids of the updated jobs
+    async def set_result_validity_batch(self, items: List[dict]):
+        return await self.call_value("set_result_validity_batch", {"items": items})
+
+    # Get latest quantum job list
+    async def get_latest_jobs(self, limit=50):
+        return await self.view("get_latest_jobs", {"limit": limit})
+
+    async def get_jobs(self, from_index=0, limit=50):
+        return await self.view("get_jobs", {"from_index": from_index, "limit": limit})
+
+    # Get the jobs in a status (pending-validation, waiting or validating-result)
+    async def get_jobs_by_status(self, status: str, from_index=0, limit=50):
+        return await self.view(
+            "get_jobs_by_status",
+            {"status": status, "from_index": from_index, "limit": limit},
+        )
+
+    # Get the status, result_file and trap_file of many jobs (None for missing
+    # ones), asking `chunk` jobs per view concurrently
+    async def get_jobs_by_ids(self, ids: List[str], chunk=100):
+        pages = await asyncio.gather(
+            *[
+                self.view("get_jobs_by_ids", {"ids": ids[i : i + chunk]})
+                for i in range(0, len(ids), chunk)
+            ]
+        )
+        return [j for page in pages for j in page]
+
+    # Get a single quantum job by its id
+    async def get_job(self, id: str):
+        return await self.view("get_job", {"id": id})
+
+    # Get a quantum job status by its id
+    async def get_job_status(self, id: str):
+        return await self.view("get_job_status", {"id": id})
+
+    async def get_number_of_jobs(self):
+        return await self.view("get_number_of_jobs", {})
+
+    async def get_number_of_verifiers(self):
+        return await self.view("get_number_of_verifiers", {})
+
+    async def get_handled_amount(self):
+        return await self.view("get_handled_amount", {})
+
+    # Add the jobs with id in [from_index, from_index + limit) to the status indexes
+    async def rebuild_status_index(self, from_index=0, limit=50):
+        return await self.call(
+            "rebuild_status_index", {"from_index": from_index, "limit": limit}
+        )
+
+    # Clear all jobs
+    async def clear_jobs(self):
+        return await self.call("clear_jobs", {})
+
+    async def get_jobs_stats(self, limit=1000):
+        return await self.view("get_jobs_stats", {"limit": limit})
+
+    # Add a verifier
+    async def add_verifier(self, account):
+        return await self.call("add_verifier", {"account": account})
+
+    # Remove a verifier
+    async def remove_verifier(self, account):
+        return await self.call("remove_verifier", {"account": account})
+
+    # Return true if the account is a verifier
+    async def is_a_verifier(self, account):
+        return await self.view("is_a_verifier", {"account": account})
+
+    async def get_verifiers(self):
+        return await self.view("get_verifiers", {})
+
+    # Change contract owner
+    async def set_owner(self, account):
+        return await self.call("set_owner", {"new_owner": account})
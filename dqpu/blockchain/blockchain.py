@@ -12,7 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import itertools
 import time
+from typing import Iterator, List, Optional
 
 
 def repeat_until_done(f, n_iterations=10, wait_time=5):
@@ -43,15 +46,74 @@ class Blockchain:
     def get_jobs(self, from_index, limit):
         raise Exception("Abstract: blockchain.get_number_of_jobs")
 
-    def get_jobs_paginated(self, from_index=0, to_index=None, limit=50, reverse=False):
-        n = self.get_number_of_jobs() if to_index is None else to_index
-        i = from_index
-        js = []
-
-        while i < n:
-            js += self.get_jobs(from_index=i, limit=50)
-            i += limit
-
+    def get_latest_jobs(self, limit=50):
+        raise Exception("Abstract: blockchain.get_latest_jobs")
+
+    async def get_jobs_async(self, from_index, limit):
+        """Coroutine version of get_jobs; providers with an async client should
+        override it, by default get_jobs runs in a thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get_jobs, from_index, limit)
+
+    def get_latest_job_id(self) -> int:
+        """Return the id of the latest job; job ids are sequential, but removed
+        jobs are not counted by get_number_of_jobs"""
+        latest = [int(j["id"]) for j in self.get_latest_jobs()]
+        return max(latest + [self.get_number_of_jobs()])
+
+    async def _get_page(self, start: int, end: int) -> List[dict]:
+        # Older contracts return the job at from_index + limit too
+        page = await self.get_jobs_async(start, end - start)
+        return [j for j in page if start <= int(j["id"]) < end]
+
+    def iter_jobs_paginated(
+        self,
+        from_index: int = 0,
+        to_index: Optional[int] = None,
+        limit: int = 50,
+        concurrency: int = 8,
+    ) -> Iterator[List[dict]]:
+        """Yield the pages of jobs with id in [from_index, to_index) as they
+        arrive (not in order), fetching up to `concurrency` pages at once"""
+        n = self.get_latest_job_id() + 1 if to_index is None else to_index
+        starts = iter(range(from_index, n, limit))
+
+        loop = asyncio.new_event_loop()
+        pending: set = set()
+        try:
+            while True:
+                for s in itertools.islice(starts, concurrency - len(pending)):
+                    pending.add(loop.create_task(self._get_page(s, min(s + limit, n))))
+                if not pending:
+                    break
+
+                done, pending = loop.run_until_complete(
+                    asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                )
+                for t in done:
+                    yield t.result()
+        finally:
+            for t in pending:
+                t.cancel()
+            if pending:
+                loop.run_until_complete(
+                    asyncio.gather(*pending, return_exceptions=True)
+                )
+            loop.close()
+
+    def get_jobs_paginated(
+        self, from_index=0, to_index=None, limit=50, reverse=False, concurrency=8
+    ):
+        js = sorted(
+            (
+                j
+                for page in self.iter_jobs_paginated(
+                    from_index, to_index, limit, concurrency
+                )
+                for j in page
+            ),
+            key=lambda j: int(j["id"]),
+        )
         return js if not reverse else js[::-1]
 
     def get_all_jobs(self, reverse=False):
@@ -13,12 +13,13 @@
 # limitations under the License.
 
 import asyncio
+import base64
 import json
 import os
-from typing import Optional
+import threading
+from typing import List, Optional
 
 from py_near.account import Account
-from py_near.exceptions.exceptions import RpcEmptyResponse
 
 from .blockchain import Blockchain
 
@@ -51,91 +52,153 @@ def from_near(v):
     return int(v) / 1000000000000000000000000.0
 
 
-def asyncio_run_nested(v, n_repeat=5):
-    try:
-        return asyncio.run(v())
-    except RpcEmptyResponse as e:
-        print(e)
-        raise RpcEmptyResponse()
-    except Exception as e:
-        print(e)
-        import nest_asyncio
+def success_value(status: dict):
+    """Decode the value returned by a successful function call, from the status of
+    its transaction"""
+    value = status.get("SuccessValue")
+    if not value:
+        return None
+    return json.loads(base64.b64decode(value))
 
-        get_ipython()  # type: ignore # noqa: F821
-        nest_asyncio.apply()
-        loop = asyncio.get_event_loop()
-        return loop.run_until_complete(v())
+
+def network_config(network: str):
+    """Return the (contract, rpc address) of a network"""
+    if network == "testnet":
+        return "dqpu_7.testnet", "https://rpc.testnet.near.org"
+    return None, "https://rpc.mainnet.near.org"
+
+
+def load_credentials(account: str, network: str):
+    """Return the (account id, private key) of a near-cli wallet file, given its
+    path or the account name"""
+    fn = account
+    if "/" not in account:
+        fn = os.path.expanduser(
+            os.path.join("~", ".near-credentials", network, account + ".json")
+        )
+
+    if not os.path.exists(fn):
+        raise Exception(f"Unable to load wallet file: {fn}")
+
+    with open(fn, "r") as wf:
+        w = json.loads(wf.read())
+    return w["account_id"], w["private_key"]
+
+
+class EventLoopThread:
+    """Event loop running forever on a daemon thread, so async clients (and their
+    HTTP sessions, bound to the loop they were created on) live as long as the
+    object using them. Coroutines are submitted from any thread, or any other
+    event loop (ie: inside Jupyter)."""
+
+    def __init__(self, name="near-rpc"):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name=name, daemon=True
+        )
+        self.thread.start()
+
+    def run(self, coro, timeout=None):
+        """Run `coro` on the loop, blocking until its result"""
+        if threading.current_thread() is self.thread:
+            raise RuntimeError("EventLoopThread.run called from its own loop")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def wrap(self, coro):
+        """Await `coro` running on the loop, from any event loop"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            return await coro
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(coro, self.loop)
+        )
+
+    def stop(self):
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+        self.loop.close()
 
 
 class NearBlockchain(Blockchain):
     def __init__(self, account: str, network="testnet"):
         self.network = network
+        self.contract, self.rpc_addr = network_config(network)
 
-        if self.network == "testnet":
-            self.contract = "dqpu_7.testnet"
-            self.rpc_addr = "https://rpc.testnet.near.org"
-        else:
-            self.rpc_addr = "https://rpc.mainnet.near.org"
-
+        # Every RPC runs on this loop, reusing the connections of the account
+        self.runner = EventLoopThread()
         self.account = self.load_account(account)
 
-    def balance(self):
-        async def v():
-            return await self.account.get_balance()
+    def close(self):
+        """Close the RPC connections and stop the event loop"""
+        self.runner.run(self.account.shutdown())
+        self.runner.stop()
 
-        return from_near(asyncio.run(v()))
+    def balance(self):
+        return from_near(self.runner.run(self.account.get_balance()))
 
     def create_account(self, name: str, useFaucet: bool = True):
         pass
 
     def load_account(self, account: str):
-        fn = account
-        if "/" not in account:
-            fn = os.path.expanduser(
-                os.path.join("~", ".near-credentials", self.network, account + ".json")
-            )
-
-        if not os.path.exists(fn):
-            raise Exception(f"Unable to load wallet file: {fn}")
-
-        with open(fn, "r") as wf:
-            w = json.loads(wf.read())
-
-            acc = Account(w["account_id"], w["private_key"], self.rpc_addr)
-
-            async def v():
-                await acc.startup()
-
-            asyncio_run_nested(v)
+        account_id, private_key = load_credentials(account, self.network)
 
+        # The account is created and started on the loop that will use it
+        async def v():
+            acc = Account(account_id, private_key, self.rpc_addr)
+            await acc.startup()
             return acc
 
-    def view(self, view_name: str, params):
-        async def v():
-            return await self.account.view_function(self.contract, view_name, params)
+        return self.runner.run(v())
 
-        return asyncio_run_nested(v).result
+    async def _view(self, view_name: str, params):
+        r = await self.account.view_function(self.contract, view_name, params)
+        return r.result
 
-    def call(self, function_name: str, params, amount=0):
-        async def v():
-            return await self.account.function_call(
-                self.contract,
-                function_name,
-                params,
-                amount=to_near(amount),
-            )
+    async def view_async(self, view_name: str, params):
+        return await self.runner.wrap(self._view(view_name, params))
 
-        r = asyncio_run_nested(v)
+    def view(self, view_name: str, params):
+        return self.runner.run(self._view(view_name, params))
+
+    async def _call(self, function_name: str, params, amount=0):
+        r = await self.account.function_call(
+            self.contract,
+            function_name,
+            params,
+            amount=to_near(amount),
+        )
 
         if "Failure" in r.status:
             raise Exception(r.status["Failure"])
-        return r.transaction.hash
+        return r
 
-    # Submit a new quantum job
-    def submit_job(self, qubits, depth, shots, job_file, reward):
+    def call(self, function_name: str, params, amount=0):
+        """Call `function_name`, returning the transaction hash"""
+        return self.runner.run(
+            self._call(function_name, params, amount)
+        ).transaction.hash
+
+    def call_value(self, function_name: str, params, amount=0):
+        """Call `function_name`, returning the value it returned"""
+        return success_value(
+            self.runner.run(self._call(function_name, params, amount)).status
+        )
+
+    # Submit a new quantum job, made of `circuits` circuits if greater than 1
+    def submit_job(self, qubits, depth, shots, job_file, reward, circuits=1):
         return self.call(
             "submit_job",
-            {"qubits": qubits, "depth": depth, "shots": shots, "job_file": job_file},
+            {
+                "qubits": qubits,
+                "depth": depth,
+                "shots": shots,
+                "job_file": job_file,
+                **({"circuits": circuits} if circuits > 1 else {}),
+            },
             reward,
         )
 
@@ -163,6 +226,22 @@ class NearBlockchain(Blockchain):
             "set_result_validity", {"id": id, "valid": valid, "trap_file": trap_file}
         )
 
+    # Called by validators, set the validity of many pending-validation jobs; items
+    # are dicts with id, valid and trapped_file. Return the ids of the updated jobs
+    def set_job_validity_batch(self, items: List[dict]):
+        return self.call_value("set_job_validity_batch", {"items": items})
+
+    # Submit the results of many waiting jobs, items are dicts with id and
+    # result_file; the deposit in excess of the cautions is sent back. Return the
+    # ids of the updated jobs
+    def submit_job_result_batch(self, items: List[dict], deposit: float):
+        return self.call_value("submit_job_result_batch", {"items": items}, deposit)
+
+    # Called by validators, set the validity of many job results; items are dicts
+    # with id, valid and trap_file. Return the ids of the updated jobs
+    def set_result_validity_batch(self, items: List[dict]):
+        return self.call_value("set_result_validity_batch", {"items": items})
+
     # Get latest quantum job list
     def get_latest_jobs(self, limit=50):
         return self.view("get_latest_jobs", {"limit": limit})
@@ -170,6 +249,32 @@ class NearBlockchain(Blockchain):
     def get_jobs(self, from_index=0, limit=50):
         return self.view("get_jobs", {"from_index": from_index, "limit": limit})
 
+    async def get_jobs_async(self, from_index=0, limit=50):
+        return await self.view_async(
+            "get_jobs", {"from_index": from_index, "limit": limit}
+        )
+
+    # Get the jobs in a status (pending-validation, waiting or validating-result)
+    def get_jobs_by_status(self, status: str, from_index=0, limit=50):
+        return self.view(
+            "get_jobs_by_status",
+            {"status": status, "from_index": from_index, "limit": limit},
+        )
+
+    # Get the status, result_file and trap_file of many jobs (None for missing
+    # ones), asking `chunk` jobs per view concurrently
+    def get_jobs_by_ids(self, ids: List[str], chunk=100):
+        async def v():
+            pages = await asyncio.gather(
+                *[
+                    self._view("get_jobs_by_ids", {"ids": ids[i : i + chunk]})
+                    for i in range(0, len(ids), chunk)
+                ]
+            )
+            return [j for page in pages for j in page]
+
+        return self.runner.run(v())
+
     # Get a single quantum job by its id
     def get_job(self, id: str):
         return self.view("get_job", {"id": id})
@@ -187,6 +292,12 @@ class NearBlockchain(Blockchain):
     def get_handled_amount(self):
         return self.view("get_handled_amount", {})
 
+    # Add the jobs with id in [from_index, from_index + limit) to the status indexes
+    def rebuild_status_index(self, from_index=0, limit=50):
+        return self.call(
+            "rebuild_status_index", {"from_index": from_index, "limit": limit}
+        )
+
     # Clear all jobs
     def clear_jobs(self):
         return self.call("clear_jobs", {})
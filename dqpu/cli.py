@@ -21,6 +21,7 @@ from .blockchain import (
     IPFSGateway,
     NearBlockchain,
 )  # , start_ipfs_daemon, stop_ipfs_daemon
+from .jobfile import loads_circuits
 from .q import Circuit
 from .utils import create_dqpu_dirs
 
@@ -40,6 +41,7 @@ ACTIONS = [
     "submit-result",
     "submit-random",
     "clear-jobs",
+    "rebuild-status-index",
     "add-verifier",
     "remove-verifier",
     "is-a-verifier",
@@ -86,7 +88,11 @@ def cli():  # noqa: C901
     )
 
     group_submit = parser.add_argument_group("submit")
-    group_submit.add_argument("-f", "--file", help="openqasm2 file to submit")
+    group_submit.add_argument(
+        "-f",
+        "--file",
+        help="openqasm2 file to submit, or a json list of them (multi-circuit job)",
+    )
     group_submit.add_argument("-t", "--trap", help="the trap file", default="")
     group_submit.add_argument(
         "-s", "--shots", help="number of shots to request", type=int, default=1024
@@ -127,19 +133,21 @@ def cli():  # noqa: C901
         print(json.dumps(nb.get_latest_jobs(), indent=2))
 
     elif args.action == "submit":
-        # Parse the qasm
+        # Parse the qasm, or the circuits of a multi-circuit job file
         qf = open(args.file, "r")
         qasm_data = qf.read()
-        circ = Circuit.fromQasmCircuit(qasm_data)
+        circs = [Circuit.fromQasmCircuit(c) for c in loads_circuits(qasm_data)]
 
         # Calcualte qubits, depth
-        qubits = circ.n_qbits
-        depth = len(circ.gates)
+        qubits = max(circ.n_qbits for circ in circs)
+        depth = sum(len(circ.gates) for circ in circs)
 
         # Upload job_file
         job_file = ipfs.upload(args.file)
 
-        print(nb.submit_job(qubits, depth, args.shots, job_file, args.reward))
+        print(
+            nb.submit_job(qubits, depth, args.shots, job_file, args.reward, len(circs))
+        )
         print(nb.get_latest_jobs()[0]["id"])
 
     elif args.action == "submit-random":
@@ -230,6 +238,13 @@ def cli():  # noqa: C901
     elif args.action == "clear-jobs":
         print(nb.clear_jobs())
 
+    elif args.action == "rebuild-status-index":
+        # Index the jobs created before the contract had the status indexes
+        latest = nb.get_latest_job_id()
+        for i in range(0, latest + 1, 50):
+            print(f"Indexing jobs {i}-{min(i + 50, latest + 1) - 1}")
+            print(nb.rebuild_status_index(i, 50))
+
     elif args.action == "add-verifier":
         print(nb.add_verifier(args.verifier))
 
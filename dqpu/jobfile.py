@@ -0,0 +1,61 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+from typing import Any, List, Union
+
+# A job file is an OpenQASM circuit, or for a multi-circuit job a json list of
+# OpenQASM circuits, each sampled for the job shots; the result and trap files of
+# a multi-circuit job are json lists as well, with an item per circuit.
+
+
+def dumps_circuits(circuits: List[str]) -> str:
+    """Serialize the job file of `circuits`"""
+    return circuits[0] if len(circuits) == 1 else json.dumps(circuits)
+
+
+def loads_circuits(data: Union[bytes, str]) -> List[str]:
+    """Return the OpenQASM circuits of a job file"""
+    if isinstance(data, bytes):
+        data = data.decode("ascii")
+
+    if not data.lstrip().startswith("["):
+        return [data]
+
+    circuits = json.loads(data)
+    if not circuits or not all(isinstance(c, str) for c in circuits):
+        raise ValueError("Invalid multi-circuit job file")
+    return circuits
+
+
+def pack(items: List[Any]) -> Any:
+    """Return the per circuit `items` (ie: counts, traps) in the job file format"""
+    return items[0] if len(items) == 1 else items
+
+
+def unpack(data: Any, n: int) -> List[Any]:
+    """Return the per circuit items of a job of `n` circuits, packed by `pack`"""
+    if n == 1:
+        return [data]
+
+    if not isinstance(data, list) or len(data) != n:
+        raise ValueError(f"Expected a list of {n} items")
+    return data
+
+
+def job_circuits(j) -> int:
+    """Return the number of circuits of job `j` (jobs submitted before the
+    multi-circuit jobs have a single one)"""
+    return int(j.get("circuits", 1))
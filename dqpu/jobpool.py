@@ -0,0 +1,86 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+from contextlib import contextmanager
+from typing import Callable
+
+from .sampler.sampler import Sampler
+
+
+def job_memory(qubits: int) -> float:
+    """Default estimated memory of a job: a complex128 statevector of `qubits`
+    qubits; nodes use the `Sampler.memory` of their samplers instead"""
+    return Sampler.memory(qubits)
+
+
+class JobPool:
+    """Admission control of the jobs run concurrently by `workers` threads. A job
+    is admitted only when its estimated memory and threads fit in what is left of
+    `memory_budget` bytes and of the workers, so small jobs get packed alongside
+    large ones; a job larger than the budget runs alone.
+
+    `memory(qubits)` estimates the peak memory in bytes of a job, see
+    Sampler.memory."""
+
+    def __init__(
+        self,
+        workers: int,
+        memory_budget: int,
+        memory: Callable[[int], float] = job_memory,
+    ):
+        self.workers = workers
+        self.memory_budget = memory_budget
+        self.memory = memory
+        self.memory_used = 0
+        self.threads_used = 0
+        self.cond = threading.Condition()
+
+    def job_memory(self, qubits: int) -> int:
+        """Memory held by a job; jobs over the budget (that run alone) hold all of it"""
+        return int(min(self.memory(qubits), self.memory_budget))
+
+    def job_threads(self, qubits: int) -> int:
+        """Threads used by a job: statevector kernels scale with the memory they
+        sweep, a thread per MB"""
+        return int(min(self.workers, max(1, self.memory(qubits) / (1 << 20))))
+
+    def _fits(self, memory, threads):
+        if self.threads_used == 0:
+            return True
+        return (
+            self.memory_used + memory <= self.memory_budget
+            and self.threads_used + threads <= self.workers
+        )
+
+    @contextmanager
+    def admit(self, qubits: int):
+        """Block until a job of `qubits` qubits fits in the budget, and hold its
+        share of the budget for the duration of the context"""
+        memory, threads = self.job_memory(qubits), self.job_threads(qubits)
+        with self.cond:
+            while not self._fits(memory, threads):
+                self.cond.wait()
+            self.memory_used += memory
+            self.threads_used += threads
+        try:
+            yield
+        finally:
+            self._release(memory, threads)
+
+    def _release(self, memory, threads):
+        with self.cond:
+            self.memory_used -= memory
+            self.threads_used -= threads
+            self.cond.notify_all()
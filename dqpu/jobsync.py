@@ -0,0 +1,185 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+# Statuses a job never leaves
+FINAL_STATUSES = ("executed", "invalid")
+
+
+class JobSync:
+    """Incremental view of the contract jobs. Job ids are sequential, so the sync
+    remembers the next id to fetch (the cursor) and, when the jobs stats change,
+    also re-fetches the window of jobs not yet in a final status (from the lowest
+    of their ids, the low watermark) to catch their status changes.
+
+    With `statuses`, only the jobs in these statuses are fetched instead, through
+    the contract status indexes (get_jobs_by_status). The view is weakly
+    consistent: pages are read at different blocks, and a job leaving an index
+    moves the last id of the index into its slot, so a scan running while jobs
+    change status can miss a job or list one that already left. A scan is
+    accepted when its size matches the stats, or when it lists the same ids as
+    the previous scan; otherwise the stats differ at the next poll, which scans
+    again.
+
+    Only the jobs not in a final status are kept; `poll` returns the jobs that are
+    new or changed since the previous poll, and `deltas` yields them, polling with
+    an interval that follows the observed rate of changes."""
+
+    # Scans of a status index before accepting an unstable one
+    SCAN_ATTEMPTS = 3
+
+    def __init__(
+        self,
+        nb,
+        from_index: int = 0,
+        page: int = 50,
+        concurrency: int = 8,
+        min_interval: float = 1.0,
+        max_interval: float = 20.0,
+        alpha: float = 0.3,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+        statuses: Optional[Sequence[str]] = None,
+    ):
+        self.nb = nb
+        self.statuses = statuses
+        self.cursor = from_index
+        self.page = page
+        self.concurrency = concurrency
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.alpha = alpha
+        self.clock = clock
+        self.sleep = sleep
+
+        self.jobs: Dict[str, dict] = {}
+        self.stats: Optional[dict] = None
+        self.rate = 0.0
+        self.interval = min_interval
+        self.last_poll: Optional[float] = None
+
+    def low_watermark(self) -> int:
+        return min((int(i) for i in self.jobs), default=self.cursor)
+
+    def active(self) -> List[dict]:
+        """Return (copies of) the known jobs not in a final status, oldest first"""
+        return [dict(j) for j in sorted(self.jobs.values(), key=lambda j: int(j["id"]))]
+
+    def _fetch(self, start: int, end: Optional[int] = None) -> List[dict]:
+        """Fetch the jobs with id in [start, end), up to the latest job if there is
+        no end, fetching `concurrency` pages at once"""
+        return self.nb.get_jobs_paginated(
+            start, end, self.page, concurrency=self.concurrency
+        )
+
+    def _scan_status(self, status: str) -> List[dict]:
+        jobs: List[dict] = []
+        while True:
+            page = self.nb.get_jobs_by_status(status, len(jobs), self.page)
+            jobs += page
+            if len(page) < self.page:
+                return jobs
+
+    def _fetch_status(self, status: str, expected: Optional[int] = None) -> List[dict]:
+        """Fetch all the jobs in `status`, scanning the index again until the scan
+        has the `expected` number of jobs or the same ids of the previous one"""
+        previous = None
+        for _ in range(self.SCAN_ATTEMPTS):
+            jobs = self._scan_status(status)
+            ids = set(j["id"] for j in jobs)
+            if len(ids) == len(jobs) == expected or ids == previous:
+                break
+            previous = ids
+        return jobs
+
+    def _update(self, jobs: List[dict], window: Optional[int]) -> List[dict]:
+        changed: Dict[str, dict] = {}
+        seen = set()
+        for j in jobs:
+            seen.add(j["id"])
+            if self.jobs.get(j["id"]) != j and j["id"] not in changed:
+                # Already final jobs found by the first sync are not deltas
+                if j["id"] in self.jobs or j["status"] not in FINAL_STATUSES:
+                    changed[j["id"]] = j
+            if j["status"] in FINAL_STATUSES:
+                self.jobs.pop(j["id"], None)
+            else:
+                self.jobs[j["id"]] = j
+            self.cursor = max(self.cursor, int(j["id"]) + 1)
+
+        # Jobs removed from the contract
+        if window is not None:
+            for jid in [i for i in self.jobs if window <= int(i) and i not in seen]:
+                del self.jobs[jid]
+
+        return sorted(changed.values(), key=lambda j: int(j["id"]))
+
+    def poll(self) -> List[dict]:
+        """Fetch the new and changed jobs; nothing is fetched but the stats if
+        they didn't change"""
+        now = self.clock()
+        stats = self.nb.get_jobs_stats()
+
+        changed = []
+        if stats != self.stats and self.statuses is not None:
+            # Jobs no longer listed left the statuses
+            jobs = [
+                j for s in self.statuses for j in self._fetch_status(s, stats.get(s))
+            ]
+            changed = self._update(jobs, 0)
+            self.stats = stats
+        elif stats != self.stats:
+            window = None
+            if self.stats is not None and self.jobs:
+                window = self.low_watermark()
+            jobs = [] if window is None else self._fetch(window, self.cursor)
+            changed = self._update(jobs + self._fetch(self.cursor), window)
+            self.stats = stats
+
+        self._adapt(len(changed), now)
+        return changed
+
+    def _adapt(self, n_changed: int, now: float):
+        """Update the EWMA of the changes per second, and poll about once per
+        change between min_interval and max_interval"""
+        if self.last_poll is not None:
+            elapsed = max(now - self.last_poll, 1e-3)
+            self.rate = self.alpha * n_changed / elapsed + (1 - self.alpha) * self.rate
+        self.last_poll = now
+
+        if self.rate <= 0:
+            self.interval = self.max_interval
+        else:
+            self.interval = min(
+                self.max_interval, max(self.min_interval, 1.0 / self.rate)
+            )
+
+    def deltas(self, heartbeat: float = 60.0) -> Iterator[List[dict]]:
+        """Poll forever, yielding the new and changed jobs; an empty delta is
+        yielded every `heartbeat` seconds without changes"""
+        last_yield = self.clock()
+        while True:
+            try:
+                changed = self.poll()
+            except Exception as e:
+                print("Job sync failed:", e)
+                changed = []
+
+            if changed or self.clock() - last_yield >= heartbeat:
+                last_yield = self.clock()
+                yield changed
+            self.sleep(self.interval)
@@ -0,0 +1,59 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import asyncio
+from typing import Awaitable, Callable, Optional, Tuple, Type
+
+
+class NonceManager:
+    """Nonces of an access key, assigned locally: the chain nonce is read once
+    with `fetch()`, then every transaction takes the next one under a lock, so
+    transactions in flight at the same time never share a nonce"""
+
+    def __init__(self, fetch: Callable[[], Awaitable[int]]):
+        self.fetch = fetch
+        self.nonce: Optional[int] = None
+        self.lock = asyncio.Lock()
+
+    async def next(self) -> int:
+        async with self.lock:
+            if self.nonce is None:
+                self.nonce = await self.fetch()
+            self.nonce += 1
+            return self.nonce
+
+    async def sync(self):
+        """Move past the chain nonce, after a transaction was rejected for its
+        nonce (ie: a later one was processed first, or another client used the
+        same key)"""
+        async with self.lock:
+            self.nonce = max(self.nonce or 0, await self.fetch())
+
+    async def send(
+        self,
+        send: Callable[[int], Awaitable],
+        invalid_nonce: Tuple[Type[Exception], ...],
+        attempts: int = 3,
+    ):
+        """Return `send(nonce)` with the next nonce; when it raises one of the
+        `invalid_nonce` exceptions, sync with the chain and send again, up to
+        `attempts` times"""
+        for attempt in range(attempts):
+            try:
+                return await send(await self.next())
+            except invalid_nonce:
+                if attempt == attempts - 1:
+                    raise
+                await self.sync()
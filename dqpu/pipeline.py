@@ -0,0 +1,126 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import queue
+import threading
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+_STOP = object()
+
+
+class Pipeline:
+    """Chain of stages connected by bounded queues. Items are (key, payload)
+    pairs: every stage runs `workers` threads calling `fn(key, payload)` and
+    passes the returned payload to the next stage; returning None (or raising)
+    drops the item. `on_exit(key, ok)` is called when an item leaves the
+    pipeline, with ok True if it went through every stage."""
+
+    def __init__(
+        self,
+        stages: Sequence[Tuple[str, Callable[[Any, Any], Any], int]],
+        maxsize: int = 2,
+        on_exit: Optional[Callable[[Any, bool], None]] = None,
+    ):
+        self.names = [name for name, _, _ in stages]
+        self.queues: List[queue.Queue] = [queue.Queue(maxsize) for _ in stages]
+        self.busy = [0] * len(stages)
+        self.on_exit = on_exit
+        self.in_flight = 0
+        self.cond = threading.Condition()
+        self.threads: List[List[threading.Thread]] = []
+
+        for i, (_, fn, workers) in enumerate(stages):
+            self.threads.append([])
+            for _ in range(workers):
+                t = threading.Thread(target=self._worker, args=(i, fn), daemon=True)
+                t.start()
+                self.threads[i].append(t)
+
+    def _exit(self, key, ok):
+        if self.on_exit is not None:
+            try:
+                self.on_exit(key, ok)
+            except Exception:
+                traceback.print_exc()
+
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+
+    def _worker(self, i, fn):
+        q = self.queues[i]
+        while True:
+            item = q.get()
+            if item is _STOP:
+                return
+
+            key, payload = item
+            with self.cond:
+                self.busy[i] += 1
+            try:
+                result = fn(key, payload)
+            except Exception:
+                traceback.print_exc()
+                result = None
+            finally:
+                with self.cond:
+                    self.busy[i] -= 1
+
+            if result is None:
+                self._exit(key, False)
+            elif i + 1 == len(self.queues):
+                self._exit(key, True)
+            else:
+                # Blocks while the next stage is full (backpressure)
+                self.queues[i + 1].put((key, result))
+
+    def offer(self, key, payload=None) -> bool:
+        """Enqueue an item in the first stage, unless its queue is full"""
+        with self.cond:
+            self.in_flight += 1
+        try:
+            self.queues[0].put_nowait((key, payload))
+            return True
+        except queue.Full:
+            with self.cond:
+                self.in_flight -= 1
+            return False
+
+    def depths(self) -> Dict[str, Tuple[int, int]]:
+        """Return (queued, running) items of every stage"""
+        return {
+            name: (q.qsize(), busy)
+            for name, q, busy in zip(self.names, self.queues, self.busy)
+        }
+
+    def report(self) -> str:
+        return ", ".join(
+            f"{name} {queued}+{running}"
+            for name, (queued, running) in self.depths().items()
+        )
+
+    def join(self):
+        """Wait for every item to leave the pipeline"""
+        with self.cond:
+            while self.in_flight > 0:
+                self.cond.wait()
+
+    def stop(self):
+        """Stop the workers, stage by stage, once the queued items are processed"""
+        for q, threads in zip(self.queues, self.threads):
+            for _ in threads:
+                q.put(_STOP)
+            for t in threads:
+                t.join()
@@ -16,7 +16,9 @@ from typing import Dict
 
 from . import utils  # noqa: F401
 from .circuit import Barrier, Circuit, Measure  # noqa: F401
+from .compact import CompactCircuit, GateRecord  # noqa: F401
 from .gate import Gate  # noqa: F401
 from .gates import Gates  # noqa: F401
+from .qasmparser import QasmParseError, parse_qasm  # noqa: F401
 
 ExperimentResult = Dict[str, int]
@@ -71,13 +71,27 @@ class Circuit:
 
         return qc
 
-    def apply(self, g, qb):
-        self.gates.append((g, qb))
+    def apply(self, g, qb, args=None):
+        self.gates.append((g, qb, args if args is not None else []))
 
     def measure(self, qb, cb=None):
         if cb is None:
             cb = qb
-        self.gates.append((Measure(), (qb, cb)))
+        self.gates.append((Measure(), (qb, cb), []))
+
+    def toCompact(self):
+        """Return the array backed representation of this circuit"""
+        from .compact import CompactCircuit
+
+        return CompactCircuit.fromCircuit(self)
+
+    def fingerprint(self) -> str:
+        """Canonical content hash of the circuit, see CompactCircuit.fingerprint"""
+        return self.toCompact().fingerprint()
+
+    @staticmethod
+    def fromCompact(cc):
+        return cc.toCircuit()
 
     def draw(self):
         print(f"QC({self.n_qbits},{self.n_cbits})", end=" ==> ")
@@ -95,7 +109,7 @@ class Circuit:
         G = nx.Graph()
 
         for x in self.gates:
-            a, p = x
+            a, p = x[0], x[1]
 
             if isinstance(a, Gate) and a.nq > 1:
                 G.add_edge(p[0], p[1])
@@ -171,13 +185,12 @@ class Circuit:
         qasm += "qreg q[" + str(self.n_qbits) + "];\n"
         qasm += "creg c[" + str(self.n_qbits) + "];\n"
 
-        for x in self.gates:
+        for a, p, ar in self.gates:
             args = ""
 
-            if len(x) == 2:
-                x = (x[0], x[1], [])
+            if isinstance(a, Measure):
+                continue
 
-            a, p, ar = x
             if len(ar) > 0:
                 args = ("(" + (",".join(ar)) + ")").replace(" ", "")
 
@@ -194,7 +207,7 @@ class Circuit:
         qc = QuantumCircuit(self.n_qbits, 0)
 
         for x in self.gates:
-            a, p = x
+            a, p = x[0], x[1]
 
             if isinstance(a, Gate):
                 if a.iden == "CX":
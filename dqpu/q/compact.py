@@ -0,0 +1,292 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+
+import numpy as np
+
+from .circuit import Circuit, Measure
+from .gate import Gate
+from .gates import Gates
+from .utils import eval_param
+
+# Opcodes of the standard gates; circuits can register other gates (ie: fused
+# unitaries) in their own gate table, after these ones
+GATE_TABLE = [
+    Gates.I,
+    Gates.X,
+    Gates.Y,
+    Gates.Z,
+    Gates.H,
+    Gates.S,
+    Gates.SDG,
+    Gates.T,
+    Gates.P,
+    Gates.R,
+    Gates.CX,
+    Gates.CY,
+    Gates.CZ,
+    Gates.SWAP,
+    Gates.CR,
+]
+OPCODES = {g.iden: i for i, g in enumerate(GATE_TABLE)}
+OP_MEASURE = -1
+
+
+class GateRecord:
+    """A single operation of a CompactCircuit; it unpacks as (gate, qubits, args)"""
+
+    __slots__ = ("gate", "qubits", "args")
+
+    def __init__(self, gate, qubits, args):
+        self.gate = gate
+        self.qubits = qubits
+        self.args = args
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, i):
+        return (self.gate, self.qubits, self.args)[i]
+
+    def __repr__(self):
+        return f"GateRecord({self.gate.iden}, {self.qubits}, {self.args})"
+
+
+class CompactCircuit:
+    """Structure of arrays circuit representation: operation `i` is the gate
+    `gate_table[opcodes[i]]` applied to `qubit0[i]` (and `qubit1[i]` for 2 qubit
+    gates, -1 otherwise) with arguments `params[param_idx[i]]` (-1 if none)"""
+
+    __slots__ = (
+        "n_qbits",
+        "n_cbits",
+        "gate_table",
+        "opcodes",
+        "qubit0",
+        "qubit1",
+        "param_idx",
+        "params",
+        "_params_lookup",
+        "size",
+    )
+
+    def __init__(self, qbn, cbn, capacity=64):
+        self.n_qbits = qbn
+        self.n_cbits = cbn
+        self.gate_table = GATE_TABLE
+        self.opcodes = np.empty(capacity, dtype=np.int16)
+        self.qubit0 = np.empty(capacity, dtype=np.int32)
+        self.qubit1 = np.empty(capacity, dtype=np.int32)
+        self.param_idx = np.empty(capacity, dtype=np.int32)
+        self.params = []
+        self._params_lookup = {}
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        ops, q0s, q1s, pis = self.arrays()
+        for op, q0, q1, pi in zip(
+            ops.tolist(), q0s.tolist(), q1s.tolist(), pis.tolist()
+        ):
+            if op == OP_MEASURE:
+                yield GateRecord(Measure(), (q0, q1), [])
+                continue
+
+            qubits = [q0] if q1 < 0 else [q0, q1]
+            args = list(self.params[pi]) if pi >= 0 else []
+            yield GateRecord(self.gate_table[op], qubits, args)
+
+    @property
+    def gates(self):
+        return list(self)
+
+    def arrays(self):
+        """Return the (opcodes, qubit0, qubit1, param_idx) arrays trimmed to size"""
+        return (
+            self.opcodes[: self.size],
+            self.qubit0[: self.size],
+            self.qubit1[: self.size],
+            self.param_idx[: self.size],
+        )
+
+    def _reserve(self, n):
+        if n <= len(self.opcodes):
+            return
+
+        capacity = max(n, 2 * len(self.opcodes))
+        for f in ("opcodes", "qubit0", "qubit1", "param_idx"):
+            a = getattr(self, f)
+            b = np.empty(capacity, dtype=a.dtype)
+            b[: self.size] = a[: self.size]
+            setattr(self, f, b)
+
+    def opcode(self, g: Gate) -> int:
+        """Return the opcode of `g`, registering it in the gate table if needed"""
+        op = OPCODES.get(g.iden)
+        if op is not None and GATE_TABLE[op] is g:
+            return op
+
+        for i in range(len(GATE_TABLE), len(self.gate_table)):
+            if self.gate_table[i] is g:
+                return i
+
+        return self.add_gate(g)
+
+    def add_gate(self, g: Gate) -> int:
+        """Register `g` in the gate table as a new opcode, without looking it up"""
+        if self.gate_table is GATE_TABLE:
+            self.gate_table = list(GATE_TABLE)
+        self.gate_table.append(g)
+        return len(self.gate_table) - 1
+
+    def param(self, args) -> int:
+        """Return the index of `args` in the parameter table, adding it if needed"""
+        if not args:
+            return -1
+
+        k = tuple(args)
+        i = self._params_lookup.get(k)
+        if i is None:
+            i = len(self.params)
+            self.params.append(k)
+            self._params_lookup[k] = i
+        return i
+
+    def append(self, opcode, q0, q1=-1, param_idx=-1):
+        self._reserve(self.size + 1)
+        i = self.size
+        self.opcodes[i] = opcode
+        self.qubit0[i] = q0
+        self.qubit1[i] = q1
+        self.param_idx[i] = param_idx
+        self.size += 1
+
+    def insert(self, i, opcode, q0, q1=-1, param_idx=-1):
+        self._reserve(self.size + 1)
+        for f, v in (
+            ("opcodes", opcode),
+            ("qubit0", q0),
+            ("qubit1", q1),
+            ("param_idx", param_idx),
+        ):
+            a = getattr(self, f)
+            a[i + 1 : self.size + 1] = a[i : self.size].copy()
+            a[i] = v
+        self.size += 1
+
+    def apply(self, g, qb, args=None):
+        if isinstance(qb, (int, np.integer)):
+            qb = [qb]
+        self.append(
+            self.opcode(g), qb[0], qb[1] if len(qb) > 1 else -1, self.param(args)
+        )
+
+    def measure(self, qb, cb=None):
+        if cb is None:
+            cb = qb
+        self.append(OP_MEASURE, qb, cb)
+
+    @staticmethod
+    def fromCircuit(qc: Circuit) -> "CompactCircuit":
+        cc = CompactCircuit(qc.n_qbits, qc.n_cbits, max(len(qc.gates), 1))
+        for x in qc:
+            if isinstance(x[0], Measure):
+                cc.measure(*x[1])
+            else:
+                cc.apply(x[0], x[1], x[2] if len(x) > 2 else None)
+        return cc
+
+    def toCircuit(self) -> Circuit:
+        qc = Circuit(self.n_qbits, self.n_cbits)
+        qc.gates = [(x.gate, x.qubits, x.args) for x in self]
+        return qc
+
+    def copy(self):
+        cc = CompactCircuit(self.n_qbits, self.n_cbits, max(self.size, 1))
+        if self.gate_table is not GATE_TABLE:
+            cc.gate_table = list(self.gate_table)
+        for f in ("opcodes", "qubit0", "qubit1", "param_idx"):
+            getattr(cc, f)[: self.size] = getattr(self, f)[: self.size]
+        cc.params = list(self.params)
+        cc._params_lookup = dict(self._params_lookup)
+        cc.size = self.size
+        return cc
+
+    def resolve(self, opcode, param_idx, cache=None):
+        """Return the gate for `opcode` with its parameters bound"""
+        g = self.gate_table[opcode]
+        if not callable(g._matrix):
+            return g
+
+        if cache is not None and (opcode, param_idx) in cache:
+            return cache[(opcode, param_idx)]
+
+        g = g.parametrized(eval_param(self.params[param_idx][0]))
+        if cache is not None:
+            cache[(opcode, param_idx)] = g
+        return g
+
+    def fingerprint(self) -> str:
+        """Canonical sha256 of the circuit content: gate parameters are hashed by
+        their value, so it doesn't depend on the qasm formatting. Measurements are
+        not included, as every qubit is measured at the end of the circuit"""
+        h = hashlib.sha256()
+        h.update(f"{self.n_qbits},{self.n_cbits};".encode("ascii"))
+
+        # Standard gates share the opcodes; others are hashed by their unitary
+        for g in self.gate_table[len(GATE_TABLE) :]:
+            h.update(g.iden.encode("ascii"))
+            h.update(np.ascontiguousarray(g.matrix, dtype=np.complex128).tobytes())
+
+        ops, q0s, q1s, pis = self.arrays()
+        gates = ops != OP_MEASURE
+        for a, dtype in ((ops, np.int16), (q0s, np.int32), (q1s, np.int32)):
+            h.update(a[gates].astype(dtype).tobytes())
+
+        n_args = max((len(p) for p in self.params), default=0)
+        table = np.full((len(self.params) + 1, n_args), np.nan)
+        for i, p in enumerate(self.params):
+            table[i, : len(p)] = [eval_param(a) for a in p]
+        h.update(table[pis[gates]].tobytes())
+
+        return h.hexdigest()
+
+    def toQasmCircuit(self):
+        names = [g.iden.lower() for g in self.gate_table]
+        pstrs = ["(" + (",".join(p)).replace(" ", "") + ")" for p in self.params]
+
+        lines = [
+            "OPENQASM 2.0;",
+            'include "qelib1.inc";',
+            "qreg q[" + str(self.n_qbits) + "];",
+            "creg c[" + str(self.n_qbits) + "];",
+        ]
+
+        ops, q0s, q1s, pis = self.arrays()
+        for op, q0, q1, pi in zip(
+            ops.tolist(), q0s.tolist(), q1s.tolist(), pis.tolist()
+        ):
+            if op == OP_MEASURE:
+                continue
+            args = pstrs[pi] if pi >= 0 else ""
+            if q1 < 0:
+                lines.append(f"{names[op]}{args} q[{q0}];")
+            else:
+                lines.append(f"{names[op]}{args} q[{q0}], q[{q1}];")
+
+        lines.append("measure q -> c;")
+        return "\n".join(lines)
@@ -32,12 +32,12 @@ ket_one = np.array([c_zero, c_one])
 class Gates:
     P = Gate(
         "P",
-        lambda k: np.array([[1, 0], [1, math.e ** (complex(0, 1) * k)]]),
+        lambda k: np.array([[1, 0], [0, math.e ** (complex(0, 1) * k)]]),
     )
     R = Gate(
         "R",
         lambda k: np.array(
-            [[1, 0], [1, math.e ** ((2 * math.pi * complex(0, 1)) / 2**k)]]
+            [[1, 0], [0, math.e ** ((2 * math.pi * complex(0, 1)) / 2**k)]]
         ),
     )
     I = Gate("I", np.array([[1, 0], [0, 1]]))  # noqa: E741
@@ -50,7 +50,9 @@ class Gates:
     SDG = Gate("SDG", np.array([[1, 0], [0, complex(0, -1)]]))
 
     CR = Gate(
-        "CR", lambda k: np.kron(Gates.I.matrix, Gates.R.parametrized(k).matrix), 2
+        "CR",
+        lambda k: np.diag([1, 1, 1, math.e ** ((2 * math.pi * complex(0, 1)) / 2**k)]),
+        2,
     )
 
     CX = Gate(
@@ -58,7 +60,9 @@ class Gates:
     )
 
     CY = Gate(
-        "CY", np.array([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, -1], [0, 0, +1.0j, 0]]), 2
+        "CY",
+        np.array([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, -1.0j], [0, 0, +1.0j, 0]]),
+        2,
     )
 
     CZ = Gate(
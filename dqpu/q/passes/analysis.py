@@ -0,0 +1,138 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from ..circuit import Circuit
+from ..compact import OP_MEASURE, OPCODES, CompactCircuit
+from ..utils import eval_param
+from .factorize import components
+
+CLIFFORD_GATES = ["I", "X", "Y", "Z", "H", "S", "SDG", "CX", "CY", "CZ", "SWAP"]
+_CLIFFORD_OPCODES = np.array([OPCODES[g] for g in CLIFFORD_GATES])
+
+
+def phase_quarters(args) -> Optional[int]:
+    """Return P(angle) as a number of S gates, or None if it is not a Clifford"""
+    q = eval_param(args[0]) / (math.pi / 2)
+    return int(round(q)) % 4 if abs(q - round(q)) < 1e-9 else None
+
+
+def non_clifford_mask(qc: CompactCircuit) -> np.ndarray:
+    """Boolean mask of the circuit operations that are not Clifford gates"""
+    ops, _, _, pis = qc.arrays()
+    mask = (ops != OP_MEASURE) & ~np.isin(ops, _CLIFFORD_OPCODES)
+
+    # P gates of multiples of pi/2 are powers of S
+    for i in np.flatnonzero(mask & (ops == OPCODES["P"])):
+        if phase_quarters(qc.params[pis[i]]) is not None:
+            mask[i] = False
+    return mask
+
+
+class CircuitFeatures:
+    """Features of a circuit used to pick the sampler and predict its cost;
+    `components` lists (qubits, gates, 2 qubit gates) of every independent
+    subsystem, as split by `factorize`"""
+
+    __slots__ = (
+        "n_qubits",
+        "n_gates",
+        "n_2q_gates",
+        "clifford",
+        "t_count",
+        "max_degree",
+        "cut_width",
+        "components",
+    )
+
+    def __init__(
+        self,
+        n_qubits: int,
+        n_gates: int,
+        n_2q_gates: int,
+        clifford: bool,
+        t_count: int,
+        max_degree: int,
+        cut_width: int,
+        components: List[Tuple[int, int, int]],
+    ):
+        self.n_qubits = n_qubits
+        self.n_gates = n_gates
+        self.n_2q_gates = n_2q_gates
+        self.clifford = clifford
+        self.t_count = t_count
+        self.max_degree = max_degree
+        self.cut_width = cut_width
+        self.components = components
+
+    @property
+    def largest(self) -> int:
+        """Number of qubits of the largest independent subsystem"""
+        return max((q for q, _, _ in self.components), default=0)
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __repr__(self):
+        return f"CircuitFeatures({self.to_dict()})"
+
+
+def analyze(qc: Union[Circuit, CompactCircuit]) -> CircuitFeatures:
+    """Compute the features of the circuit, in a single vectorized pass over its
+    arrays; `t_count` counts every non Clifford gate (T and generic rotations),
+    `max_degree` is the highest number of qubits a qubit interacts with and
+    `cut_width` bounds the entanglement (in ebits) across any cut of the qubits
+    line, a proxy of the bond dimension of a matrix product state"""
+    cc = qc if isinstance(qc, CompactCircuit) else qc.toCompact()
+    n = cc.n_qbits
+
+    ops, q0s, q1s, _ = cc.arrays()
+    gates = ops != OP_MEASURE
+    two_q = gates & (q1s >= 0)
+    t_count = int(np.count_nonzero(non_clifford_mask(cc)))
+
+    pairs = np.unique(np.sort(np.stack([q0s[two_q], q1s[two_q]], axis=1)), axis=0)
+    degree = np.bincount(pairs.ravel(), minlength=n) if n > 0 else np.zeros(0)
+
+    # 2 qubit gates crossing every cut between qubit c and c + 1
+    lo = np.minimum(q0s[two_q], q1s[two_q])
+    hi = np.maximum(q0s[two_q], q1s[two_q])
+    crossing = np.cumsum(
+        np.bincount(lo, minlength=n + 1) - np.bincount(hi, minlength=n + 1)
+    )[: max(n - 1, 0)]
+    cuts = np.arange(1, n)
+    cut_width = np.minimum(crossing, np.minimum(cuts, n - cuts))
+
+    labels = components(cc)
+    n_comp = int(labels.max()) + 1 if n > 0 else 0
+    comp_qubits = np.bincount(labels, minlength=n_comp)
+    comp_gates = np.bincount(labels[q0s[gates]], minlength=n_comp)
+    comp_2q = np.bincount(labels[q0s[two_q]], minlength=n_comp)
+
+    return CircuitFeatures(
+        n_qubits=n,
+        n_gates=int(np.count_nonzero(gates)),
+        n_2q_gates=int(np.count_nonzero(two_q)),
+        clifford=t_count == 0,
+        t_count=t_count,
+        max_degree=int(degree.max()) if len(degree) else 0,
+        cut_width=int(cut_width.max()) if len(cut_width) else 0,
+        components=list(
+            zip(comp_qubits.tolist(), comp_gates.tolist(), comp_2q.tolist())
+        ),
+    )
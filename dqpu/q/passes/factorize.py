@@ -0,0 +1,86 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from ..circuit import Circuit
+from ..compact import GATE_TABLE, OP_MEASURE, CompactCircuit
+
+
+def components(qc: Union[Circuit, CompactCircuit]) -> np.ndarray:
+    """Label every qubit with the connected component of the qubit interaction
+    graph (the same graph drawn by `Circuit.buildGraph`) it belongs to; labels
+    are numbered in order of their lowest qubit"""
+    cc = qc if isinstance(qc, CompactCircuit) else qc.toCompact()
+    parent = list(range(cc.n_qbits))
+
+    def find(q):
+        while parent[q] != q:
+            parent[q] = parent[parent[q]]
+            q = parent[q]
+        return q
+
+    ops, q0s, q1s, _ = cc.arrays()
+    two_q = (ops != OP_MEASURE) & (q1s >= 0)
+    pairs = np.unique(np.stack([q0s[two_q], q1s[two_q]], axis=1), axis=0)
+    for a, b in pairs.tolist():
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    roots = np.array([find(q) for q in range(cc.n_qbits)], dtype=np.int32)
+    _, labels = np.unique(roots, return_inverse=True)
+    return labels.reshape(-1)
+
+
+def factorize(
+    qc: Union[Circuit, CompactCircuit],
+) -> List[Tuple[List[int], CompactCircuit]]:
+    """Split the circuit into independent subsystems: return a (qubits, circuit)
+    pair for every connected component of the interaction graph, where `circuit`
+    acts on len(qubits) qubits and its qubit `i` is `qubits[i]` of `qc`.
+
+    Measurements are dropped, since the samplers measure every qubit at the end;
+    qubits without gates are returned as 1 qubit components with empty circuits."""
+    cc = qc if isinstance(qc, CompactCircuit) else qc.toCompact()
+    labels = components(cc)
+
+    ops, q0s, q1s, pis = cc.arrays()
+    gates = ops != OP_MEASURE
+    op_labels = labels[q0s[gates]]
+
+    local = np.zeros(cc.n_qbits, dtype=np.int32)
+    parts = []
+    for c in range(int(labels.max()) + 1 if len(labels) else 0):
+        qubits = np.flatnonzero(labels == c)
+        local[qubits] = np.arange(len(qubits))
+
+        sel = np.flatnonzero(gates)[op_labels == c]
+        sub = CompactCircuit(len(qubits), len(qubits), max(len(sel), 1))
+        if len(sel) > 0:
+            if cc.gate_table is not GATE_TABLE:
+                sub.gate_table = list(cc.gate_table)
+            sub.params = list(cc.params)
+            sub._params_lookup = dict(cc._params_lookup)
+        sub.size = len(sel)
+        sub.opcodes[: len(sel)] = ops[sel]
+        sub.qubit0[: len(sel)] = local[q0s[sel]]
+        sub.qubit1[: len(sel)] = np.where(q1s[sel] >= 0, local[q1s[sel]], -1)
+        sub.param_idx[: len(sel)] = pis[sel]
+
+        parts.append((qubits.tolist(), sub))
+
+    return parts
@@ -0,0 +1,134 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from ..circuit import Circuit
+from ..compact import OP_MEASURE, CompactCircuit
+from ..gate import Gate
+
+_I2 = np.eye(2, dtype=complex)
+_SWAP = np.array([[1, 0, 0, 0], [0, 0, 1, 0], [0, 1, 0, 0], [0, 0, 0, 1]])
+
+
+def sweep_cost(m):
+    """Rough cost, in statevector sweeps, of applying the matrix `m` with the
+    numpy kernels: diagonal and permutation-like gates only touch some slices"""
+    changed = [k for k in range(len(m)) if np.count_nonzero(m[k] - np.eye(len(m))[k])]
+    if np.count_nonzero(m[changed]) > len(changed):
+        return len(m)
+    return 1 if len(changed) <= len(m) // 2 else 2
+
+
+class _Block:
+    """A fused 2 qubit block; `parts` keeps the merged gates in circuit order so
+    the block can be emitted unfused when that is cheaper"""
+
+    __slots__ = ("qubits", "m", "parts")
+
+    def __init__(self, qubits, m):
+        self.qubits = qubits
+        self.m = m
+        self.parts = [(m, qubits)]
+
+    def add(self, m, qubits):
+        if len(qubits) == 1:
+            last_m, last_q = self.parts[-1]
+            if last_q == qubits:
+                self.parts[-1] = (m @ last_m, qubits)
+            else:
+                self.parts.append((m, qubits))
+            m = _embed(m, qubits[0], self.qubits)
+        else:
+            if qubits != self.qubits:
+                m = _SWAP @ m @ _SWAP
+            self.parts.append((m, self.qubits))
+
+        self.m = m @ self.m
+
+    def emit(self):
+        if sweep_cost(self.m) <= sum(sweep_cost(m) for m, _ in self.parts):
+            return [(self.m, self.qubits)]
+        return self.parts
+
+
+def _embed(m, q, qubits):
+    """Extend the 1 qubit matrix `m` acting on `q` to the 2 qubit block `qubits`"""
+    return np.kron(m, _I2) if q == qubits[0] else np.kron(_I2, m)
+
+
+def fuse(qc: Union[Circuit, CompactCircuit]) -> CompactCircuit:  # noqa: C901
+    """Gate fusion pass: merge runs of 1 qubit gates on the same wire into a single
+    2x2 unitary, and absorb them (and consecutive 2 qubit gates on the same pair)
+    into the neighbouring 2 qubit gate as a 4x4 unitary. A block is kept unfused
+    when its dense 4x4 matrix would cost more sweeps than its parts (ie: a lone
+    CX with a single X gate).
+
+    The returned circuit contains `FUSED` gates, so it is meant to be simulated
+    and not serialized to qasm."""
+    cc = qc if isinstance(qc, CompactCircuit) else qc.toCompact()
+
+    blocks: List[_Block] = []
+    pending: Dict[int, np.ndarray] = {}
+    last2q: Dict[int, int] = {}
+    measures: List[Tuple[int, int]] = []
+    cache: Dict[Tuple[int, int], Gate] = {}
+
+    ops, q0s, q1s, pis = cc.arrays()
+    for op, q0, q1, pi in zip(ops.tolist(), q0s.tolist(), q1s.tolist(), pis.tolist()):
+        if op == OP_MEASURE:
+            measures.append((q0, q1))
+            continue
+
+        m = cc.resolve(op, pi, cache).matrix
+
+        # 1 qubit gate: fold into the last 2 qubit block of the wire, if any
+        if q1 < 0:
+            b = last2q.get(q0)
+            if b is None:
+                pending[q0] = m @ pending.get(q0, _I2)
+            else:
+                blocks[b].add(m, (q0,))
+            continue
+
+        # 2 qubit gate: extend the block on the same pair, or open a new one
+        b = last2q.get(q0)
+        if b is not None and b == last2q.get(q1):
+            blocks[b].add(m, (q0, q1))
+            continue
+
+        blk = _Block((q0, q1), m)
+        for q in (q0, q1):
+            if q in pending:
+                blk.parts.insert(0, (pending[q], (q,)))
+                blk.m = blk.m @ _embed(pending.pop(q), q, blk.qubits)
+
+        blocks.append(blk)
+        last2q[q0] = last2q[q1] = len(blocks) - 1
+
+    fused = CompactCircuit(cc.n_qbits, cc.n_cbits, max(len(blocks) + len(pending), 1))
+    for blk in blocks:
+        for m, qubits in blk.emit():
+            fused.append(fused.add_gate(Gate("FUSED", m, len(qubits))), *qubits)
+
+    for q, m in pending.items():
+        if not np.allclose(m, _I2):
+            fused.append(fused.add_gate(Gate("FUSED", m, 1)), q)
+
+    for q, c in measures:
+        fused.measure(q, c)
+
+    return fused
@@ -0,0 +1,242 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import re
+from typing import List, Optional, Union
+
+from .compact import OPCODES, CompactCircuit
+from .utils import eval_param
+
+# Line oriented parser for the OpenQASM 2 subset accepted by DQPU: an optional
+# header and includes, one qreg, one creg, gates from `Gates` and a final
+# measurement. It reads the job file statement by statement, checking the limits
+# as soon as possible, and fills a CompactCircuit without building an AST.
+
+_RE_HEADER = re.compile(r"^OPENQASM\s+2(\.0)?$")
+_RE_INCLUDE = re.compile(r'^include\s+"[^"]*"$')
+_RE_REG = re.compile(r"^(qreg|creg)\s+([A-Za-z_]\w*)\s*\[\s*(\d+)\s*\]$")
+_RE_GATE = re.compile(r"^([A-Za-z_]\w*)\s*(.*)$", re.S)
+_RE_QUBIT = re.compile(r"^([A-Za-z_]\w*)\s*\[\s*(\d+)\s*\]$")
+_RE_MEASURE = re.compile(r"^measure\s+(.+?)\s*->\s*(.+)$", re.S)
+
+
+# Maximum length of a single statement
+MAX_STATEMENT_SIZE = 64 * 1024
+
+
+class QasmParseError(Exception):
+    pass
+
+
+class _Parser:
+    def __init__(self, max_qubits, max_gates):
+        self.max_qubits = max_qubits
+        self.max_gates = max_gates
+        self.n_statements = 0
+        self.qreg = None
+        self.n_q = None
+        self.creg = None
+        self.n_c = None
+        self.cc: Optional[CompactCircuit] = None
+        self.end = False
+
+    def circuit(self):
+        if self.cc is None:
+            self.cc = CompactCircuit(self.n_q, self.n_c, 1024)
+        return self.cc
+
+    def qubit(self, ref):
+        m = _RE_QUBIT.match(ref.strip())
+        if m is None:
+            raise QasmParseError(f"only indexed identifier allowed: {ref}")
+        if m.group(1) != self.qreg:
+            raise QasmParseError(f"unknown qubit register {m.group(1)}")
+
+        i = int(m.group(2))
+        if self.n_q is None or i >= self.n_q:
+            raise QasmParseError(f"qubit index {i} out of range")
+        return i
+
+    def register(self, kind, name, size):
+        if kind == "qreg":
+            if self.qreg is not None:
+                raise QasmParseError("Only one qubit register is allowed")
+            if self.max_qubits is not None and size > self.max_qubits:
+                raise QasmParseError(f"Too many qubits: {size} > {self.max_qubits}")
+            self.qreg, self.n_q = name, size
+        else:
+            if self.creg is not None:
+                raise QasmParseError("Only one classical register is allowed")
+            self.creg, self.n_c = name, size
+
+    def gate(self, name, args, qubits):
+        if self.qreg is None:
+            raise QasmParseError("Gate applied before the qubit register declaration")
+
+        op = OPCODES.get(name.upper())
+        if op is None:
+            raise QasmParseError(f"Unknown gate {name.upper()}")
+
+        cc = self.circuit()
+        if self.max_gates is not None and len(cc) >= self.max_gates:
+            raise QasmParseError(f"Too many gates: limit is {self.max_gates}")
+
+        g = cc.gate_table[op]
+        qbs = [self.qubit(q) for q in qubits.split(",")]
+        if len(qbs) != g.nq:
+            raise QasmParseError(f"Gate {g.iden} expects {g.nq} qubits")
+        if g.nq == 2 and qbs[0] == qbs[1]:
+            raise QasmParseError(f"Gate {g.iden} applied twice to the same qubit")
+
+        if args is None and callable(g._matrix):
+            raise QasmParseError(f"Gate {g.iden} needs a parameter")
+
+        cc.append(op, qbs[0], qbs[1] if len(qbs) > 1 else -1, self.params(args))
+
+    def params(self, args):
+        if args is None:
+            return -1
+
+        args = [re.sub(r"\s+", "", a) for a in args.split(",")]
+        for a in args:
+            try:
+                eval_param(a)
+            except Exception:
+                raise QasmParseError(f"Invalid gate argument {a}")
+        return self.circuit().param(args)
+
+    def statement(self, s):  # noqa: C901
+        s = s.strip()
+        if not s:
+            return
+
+        if self.end:
+            raise QasmParseError("Last statement should be a measurement")
+        self.n_statements += 1
+
+        if self.n_statements == 1 and s.startswith("OPENQASM"):
+            if not _RE_HEADER.match(s):
+                raise QasmParseError(f"Unsupported version: {s}")
+            return
+
+        if s.startswith("include"):
+            if not _RE_INCLUDE.match(s):
+                raise QasmParseError(f"Invalid include: {s}")
+            return
+
+        m = _RE_REG.match(s)
+        if m is not None:
+            self.register(m.group(1), m.group(2), int(m.group(3)))
+            return
+
+        m = _RE_MEASURE.match(s)
+        if m is not None:
+            if self.qreg is None:
+                raise QasmParseError(
+                    "Measurement before the qubit register declaration"
+                )
+            self.end = True
+            return
+
+        m = _RE_GATE.match(s)
+        if m is None:
+            raise QasmParseError(f"Unhandled {s}")
+        args, qubits = _split_args(m.group(2))
+        if not qubits:
+            raise QasmParseError(f"Unhandled {s}")
+        self.gate(m.group(1), args, qubits)
+
+
+def _split_args(s: str):
+    """Split `(args) qubits` at the parenthesis closing the arguments, which may
+    contain nested parentheses; return (None, s) if there are no arguments"""
+    if not s.startswith("("):
+        return None, s
+
+    depth = 0
+    for i, c in enumerate(s):
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+            if depth == 0:
+                return s[1:i], s[i + 1 :].strip()
+    raise QasmParseError(f"Unbalanced parentheses in {s}")
+
+
+def _lines(data: bytes):
+    """Yield the lines of `data`, without comments"""
+    for line in io.BytesIO(data):
+        try:
+            line_s = line.decode("ascii")
+        except UnicodeDecodeError:
+            raise QasmParseError("Only ascii files are allowed")
+
+        c = line_s.find("//")
+        yield line_s if c == -1 else line_s[:c]
+
+
+def _statements(data: bytes):
+    """Yield the statements of `data` line by line, without comments; only the new
+    line is searched for the end of the pending statement, whose fragments are
+    joined once complete"""
+    pending: List[str] = []
+    pending_size = 0
+
+    for line_s in _lines(data):
+        *statements, rest = line_s.split(";")
+        if statements:
+            statements[0] = "".join(pending) + statements[0]
+            pending, pending_size = [], 0
+
+            for s in statements:
+                if len(s) > MAX_STATEMENT_SIZE:
+                    raise QasmParseError("Statement too long")
+                yield s
+
+        # Lines are the fragments of a statement, so blank ones can be dropped
+        if rest.strip():
+            pending.append(rest)
+            pending_size += len(rest)
+            if pending_size > MAX_STATEMENT_SIZE:
+                raise QasmParseError("Statement too long")
+
+    rest = "".join(pending).strip()
+    if rest:
+        raise QasmParseError(f"Unterminated statement: {rest}")
+
+
+def parse_qasm(
+    data: Union[bytes, str],
+    max_size: Optional[int] = None,
+    max_qubits: Optional[int] = None,
+    max_gates: Optional[int] = None,
+) -> CompactCircuit:
+    """Parse an OpenQASM 2 job file into a CompactCircuit, raising QasmParseError
+    if it is invalid or exceeds `max_size` bytes, `max_qubits` or `max_gates`"""
+    if isinstance(data, str):
+        data = data.encode("ascii")
+
+    if max_size is not None and len(data) > max_size:
+        raise QasmParseError(f"File too big: {len(data)} > {max_size} bytes")
+
+    parser = _Parser(max_qubits, max_gates)
+    for s in _statements(data):
+        parser.statement(s)
+
+    if parser.qreg is None:
+        raise QasmParseError("Missing qubit register")
+
+    return parser.circuit()
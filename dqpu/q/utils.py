@@ -12,8 +12,56 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import ast
+import math
+import operator
+from typing import Any, Callable, Dict
+
 import numpy as np
 
+_PARAM_BINOPS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+}
+_PARAM_UNARYOPS: Dict[type, Callable[[Any], Any]] = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+_PARAM_NAMES = {"pi": math.pi, "e": math.e}
+
+
+def eval_param(expr):
+    """Evaluate a gate parameter expression (ie: `pi/32`) without calling eval;
+    the expression comes from untrusted job files, so it is evaluated in float
+    (a power can't grow an unbounded integer) and must give a finite real"""
+
+    def _eval(node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            # bool is an int, but `True` is not a valid parameter
+            if isinstance(node.value, bool):
+                raise Exception(f"Invalid parameter expression {expr}")
+            v = float(node.value)
+        elif isinstance(node, ast.Name) and node.id in _PARAM_NAMES:
+            v = _PARAM_NAMES[node.id]
+        elif isinstance(node, ast.BinOp) and type(node.op) in _PARAM_BINOPS:
+            v = _PARAM_BINOPS[type(node.op)](_eval(node.left), _eval(node.right))
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in _PARAM_UNARYOPS:
+            v = _PARAM_UNARYOPS[type(node.op)](_eval(node.operand))
+        else:
+            raise Exception(f"Invalid parameter expression {expr}")
+
+        # Negative bases with a fractional exponent give a complex
+        if not isinstance(v, float) or not math.isfinite(v):
+            raise Exception(f"Invalid parameter value {expr}")
+        return v
+
+    if isinstance(expr, (int, float)):
+        return expr
+    return _eval(ast.parse(str(expr).strip(), mode="eval").body)
+
 
 def qiskit_execute(c):
     from qiskit import transpile
@@ -12,13 +12,26 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .aersimulatorsampler import AerSimulatorSampler  # noqa: F401
+from .aersimulatorsampler import (  # noqa: F401
+    AerMPSSampler,
+    AerSimulatorSampler,
+    AerStabilizerSampler,
+)
+from .cache import ProbabilityCache  # noqa: F401
+from .dispatcher import SamplerDispatcher, build_sampler  # noqa: F401
+from .factorizedsampler import FactorizedSampler  # noqa: F401
+from .memmapsampler import MemmapSimulatorSampler  # noqa: F401
+from .numpysampler import NumpySimulatorSampler  # noqa: F401
 from .qracksimulatorsampler import QrackSimulatorSampler  # noqa: F401
-
-# from .dasksimulatorsampler import DaskSimulatorSampler  # noqa: F401
-from .sampler import Sampler  # noqa: F401
+from .sampler import Sampler, SamplingCancelled  # noqa: F401
+from .stabilizersampler import StabilizerSampler  # noqa: F401
 
 SAMPLERS = {
     "aersimulator": AerSimulatorSampler,
+    "aer-mps": AerMPSSampler,
+    "aer-stabilizer": AerStabilizerSampler,
     "qracksimulator": QrackSimulatorSampler,
-}  # , "dasksimulator": DaskSimulatorSampler}
+    "numpy": NumpySimulatorSampler,
+    "numpy-memmap": MemmapSimulatorSampler,
+    "stabilizer": StabilizerSampler,
+}
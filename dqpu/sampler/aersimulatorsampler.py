@@ -12,19 +12,94 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from qiskit import qasm2, transpile
-from qiskit_aer import AerSimulator
+from typing import Optional
 
+from .backendcache import get_backend, transpile_cached
 from .sampler import Sampler
+from .utils import KillablePool
+
+# Workers running the cancellable jobs, each with its own simulators and
+# transpiled circuits cache
+_workers = KillablePool(preload=["qiskit_aer"])
+
+
+def _sample(circuit, options, shots):
+    from qiskit_aer import AerSimulator
+
+    key = ("aer",) + tuple(sorted(options.items()))
+    simulator = get_backend(key, lambda: AerSimulator(**options))
+    circ = transpile_cached(circuit, simulator, key)
+    result = simulator.run(circ, shots=shots).result()
+    return result.get_counts(circ)
 
 
 class AerSimulatorSampler(Sampler):
+    # Simulation method forced by the subclasses, overriding the options
+    method: Optional[str] = None
+
+    # Multithreaded sweeps, plus the transpilation of every gate
+    COST_OVERHEAD = 0.05
+    COST_AMPLITUDE = 1.5e-9
+
     def sample(self, shots):
-        qc = qasm2.loads(
-            self.circuit, custom_instructions=qasm2.LEGACY_CUSTOM_INSTRUCTIONS
-        )  # .toQasmCircuit())
-        simulator = AerSimulator()
-        circ = transpile(qc, simulator)
-        result = simulator.run(circ, shots=shots).result()
-        counts = result.get_counts(circ)
-        return counts
+        options = dict(self.options)
+        if self.method is not None:
+            options["method"] = self.method
+
+        if self.cancel is not None:
+            # Aer doesn't return control until done, run it where it can be killed
+            return _workers.run(_sample, (self.circuit, options, shots), self.cancel)
+
+        return _sample(self.circuit, options, shots)
+
+
+class AerMPSSampler(AerSimulatorSampler):
+    """Aer matrix product state simulation, fast on circuits with few 2 qubit
+    gates or low entanglement"""
+
+    method = "matrix_product_state"
+
+    # Bond dimension above which the MPS is no better than a statevector
+    MAX_BOND_QUBITS = 12
+
+    @classmethod
+    def supports(cls, features) -> bool:
+        return features.cut_width <= cls.MAX_BOND_QUBITS
+
+    @classmethod
+    def memory(cls, qubits: int) -> float:
+        # A pair of chi x chi complex tensors per qubit, at most a statevector
+        return min(super().memory(qubits), 32.0 * qubits * 4.0**cls.MAX_BOND_QUBITS)
+
+    @classmethod
+    def estimate_cost(cls, features, shots) -> float:
+        chi = 1 << features.cut_width
+        n = features.n_qubits
+        return (
+            cls.COST_OVERHEAD
+            + features.n_gates * (cls.COST_GATE + chi**3 * 1e-9)
+            + shots * n * chi**2 * 1e-9
+        )
+
+
+class AerStabilizerSampler(AerSimulatorSampler):
+    """Aer stabilizer simulation, for Clifford circuits"""
+
+    method = "stabilizer"
+    clifford_only = True
+
+    @classmethod
+    def supports(cls, features) -> bool:
+        return features.clifford
+
+    @classmethod
+    def memory(cls, qubits: int) -> float:
+        # Tableau of 2n x 2n bits
+        return 4.0 * qubits * (qubits + 1)
+
+    @classmethod
+    def estimate_cost(cls, features, shots) -> float:
+        return cls.COST_OVERHEAD + sum(
+            g * (cls.COST_GATE + q * 1e-9) + shots * q * q * 1e-9
+            for q, g, _ in features.components
+        )
@@ -0,0 +1,79 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+# Process wide pool of qiskit backends and cache of transpiled circuits, shared
+# by the qiskit based samplers: building a simulator and transpiling a circuit
+# costs more than sampling small jobs.
+
+
+class LRUCache:
+    """Thread safe dict keeping at most `max_items` entries, by last access"""
+
+    def __init__(self, max_items=64):
+        self.max_items = max_items
+        self.items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.items:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.items.move_to_end(key)
+            return self.items[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+
+    def __len__(self):
+        return len(self.items)
+
+
+_backends: Dict[Hashable, Any] = {}
+_backends_lock = threading.Lock()
+transpiled = LRUCache(64)
+
+
+def get_backend(key: Hashable, factory: Callable[[], Any]):
+    """Return the backend identified by `key`, building it with `factory` once"""
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = factory()
+        return _backends[key]
+
+
+def transpile_cached(qasm: str, backend, backend_key: Hashable):
+    """Load and transpile `qasm` for `backend`, reusing the previous result for
+    the same circuit and backend"""
+    from qiskit import qasm2, transpile
+
+    key = (hashlib.sha256(qasm.encode("ascii")).hexdigest(), backend_key)
+    circ = transpiled.get(key)
+    if circ is None:
+        qc = qasm2.loads(qasm, custom_instructions=qasm2.LEGACY_CUSTOM_INSTRUCTIONS)
+        circ = transpile(qc, backend)
+        transpiled.put(key, circ)
+    return circ
@@ -0,0 +1,85 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+from ..utils import create_dqpu_dirs
+
+
+class ProbabilityCache:
+    """On disk cache of the final probability vectors of circuits, keyed by their
+    fingerprint and stored as compressed npz files; when the cache grows over
+    `max_size` bytes, the least recently used entries are evicted"""
+
+    def __init__(self, path=None, max_size=1 << 30):
+        if path is None:
+            path = os.path.join(create_dqpu_dirs(), "sampler", "cache")
+
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def _file(self, key):
+        return os.path.join(self.path, f"probs_{key}.npz")
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        f = self._file(key)
+        try:
+            with np.load(f) as data:
+                probs = data["probs"]
+        except (OSError, KeyError, ValueError):
+            self.misses += 1
+            return None
+
+        # mtime is the last access time used for the LRU eviction; the entry may
+        # have been evicted by another process since it was loaded
+        try:
+            os.utime(f)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return probs
+
+    def put(self, key: str, probs: np.ndarray):
+        fd, tmp = tempfile.mkstemp(prefix="probs_", suffix=".tmp", dir=self.path)
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, probs=probs.astype(np.float32))
+        os.replace(tmp, self._file(key))
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits max_size"""
+        entries = []
+        for e in os.scandir(self.path):
+            if e.name.startswith("probs_") and e.name.endswith(".npz"):
+                st = e.stat()
+                entries.append((st.st_mtime, st.st_size, e.path))
+
+        total = sum(s for _, s, _ in entries)
+        for _, size, f in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(f)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses"
@@ -0,0 +1,234 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence, Type
+
+import numpy as np
+
+from ..q import Circuit
+from ..utils import create_dqpu_dirs
+from .sampler import Sampler
+from .utils import physical_memory
+
+# Calibration of the samplers of a node: every sampler runs a grid of random
+# circuits in a forked process, timing the sampling and recording its peak RSS.
+# The resulting profile gives the maximum number of qubits the node can handle
+# and a runtime model for the jobs, fitted on the grid.
+
+PROFILE_VERSION = 1
+
+DEFAULT_QUBITS = list(range(10, 35, 2))
+DEFAULT_DEPTHS = [10, 40]
+DEFAULT_SHOTS = [1024, 16384]
+
+# Bounds of the statevector work feature of the runtime model
+MAX_EXPONENT = 1000
+MAX_FEATURE = 1e300
+
+
+def profile_path() -> str:
+    return os.path.join(create_dqpu_dirs(), "sampler", "profile.json")
+
+
+def _run(conn, sampler_cls, qasm, shots, kwargs):
+    try:
+        rss_start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        t_start = time.time()
+        sampler_cls(qasm, **kwargs).sample(shots)
+        seconds = time.time() - t_start
+        # ru_maxrss is in KB on Linux
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        conn.send((seconds, rss * 1024, (rss - rss_start) * 1024))
+    except BaseException as e:
+        conn.send(str(e))
+
+
+def measure(sampler_cls: Type[Sampler], qc: Circuit, shots: int, timeout: float):
+    """Sample `qc` in a forked process; return (seconds, peak rss, rss growth) in
+    bytes, or None if the process fails or doesn't complete within `timeout`.
+
+    A process over the timeout is killed, skipping its cleanup: samplers with
+    scratch files get a temporary `cache_dir`, removed here"""
+    kwargs = {}
+    if sampler_cls.scratch_files:
+        cache_dir = os.path.join(create_dqpu_dirs(), "sampler", "cache")
+        kwargs["cache_dir"] = tempfile.mkdtemp(prefix="calibration_", dir=cache_dir)
+
+    ctx = multiprocessing.get_context("fork")
+    parent, child = ctx.Pipe(duplex=False)
+    p = ctx.Process(
+        target=_run,
+        args=(child, sampler_cls, qc.toQasmCircuit(), shots, kwargs),
+        daemon=True,
+    )
+    p.start()
+    child.close()
+
+    try:
+        if not parent.poll(timeout):
+            return None
+        r = parent.recv()
+        return tuple(r) if isinstance(r, tuple) else None
+    except EOFError:
+        # Killed, ie: by the out of memory killer
+        return None
+    finally:
+        if p.is_alive():
+            p.kill()
+        p.join()
+        parent.close()
+        if "cache_dir" in kwargs:
+            shutil.rmtree(kwargs["cache_dir"], ignore_errors=True)
+
+
+def calibrate(
+    samplers: Dict[str, Type[Sampler]],
+    qubits: Sequence[int] = DEFAULT_QUBITS,
+    depths: Sequence[int] = DEFAULT_DEPTHS,
+    shots: Sequence[int] = DEFAULT_SHOTS,
+    timeout: float = 60,
+    verbose=True,
+) -> dict:
+    """Time every sampler on a grid of `Circuit.random(qubits, depth)` circuits;
+    a sampler stops at the first size failing, exceeding `timeout` seconds or
+    whose next size would not fit in memory"""
+    profile: dict = {"version": PROFILE_VERSION, "created": int(time.time())}
+    profile["samplers"] = {}
+
+    for name, sampler_cls in samplers.items():
+        if sampler_cls.clifford_only:
+            if verbose:
+                print(f"Skipping {name}: random circuits are not Clifford")
+            continue
+
+        runs: List[dict] = []
+        max_qubits = None
+        for n in qubits:
+            grid = [(d, shots[0]) for d in depths] + [(depths[0], s) for s in shots[1:]]
+            ok = True
+            for d, s in grid:
+                qc = Circuit.random(n, d)
+                r = measure(sampler_cls, qc, s, timeout)
+                if verbose:
+                    res = "failed" if r is None else f"{r[0]:.3f}s, {r[1] >> 20} MB"
+                    print(f"{name}: {n} qubits, depth {d}, {s} shots: {res}")
+                if r is None:
+                    ok = False
+                    break
+
+                runs.append(
+                    {
+                        "qubits": n,
+                        "depth": d,
+                        "gates": len(qc.gates),
+                        "shots": s,
+                        "seconds": r[0],
+                        "peak_rss": r[1],
+                        "rss": r[2],
+                    }
+                )
+
+            if not ok:
+                break
+            max_qubits = n
+
+            # The statevector grows 4 times for the next size of the grid
+            if 4 * max(r["rss"] for r in runs if r["qubits"] == n) > physical_memory():
+                break
+
+        profile["samplers"][name] = {"max_qubits": max_qubits, "runs": runs}
+
+    return profile
+
+
+def save_profile(profile: dict, path: Optional[str] = None):
+    with open(path or profile_path(), "w") as f:
+        json.dump(profile, f, indent=2)
+
+
+class SamplerProfile:
+    """Calibration profile of the node samplers. The runtime of a job is
+    predicted by `a + b * depth * qubits * 2**qubits + c * shots`, fitted by
+    relative least squares on the calibration runs; `depth` is in layers of
+    `qubits` gates, as in `Circuit.random`"""
+
+    def __init__(self, profile: dict):
+        self.profile = profile
+        self.models: Dict[str, np.ndarray] = {}
+
+        for name, s in profile.get("samplers", {}).items():
+            runs = s["runs"]
+            if not runs:
+                continue
+
+            x = np.array(
+                [self._features(r["qubits"], r["depth"], r["shots"]) for r in runs]
+            )
+            y = np.array([r["seconds"] for r in runs])
+            w = 1 / np.maximum(y, 1e-3)
+            coef = np.linalg.lstsq(x * w[:, None], y * w, rcond=None)[0]
+            self.models[name] = np.maximum(coef, 0)
+
+    @staticmethod
+    def _features(qubits, depth, shots):
+        # Jobs above MAX_EXPONENT qubits (ie: Clifford ones) would overflow 2**qubits,
+        # and the feature is capped so that a zero coefficient still gives zero
+        work = depth * qubits * 2.0 ** min(qubits, MAX_EXPONENT)
+        return [1.0, min(work, MAX_FEATURE), float(shots)]
+
+    @staticmethod
+    def load(path: Optional[str] = None) -> Optional["SamplerProfile"]:
+        """Load the profile, returning None if the node is not calibrated"""
+        try:
+            with open(path or profile_path()) as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if profile.get("version") != PROFILE_VERSION:
+            return None
+        return SamplerProfile(profile)
+
+    def samplers(self) -> List[str]:
+        return list(self.models.keys())
+
+    def max_qubits(self, name: Optional[str] = None) -> Optional[int]:
+        """Maximum qubits of `name`, or of the best sampler if None"""
+        samplers = self.profile.get("samplers", {})
+        values = [
+            s["max_qubits"]
+            for n, s in samplers.items()
+            if (name is None or n == name) and s["max_qubits"] is not None
+        ]
+        return max(values) if values else None
+
+    def estimate(
+        self, qubits: int, depth: int, shots: int, name: Optional[str] = None
+    ) -> Optional[float]:
+        """Predicted seconds to run a job on `name`, or on the fastest sampler if
+        None; returns None if there is no model for it"""
+        f = np.array(self._features(qubits, depth, shots))
+        estimates = [
+            float(f @ coef)
+            for n, coef in self.models.items()
+            if name is None or n == name
+        ]
+        return min(estimates) if estimates else None
@@ -0,0 +1,133 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple, Type
+
+from ..q import CompactCircuit, parse_qasm
+from ..q.passes import CircuitFeatures, analyze
+from ..utils import create_dqpu_dirs
+from .factorizedsampler import FactorizedSampler
+from .sampler import Sampler
+from .utils import physical_memory
+
+
+def build_sampler(sampler_cls: Type[Sampler], qc: CompactCircuit, cache=None):
+    """Build a `sampler_cls` sampler for `qc`: Clifford only samplers take the
+    whole circuit, the others simulate its independent subsystems separately"""
+    if sampler_cls.clifford_only:
+        return sampler_cls(qc if sampler_cls.compact_input else qc.toQasmCircuit())
+    return FactorizedSampler(qc, sampler_cls, cache)
+
+
+class SamplerDispatcher:
+    """Route every job to the sampler predicted to be the fastest for it, using
+    the samplers `supports` and `estimate_cost` on the circuit features.
+
+    Every decision is logged, with the predicted and the actual time, to
+    `log_file` (one json object per line) so the cost models can be checked."""
+
+    def __init__(
+        self,
+        samplers: Dict[str, Type[Sampler]],
+        cache=None,
+        log_file: Optional[str] = None,
+        verbose=True,
+    ):
+        if log_file is None:
+            log_file = os.path.join(create_dqpu_dirs(), "sampler", "dispatch.jsonl")
+
+        self.samplers = samplers
+        self.cache = cache
+        self.log_file = log_file
+        self.verbose = verbose
+
+    @staticmethod
+    def available(samplers: Dict[str, Type[Sampler]]) -> Dict[str, Type[Sampler]]:
+        """Return the samplers passing their self test (ie: with their
+        dependencies installed)"""
+        ok = {}
+        for name, s in samplers.items():
+            try:
+                if s.test():
+                    ok[name] = s
+            except Exception:
+                pass
+        return ok
+
+    def rank(self, features: CircuitFeatures, shots: int) -> List[Tuple[float, str]]:
+        """Return the (predicted seconds, name) of the samplers supporting the
+        circuit, fastest first"""
+        return sorted(
+            (s.estimate_cost(features, shots), name)
+            for name, s in self.samplers.items()
+            if s.supports(features)
+        )
+
+    def memory(self, qubits: int) -> float:
+        """Estimated peak memory of a job of `qubits` qubits, before its circuit is
+        known: the largest among the samplers able to hold it"""
+        estimates = [s.memory(qubits) for s in self.samplers.values()]
+        fitting = [m for m in estimates if m <= physical_memory()]
+        return max(fitting) if fitting else min(estimates)
+
+    def _log(self, record):
+        if self.verbose:
+            print(
+                f"\tDispatcher: {record['sampler']} took {record['actual']:.3f}s"
+                + f" (predicted {record['predicted']:.3f}s)"
+            )
+
+        try:
+            with open(self.log_file, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print("\tDispatcher: unable to write the log:", e)
+
+    def sample(self, circuit, shots: int, job_id=None, cancel=None):
+        qc = circuit if isinstance(circuit, CompactCircuit) else parse_qasm(circuit)
+        features = analyze(qc)
+
+        ranking = self.rank(features, shots)
+        if not ranking:
+            raise Exception("No available sampler supports this circuit")
+
+        predicted, name = ranking[0]
+        if self.verbose:
+            others = ", ".join(f"{n} {c:.3f}s" for c, n in ranking[1:])
+            print(
+                f"\tDispatcher: selected {name} (predicted {predicted:.3f}s"
+                + (f"; {others})" if others else ")")
+            )
+
+        sampler = build_sampler(self.samplers[name], qc, self.cache)
+        sampler.cancel = cancel
+        t_start = time.time()
+        counts = sampler.sample(shots)
+
+        self._log(
+            {
+                "time": int(t_start),
+                "job": job_id,
+                "sampler": name,
+                "shots": shots,
+                "predicted": predicted,
+                "actual": time.time() - t_start,
+                "ranking": {n: c for c, n in ranking},
+                "features": features.to_dict(),
+            }
+        )
+        return counts
@@ -0,0 +1,84 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Optional
+
+from ..q import Circuit, CompactCircuit, QasmParseError, parse_qasm, passes
+from .numpysampler import NumpySimulatorSampler
+from .sampler import Sampler
+from .utils import join_counts
+
+
+class FactorizedSampler(Sampler):
+    """Split the circuit into independent subsystems, sample every subsystem with
+    `sampler_cls` and join the counts; a 20 qubits job with a trap qubit is then a
+    20 qubits simulation plus a 1 qubit one, instead of a 21 qubits simulation.
+
+    Subsystems are also the unit of the probability `cache`: traps change the
+    whole circuit, but not the subsystems of the original one."""
+
+    # Subsystems of a split circuit up to this size are simulated natively,
+    # avoiding the startup cost of external simulators for trap qubits and other
+    # small components; 0 leaves every subsystem to `sampler_cls`
+    NATIVE_MAX_QUBITS = 10
+
+    def __init__(self, circuit, sampler_cls=NumpySimulatorSampler, cache=None):
+        self.qc: Optional[CompactCircuit]
+        if isinstance(circuit, CompactCircuit):
+            self.circuit = circuit
+            self.qc = circuit
+        elif isinstance(circuit, Circuit):
+            self.circuit = circuit
+            self.qc = circuit.toCompact()
+        else:
+            super().__init__(circuit)
+            try:
+                self.qc = parse_qasm(self.circuit)
+            except QasmParseError:
+                # Let the underlying sampler deal with what we can't parse
+                self.qc = None
+
+        self.sampler_cls = sampler_cls
+        self.cache = cache
+
+    def _build(self, qc, split):
+        if split and (len(qc) == 0 or qc.n_qbits <= self.NATIVE_MAX_QUBITS):
+            return NumpySimulatorSampler(qc)
+        if self.sampler_cls.probability_cache and self.cache is not None:
+            return self.sampler_cls(qc, cache=self.cache)
+        if self.sampler_cls.compact_input:
+            return self.sampler_cls(qc)
+        return self.sampler_cls(qc.toQasmCircuit())
+
+    def _sampler(self, qc, split=False):
+        if qc is None:
+            sampler = self.sampler_cls(self.circuit)
+        else:
+            sampler = self._build(qc, split)
+        sampler.cancel = self.cancel
+        return sampler
+
+    def sample(self, shots):
+        if self.qc is None:
+            return self._sampler(None).sample(shots)
+
+        parts = passes.factorize(self.qc)
+        if len(parts) == 1:
+            return self._sampler(self.qc).sample(shots)
+
+        counts = []
+        for qubits, qc in parts:
+            self.check_cancelled()
+            counts.append((qubits, self._sampler(qc, True).sample(shots)))
+        return join_counts(self.qc.n_qbits, counts)
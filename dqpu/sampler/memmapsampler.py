@@ -0,0 +1,198 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, List, Tuple
+
+import numpy as np
+
+from ..q import Gate
+from ..utils import create_dqpu_dirs
+from .numpysampler import NumpySimulatorSampler, apply_gate
+from .utils import bins_to_counts
+
+
+class MemmapSimulatorSampler(NumpySimulatorSampler):
+    """Out-of-core statevector sampler: amplitudes live in a memory mapped scratch
+    file and gates are applied streaming over chunks of 2**chunk_qubits amplitudes.
+
+    Consecutive gates acting only on the low `chunk_qubits` qubits are applied
+    together in a single sweep; a gate touching higher qubits gathers the 2 or 4
+    chunks it couples, so every sweep reads the file sequentially."""
+
+    # Statevectors larger than RAM are not worth caching
+    probability_cache = False
+    scratch_files = True
+
+    # Sweeps are bound by the disk bandwidth
+    COST_AMPLITUDE = 3e-8
+    BYTES_PER_AMPLITUDE = 8
+
+    # Default size of the chunks, in qubits
+    CHUNK_QUBITS = 22
+
+    @classmethod
+    def memory(cls, qubits: int) -> float:
+        # The statevector is on disk: in memory are the (up to 4) chunks coupled by
+        # a gate, or a chunk and its float64 probabilities while sampling
+        return 4 * cls.BYTES_PER_AMPLITUDE * 2.0 ** min(qubits, cls.CHUNK_QUBITS)
+
+    @classmethod
+    def supports(cls, features) -> bool:
+        cache_dir = os.path.join(create_dqpu_dirs(), "sampler", "cache")
+        free = shutil.disk_usage(cache_dir).free
+        return (1 << features.largest) * cls.BYTES_PER_AMPLITUDE <= free
+
+    def __init__(
+        self,
+        circuit,
+        dtype=np.complex64,
+        fuse=True,
+        chunk_qubits=CHUNK_QUBITS,
+        cache_dir=None,
+        verbose=True,
+    ):
+        super().__init__(circuit, dtype, fuse)
+        self.chunk_qubits = chunk_qubits
+        self.cache_dir = cache_dir
+        self.verbose = verbose
+
+    def _passes(self, c):
+        """Group the circuit operations in sweeps over the statevector chunks"""
+        passes: List[Tuple[List[int], List[Tuple[Gate, Any]]]] = []
+        low: List[Tuple[Gate, Any]] = []
+
+        for g, p in self.operations():
+            high = sorted(set(q for q in p if q >= c))
+            if not high:
+                low.append((g, p))
+                continue
+
+            if low:
+                passes.append(([], low))
+                low = []
+            passes.append((high, [(g, p)]))
+
+        if low:
+            passes.append(([], low))
+        return passes
+
+    def _sweep(self, sv, c, high, ops):
+        chunk = 1 << c
+        n_local = c + len(high)
+        offsets = [
+            sum(1 << (high[b] - c) for b in range(len(high)) if (j >> b) & 1)
+            for j in range(1 << len(high))
+        ]
+        high_mask = sum(1 << (q - c) for q in high)
+        remap = {q: c + i for i, q in enumerate(high)}
+
+        for ci in range(len(sv) >> c):
+            if ci & high_mask:
+                continue
+
+            buf = np.concatenate(
+                [sv[(ci + o) * chunk : (ci + o + 1) * chunk] for o in offsets]
+            )
+            for g, p in ops:
+                apply_gate(buf, n_local, g, [remap.get(q, q) for q in p])
+
+            for i, o in enumerate(offsets):
+                sv[(ci + o) * chunk : (ci + o + 1) * chunk] = buf[
+                    i * chunk : (i + 1) * chunk
+                ]
+
+    def _progress(self, done, total, t_start):
+        if self.verbose:
+            print(
+                f"\tMemmap simulation {100 * done // max(total, 1)}% "
+                + f"({done}/{total} gates, {int(time.time() - t_start)} seconds)"
+            )
+
+    def _simulate(self, path):
+        n = self.qc.n_qbits
+        c = min(self.chunk_qubits, n)
+
+        sv = np.memmap(path, dtype=self.dtype, mode="w+", shape=(1 << n,))
+        sv[0] = 1
+
+        passes = self._passes(c)
+        total = sum(len(ops) for _, ops in passes)
+        done = 0
+        next_report = total / 10
+        t_start = time.time()
+
+        for high, ops in passes:
+            self.check_cancelled()
+            self._sweep(sv, c, high, ops)
+            done += len(ops)
+            if done >= next_report:
+                self._progress(done, total, t_start)
+                next_report = done + total / 10
+
+        sv.flush()
+        return sv
+
+    def _scratch_file(self):
+        cache_dir = self.cache_dir
+        if cache_dir is None:
+            cache_dir = os.path.join(create_dqpu_dirs(), "sampler", "cache")
+
+        fd, path = tempfile.mkstemp(prefix="statevector_", suffix=".bin", dir=cache_dir)
+        os.close(fd)
+        return path
+
+    def compute(self):
+        """Compute the statevector, loading it in memory"""
+        path = self._scratch_file()
+        try:
+            sv = self._simulate(path)
+            state = np.array(sv)
+            del sv
+            return state
+        finally:
+            os.remove(path)
+
+    def _sample_chunks(self, sv, shots):
+        n = self.qc.n_qbits
+        c = min(self.chunk_qubits, n)
+        chunk = 1 << c
+
+        masses = np.array(
+            [
+                np.sum(np.abs(sv[ci * chunk : (ci + 1) * chunk]) ** 2, dtype=np.float64)
+                for ci in range(len(sv) >> c)
+            ]
+        )
+        chunk_shots = self.rng.multinomial(shots, masses / masses.sum())
+
+        counts = {}
+        for ci in np.flatnonzero(chunk_shots):
+            probs = np.abs(sv[ci * chunk : (ci + 1) * chunk]).astype(np.float64) ** 2
+            bins = self.rng.multinomial(chunk_shots[ci], probs / probs.sum())
+            counts.update(bins_to_counts(bins, n, ci * chunk))
+        return counts
+
+    def sample(self, shots):
+        path = self._scratch_file()
+        try:
+            sv = self._simulate(path)
+            counts = self._sample_chunks(sv, shots)
+            del sv
+            return counts
+        finally:
+            os.remove(path)
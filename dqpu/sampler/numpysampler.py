@@ -0,0 +1,219 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+from ..q import Circuit, CompactCircuit, Gate, parse_qasm, passes
+from ..q.compact import OP_MEASURE
+from .sampler import Sampler
+from .utils import sample_counts
+
+# The statevector is a flat array of 2**n amplitudes where the index bit `q` is the
+# value of qubit `q` (qiskit ordering), so a bitstring of the index has qubit 0 on
+# the right.
+
+
+def _is_diagonal(m):
+    return np.count_nonzero(m - np.diag(np.diag(m))) == 0
+
+
+# Amplitudes of every slice processed at once by the non diagonal kernels, so
+# that their temporaries stay small
+CHUNK_SIZE = 1 << 16
+
+
+def _chunks(shape, size):
+    """Yield indexes splitting an (A, B, C) array in blocks of about `size`
+    elements, along the outermost axes that allow it"""
+    a, b, c = shape
+    if c >= size:
+        for i in range(a):
+            for j in range(b):
+                for k in range(0, c, size):
+                    yield (i, j, slice(k, k + size))
+    elif b * c >= size:
+        step = size // c
+        for i in range(a):
+            for j in range(0, b, step):
+                yield (i, slice(j, j + step))
+    else:
+        step = size // (b * c)
+        for i in range(0, a, step):
+            yield (slice(i, i + step),)
+
+
+def apply_1q(state, n, m, q):
+    """Apply the 2x2 matrix `m` to qubit `q` of the flat statevector `state`, in place"""
+    v = state.reshape(1 << (n - 1 - q), 2, 1 << q)
+
+    if m[0, 1] == 0 and m[1, 0] == 0:
+        if m[0, 0] != 1:
+            v[:, 0, :] *= m[0, 0]
+        if m[1, 1] != 1:
+            v[:, 1, :] *= m[1, 1]
+        return
+
+    v0 = v[:, 0:1, :]
+    v1 = v[:, 1:2, :]
+    for idx in _chunks(v0.shape, CHUNK_SIZE):
+        a0 = v0[idx]
+        a1 = v1[idx]
+        if m[0, 0] == 0 and m[1, 1] == 0:
+            t = m[0, 1] * a1
+            np.multiply(a0, m[1, 0], out=a1)
+        else:
+            t = m[0, 0] * a0 + m[0, 1] * a1
+            a1 *= m[1, 1]
+            a1 += m[1, 0] * a0
+        a0[...] = t
+
+
+def apply_2q(state, n, t, q0, q1):
+    """Apply the gate tensor `t[o0, o1, i0, i1]` to qubits (`q0`, `q1`) of the flat
+    statevector `state`, in place; `q0` is the most significant qubit of the gate"""
+    hi, lo = (q0, q1) if q0 > q1 else (q1, q0)
+    v = state.reshape(1 << (n - 1 - hi), 2, 1 << (hi - lo - 1), 2, 1 << lo)
+    m = t.reshape(4, 4)
+
+    def view(k):
+        b0, b1 = k >> 1, k & 1
+        return v[:, b0, :, b1, :] if q0 > q1 else v[:, b1, :, b0, :]
+
+    # Rows equal to the identity leave their slice untouched
+    rows = [k for k in range(4) if not (m[k, k] == 1 and np.count_nonzero(m[k]) == 1)]
+
+    if _is_diagonal(m):
+        for k in rows:
+            view(k)[...] *= m[k, k]
+        return
+
+    views = [view(k) for k in range(4)]
+    needed = sorted({j for k in rows for j in range(4) if m[k, j] != 0})
+    dense = np.count_nonzero(m[rows]) > len(rows)
+
+    for idx in _chunks(views[0].shape, CHUNK_SIZE):
+        # Dense blocks (ie: fused gates) are a single 4xN matrix product
+        if dense:
+            block = np.stack([views[j][idx] for j in range(4)])
+            res = (m @ block.reshape(4, -1)).reshape(block.shape)
+            for k in rows:
+                views[k][idx] = res[k]
+            continue
+
+        _apply_sparse(m, rows, needed, [w[idx] for w in views])
+
+
+def _apply_sparse(m, rows, needed, views):
+    """Set the `rows` of the 4 amplitude `views` from the `needed` ones, skipping
+    the zeros of `m`"""
+    src = {j: views[j].copy() for j in needed}
+    for k in rows:
+        out = views[k]
+        first = True
+        for j in needed:
+            if m[k, j] == 0:
+                continue
+            if first:
+                np.multiply(src[j], m[k, j], out=out)
+                first = False
+            else:
+                out += m[k, j] * src[j]
+
+
+def apply_gate(state, n, g, p):
+    """Apply the (already parametrized) gate `g` to qubits `p` of `state`, in place"""
+    if g.nq == 1:
+        apply_1q(state, n, g.matrix, p[0])
+    else:
+        apply_2q(state, n, g._tensor, p[0], p[1])
+
+
+class NumpySimulatorSampler(Sampler):
+    """Native statevector sampler, applying gates in place on a numpy array"""
+
+    # Below this size the fusion pass costs more than the sweeps it saves
+    FUSE_MIN_QUBITS = 18
+
+    # The statevector and the float64 probabilities, the kernels work in chunks
+    MEMORY_FACTOR = 1.5
+
+    compact_input = True
+    probability_cache = True
+
+    def __init__(self, circuit, dtype=np.complex128, fuse=True, cache=None):
+        if isinstance(circuit, CompactCircuit):
+            self.circuit = circuit
+            self.qc = circuit
+        elif isinstance(circuit, Circuit):
+            self.circuit = circuit
+            self.qc = circuit.toCompact()
+        else:
+            super().__init__(circuit)
+            self.qc = parse_qasm(self.circuit)
+
+        self.dtype = dtype
+        self.fuse = fuse
+        self.cache = cache
+        self.rng = np.random.default_rng()
+
+    def operations(self):
+        """Yield the (gate, qubits) pairs to apply, with parameters already bound"""
+        parametrized: Dict[Tuple[int, int], Gate] = {}
+        qc = self.qc
+        if self.fuse and qc.n_qbits >= self.FUSE_MIN_QUBITS:
+            qc = passes.fuse(qc)
+        ops, q0s, q1s, pis = qc.arrays()
+
+        for op, q0, q1, pi in zip(
+            ops.tolist(), q0s.tolist(), q1s.tolist(), pis.tolist()
+        ):
+            if op == OP_MEASURE:
+                continue
+
+            yield qc.resolve(op, pi, parametrized), (q0, q1)
+
+    def compute(self):
+        """Compute the statevector"""
+        n = self.qc.n_qbits
+        state = np.zeros(1 << n, dtype=self.dtype)
+        state[0] = 1
+
+        for i, (g, p) in enumerate(self.operations()):
+            if i % 64 == 0:
+                self.check_cancelled()
+            apply_gate(state, n, g, p)
+
+        return state
+
+    def probabilities(self):
+        """Compute the final probabilities, reusing the cached ones if available"""
+        key = None
+        if self.cache is not None:
+            key = self.qc.fingerprint()
+            probs = self.cache.get(key)
+            if probs is not None:
+                return probs
+
+        # Squared in place, so the statevector and a single probability vector
+        # are the peak memory
+        probs = np.abs(self.compute())
+        probs **= 2
+        if key is not None:
+            self.cache.put(key, probs)
+        return probs
+
+    def sample(self, shots):
+        return sample_counts(self.probabilities(), shots, self.rng)
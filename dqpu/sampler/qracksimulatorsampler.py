@@ -12,22 +12,35 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from qiskit import qasm2, transpile
-
+from .backendcache import get_backend, transpile_cached
 from .sampler import Sampler
+from .utils import KillablePool
+
+# Workers running the cancellable jobs, each with its own backend and transpiled
+# circuits cache
+_workers = KillablePool(preload=["qiskit"])
+
+
+def _qrack_backend():
+    from pyqrack import qrack_simulator  # noqa: F401
+    from qiskit.providers.qrack import Qrack
+
+    return Qrack.backends()[0]  # get_backend("qasm_simulator")
+
+
+def _sample(circuit, shots):
+    simulator = get_backend(("qrack",), _qrack_backend)
+    circ = transpile_cached(circuit, simulator, ("qrack",))
+    result = simulator.run(circ, shots=shots).result()
+    return result.get_counts(circ)
 
 
 class QrackSimulatorSampler(Sampler):
+    COST_OVERHEAD = 0.2
+    COST_AMPLITUDE = 2e-9
+
     def sample(self, shots):
-        from pyqrack import qrack_simulator  # noqa: F401
-        from qiskit.providers.qrack import Qrack
-
-        simulator = Qrack.backends()[0]  # get_backend("qasm_simulator")
-
-        qc = qasm2.loads(
-            self.circuit, custom_instructions=qasm2.LEGACY_CUSTOM_INSTRUCTIONS
-        )  # .toQasmCircuit())
-        circ = transpile(qc, simulator)
-        result = simulator.run(circ, shots=shots).result()
-        counts = result.get_counts(circ)
-        return counts
+        if self.cancel is not None:
+            return _workers.run(_sample, (self.circuit, shots), self.cancel)
+
+        return _sample(self.circuit, shots)
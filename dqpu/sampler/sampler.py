@@ -12,10 +12,86 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
+from typing import Any, Dict, Optional
+
+from .utils import physical_memory
+
+
+class SamplingCancelled(Exception):
+    pass
+
 
 class Sampler:
     """Abstract class that should be implemented by any sampler"""
 
+    # Samplers that only handle Clifford circuits, whatever their size
+    clifford_only = False
+
+    # Samplers that can be built directly from a CompactCircuit
+    compact_input = False
+
+    # Samplers computing the final probabilities, that accept a ProbabilityCache
+    probability_cache = False
+
+    # Samplers keeping scratch files in the `cache_dir` they accept
+    scratch_files = False
+
+    # Statevector cost model used by the dispatcher, in seconds: a fixed overhead
+    # per job, then for every gate of a subsystem a per gate overhead plus a cost
+    # per amplitude of the subsystem, and a cost per shot
+    COST_OVERHEAD = 0.0
+    COST_GATE = 2e-5
+    COST_AMPLITUDE = 6e-9
+    COST_SHOT = 1e-7
+    BYTES_PER_AMPLITUDE = 16
+
+    # Peak memory of the sampling, in statevectors of BYTES_PER_AMPLITUDE bytes
+    # per amplitude (ie: including the probabilities and the kernels temporaries)
+    MEMORY_FACTOR = 1.0
+
+    # Statevectors above this size are not estimated (2.0**1024 overflows)
+    MAX_MEMORY_QUBITS = 1000
+
+    # Backend options, see configure
+    options: Dict[str, Any] = {}
+
+    # Set by the caller to abort the sampling, see check_cancelled
+    cancel: Optional[threading.Event] = None
+
+    @classmethod
+    def configure(cls, **options):
+        """Set the backend options of this sampler class; unset (None) options are
+        left to the backend defaults"""
+        cls.options = {k: v for k, v in options.items() if v is not None}
+
+    @classmethod
+    def memory(cls, qubits: int) -> float:
+        """Estimated peak memory in bytes to sample a circuit of `qubits` qubits"""
+        if qubits > cls.MAX_MEMORY_QUBITS:
+            return float("inf")
+        return cls.MEMORY_FACTOR * cls.BYTES_PER_AMPLITUDE * 2.0**qubits
+
+    @classmethod
+    def supports(cls, features) -> bool:
+        """Return True if the sampler can run a circuit with these CircuitFeatures"""
+        if cls.clifford_only and not features.clifford:
+            return False
+        return cls.memory(features.largest) <= physical_memory()
+
+    @classmethod
+    def estimate_cost(cls, features, shots) -> float:
+        """Predicted seconds to sample `shots` from a circuit with these features;
+        the last statevector sweep accounts for the probabilities"""
+        return (
+            cls.COST_OVERHEAD
+            + sum(
+                g * cls.COST_GATE + (g + 1) * cls.COST_AMPLITUDE * (1 << q)
+                for q, g, _ in features.components
+            )
+            + shots * cls.COST_SHOT
+        )
+
     def __init__(self, circuit):
         if type(circuit) is not str:
             self.circuit = circuit.decode("ascii")
@@ -44,6 +120,12 @@ class Sampler:
 
         return True
 
+    def check_cancelled(self):
+        """Raise SamplingCancelled if the `cancel` event is set; long running
+        samplers call it periodically"""
+        if self.cancel is not None and self.cancel.is_set():
+            raise SamplingCancelled()
+
     def sample(self, shots):
         raise Exception("Not implemented")
 
@@ -0,0 +1,236 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from ..q import Circuit, CompactCircuit, parse_qasm
+from ..q.compact import OP_MEASURE
+from ..q.passes.analysis import non_clifford_mask, phase_quarters
+from .sampler import Sampler
+from .utils import bits_to_counts
+
+
+def _g(x1, z1, x2, z2):
+    """Exponent of i when multiplying the Paulis (x1, z1) and (x2, z2), per qubit"""
+    x1, z1, x2, z2 = (a.astype(np.int8) for a in (x1, z1, x2, z2))
+    return np.where(
+        (x1 == 1) & (z1 == 1),
+        z2 - x2,
+        np.where(x1 == 1, z2 * (2 * x2 - 1), np.where(z1 == 1, x2 * (1 - 2 * z2), 0)),
+    )
+
+
+class Tableau:
+    """Aaronson-Gottesman stabilizer tableau of `n` qubits: rows 0..n-1 are the
+    destabilizers and n..2n-1 the stabilizers. Phases are bit vectors over a
+    constant term and the random outcomes drawn during measurement, so all the
+    shots are sampled from a single symbolic measurement."""
+
+    def __init__(self, n):
+        self.n = n
+        self.x = np.zeros((2 * n, n), dtype=bool)
+        self.z = np.zeros((2 * n, n), dtype=bool)
+        self.x[np.arange(n), np.arange(n)] = True
+        self.z[np.arange(n, 2 * n), np.arange(n)] = True
+        self.r = np.zeros((2 * n, n + 1), dtype=bool)
+
+    def h(self, a):
+        self.r[:, 0] ^= self.x[:, a] & self.z[:, a]
+        self.x[:, a], self.z[:, a] = self.z[:, a].copy(), self.x[:, a].copy()
+
+    def s(self, a):
+        self.r[:, 0] ^= self.x[:, a] & self.z[:, a]
+        self.z[:, a] ^= self.x[:, a]
+
+    def sdg(self, a):
+        self.s(a)
+        self.pz(a)
+
+    def px(self, a):
+        self.r[:, 0] ^= self.z[:, a]
+
+    def py(self, a):
+        self.r[:, 0] ^= self.x[:, a] ^ self.z[:, a]
+
+    def pz(self, a):
+        self.r[:, 0] ^= self.x[:, a]
+
+    def cx(self, a, b):
+        x, z = self.x, self.z
+        self.r[:, 0] ^= x[:, a] & z[:, b] & ~(x[:, b] ^ z[:, a])
+        x[:, b] ^= x[:, a]
+        z[:, a] ^= z[:, b]
+
+    def cy(self, a, b):
+        self.sdg(b)
+        self.cx(a, b)
+        self.s(b)
+
+    def cz(self, a, b):
+        self.h(b)
+        self.cx(a, b)
+        self.h(b)
+
+    def swap(self, a, b):
+        self.cx(a, b)
+        self.cx(b, a)
+        self.cx(a, b)
+
+    def measure_all(self):
+        """Measure every qubit; return the (n, n + 1) matrix of outcomes as affine
+        functions of the random bits, and the number of random bits used"""
+        n = self.n
+        x, z, r = self.x, self.z, self.r
+        outcomes = np.zeros((n, n + 1), dtype=bool)
+        k = 0
+
+        for a in range(n):
+            ps = np.flatnonzero(x[n:, a])
+
+            if len(ps) > 0:
+                # Random outcome: rows anticommuting with Z_a absorb row p
+                p = n + ps[0]
+                rows = np.flatnonzero(x[:, a])
+                rows = rows[rows != p]
+                g = _g(x[p], z[p], x[rows], z[rows]).sum(axis=1)
+                r[rows] ^= r[p]
+                r[rows, 0] ^= (g % 4) == 2
+                x[rows] ^= x[p]
+                z[rows] ^= z[p]
+
+                x[p - n], z[p - n], r[p - n] = x[p], z[p], r[p]
+                x[p], z[p], r[p] = False, False, False
+                z[p, a] = True
+                k += 1
+                r[p, k] = True
+                outcomes[a, k] = True
+            else:
+                # Deterministic outcome: product of the stabilizers selected by
+                # the destabilizers anticommuting with Z_a
+                rows = n + np.flatnonzero(x[:n, a])
+                xs, zs = x[rows], z[rows]
+                xp = np.logical_xor.accumulate(xs, axis=0)
+                zp = np.logical_xor.accumulate(zs, axis=0)
+                xp = np.vstack([np.zeros((1, n), dtype=bool), xp[:-1]])
+                zp = np.vstack([np.zeros((1, n), dtype=bool), zp[:-1]])
+
+                outcomes[a] = np.logical_xor.reduce(r[rows], axis=0)
+                outcomes[a, 0] ^= (_g(xs, zs, xp, zp).sum() % 4) == 2
+
+        return outcomes, k
+
+
+class StabilizerSampler(Sampler):
+    """Clifford-only sampler based on the Aaronson-Gottesman tableau; it runs in
+    polynomial time, so it can take jobs of any number of qubits"""
+
+    clifford_only = True
+    compact_input = True
+
+    @classmethod
+    def supports(cls, features) -> bool:
+        return features.clifford
+
+    @classmethod
+    def memory(cls, qubits: int) -> float:
+        # The tableau (2n rows of x, z and phase bits) and the measurement rows, as
+        # numpy bools, plus the working copies
+        return 16.0 * qubits * (qubits + 1)
+
+    @classmethod
+    def estimate_cost(cls, features, shots) -> float:
+        # Every gate and measurement works on columns / rows of 2n bits, the
+        # shots are a (shots, k) x (k, n) binary product
+        n = features.n_qubits
+        return (
+            features.n_gates * (cls.COST_GATE + 2 * n * 1e-9)
+            + n * (5e-5 + 2 * n * n * 1e-9)
+            + shots * n * (n + 8) * 1e-9
+        )
+
+    def __init__(self, circuit):
+        if isinstance(circuit, CompactCircuit):
+            self.circuit = circuit
+            self.qc = circuit
+        elif isinstance(circuit, Circuit):
+            self.circuit = circuit
+            self.qc = circuit.toCompact()
+        else:
+            super().__init__(circuit)
+            self.qc = parse_qasm(self.circuit)
+
+        self.rng = np.random.default_rng()
+
+    @staticmethod
+    def is_clifford_circuit(qc: CompactCircuit) -> bool:
+        return not non_clifford_mask(qc).any()
+
+    def is_clifford(self) -> bool:
+        return StabilizerSampler.is_clifford_circuit(self.qc)
+
+    def compute(self):
+        """Compute the tableau of the circuit"""
+        t = Tableau(self.qc.n_qbits)
+        one_q = {
+            "I": lambda a: None,
+            "X": t.px,
+            "Y": t.py,
+            "Z": t.pz,
+            "H": t.h,
+            "S": t.s,
+            "SDG": t.sdg,
+        }
+        two_q = {"CX": t.cx, "CY": t.cy, "CZ": t.cz, "SWAP": t.swap}
+
+        ops, q0s, q1s, pis = self.qc.arrays()
+        for i, (op, q0, q1, pi) in enumerate(
+            zip(ops.tolist(), q0s.tolist(), q1s.tolist(), pis.tolist())
+        ):
+            if i % 256 == 0:
+                self.check_cancelled()
+            if op == OP_MEASURE:
+                continue
+
+            iden = self.qc.gate_table[op].iden
+            if iden in one_q:
+                one_q[iden](q0)
+            elif iden in two_q:
+                two_q[iden](q0, q1)
+            elif iden == "P":
+                quarters = phase_quarters(self.qc.params[pi])
+                if quarters is None:
+                    raise Exception(f"Gate {iden} is not a Clifford gate")
+                for _ in range(quarters):
+                    t.s(q0)
+            else:
+                raise Exception(f"Gate {iden} is not a Clifford gate")
+
+        return t
+
+    def sample(self, shots):
+        n = self.qc.n_qbits
+        outcomes, k = self.compute().measure_all()
+
+        const = outcomes[:, 0].astype(np.int32)
+        coeffs = outcomes[:, 1 : k + 1].T.astype(np.int32)
+
+        bits = np.empty((shots, n), dtype=np.uint8)
+        batch = 1 << 16
+        for i in range(0, shots, batch):
+            rb = self.rng.integers(
+                0, 2, size=(min(batch, shots - i), k), dtype=np.int32
+            )
+            bits[i : i + len(rb)] = (rb @ coeffs + const) & 1
+
+        return bits_to_counts(bits)
@@ -0,0 +1,195 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing
+import os
+import threading
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+def physical_memory() -> int:
+    """Total RAM of the machine, in bytes"""
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+
+def indices_to_bitstrings(indices: np.ndarray, n: int) -> List[str]:
+    """Format the basis state `indices` as `n` bits strings, vectorized"""
+    if n == 0:
+        return [""] * len(indices)
+
+    shifts = np.arange(n - 1, -1, -1, dtype=np.uint64)
+    bits = (indices.astype(np.uint64)[:, None] >> shifts) & 1
+    chars = (bits.astype(np.uint8) + ord("0")).view(f"S{n}").ravel()
+    return [c.decode("ascii") for c in chars]
+
+
+def bins_to_counts(bins: np.ndarray, n: int, offset: int = 0) -> Dict[str, int]:
+    """Build a counts dict from the nonzero `bins` of the basis states `offset`,
+    `offset + 1`, ..."""
+    nz = np.flatnonzero(bins)
+    keys = indices_to_bitstrings(nz + offset, n)
+    return dict(zip(keys, bins[nz].tolist()))
+
+
+def sample_counts(probs: np.ndarray, shots: int, rng=None) -> Dict[str, int]:
+    """Draw `shots` measurements of all the qubits from the final probabilities
+    `probs` (indexed by basis state) in a single vectorized call.
+
+    A multinomial draw walks every bin, so with few shots over many basis states
+    it is cheaper to invert the cumulative distribution of sorted uniforms."""
+    if rng is None:
+        rng = np.random.default_rng()
+
+    n = max(len(probs) - 1, 0).bit_length()
+    p = np.asarray(probs, dtype=np.float64)
+
+    if shots * 8 >= len(p):
+        return bins_to_counts(rng.multinomial(shots, p / p.sum()), n)
+
+    cdf = np.cumsum(p)
+    idx = np.searchsorted(cdf, rng.random(shots) * cdf[-1], side="right")
+    np.minimum(idx, len(p) - 1, out=idx)
+    outcomes, counts = np.unique(idx, return_counts=True)
+    return dict(zip(indices_to_bitstrings(outcomes, n), counts.tolist()))
+
+
+def bits_to_counts(bits: np.ndarray) -> Dict[str, int]:
+    """Build a counts dict from a (shots, n) array of measured bits, where column
+    `q` is qubit `q`; bitstrings have qubit 0 on the right, as in qiskit"""
+    n = bits.shape[1]
+    if n == 0:
+        return {"": len(bits)}
+
+    chars = (bits[:, ::-1].astype(np.uint8) + ord("0")).copy().view(f"S{n}").ravel()
+    values, counts = np.unique(chars, return_counts=True)
+    return {v.decode("ascii"): int(c) for v, c in zip(values, counts)}
+
+
+def counts_to_bits(counts: Dict[str, int], n: int) -> np.ndarray:
+    """Expand a counts dict in a (shots, n) array with a row for every shot"""
+    keys = np.array([k.replace(" ", "") for k in counts.keys()], dtype=f"S{n}")
+    rows = keys.view(np.uint8).reshape(len(keys), n)[:, ::-1] - ord("0")
+    return np.repeat(rows, list(counts.values()), axis=0)
+
+
+def join_counts(
+    n: int,
+    parts: Sequence[Tuple[List[int], Dict[str, int]]],
+    rng=None,
+) -> Dict[str, int]:
+    """Combine the counts of independent subsystems of an `n` qubits circuit, given
+    as (qubits, counts) pairs with the same number of shots, into joint counts.
+
+    Pairing the shots of every subsystem by a random permutation gives independent
+    samples of the product distribution."""
+    if rng is None:
+        rng = np.random.default_rng()
+
+    shots = sum(parts[0][1].values()) if parts else 0
+    bits = np.zeros((shots, n), dtype=np.uint8)
+    for qubits, counts in parts:
+        bits[:, qubits] = rng.permutation(counts_to_bits(counts, len(qubits)))
+
+    return bits_to_counts(bits)
+
+
+def _call(conn, fn, args):
+    try:
+        conn.send((True, fn(*args)))
+    except BaseException as e:
+        conn.send((False, repr(e)))
+
+
+def _serve(conn):
+    """Worker process loop of KillablePool, running the received calls until the
+    pipe is closed"""
+    while True:
+        try:
+            fn, args = conn.recv()
+        except EOFError:
+            return
+        _call(conn, fn, args)
+
+
+class KillablePool:
+    """Persistent subprocesses running `fn(*args)` calls, so a call can be aborted
+    by killing its process as soon as the `cancel` event is set.
+
+    Workers are reused across calls, keeping their module state (ie: the backend
+    and transpilation caches) until one is killed; a new one is spawned when no
+    idle worker is left. Processes are started by a forkserver that imports the
+    `preload` modules once, so children don't inherit the threads of the node."""
+
+    def __init__(self, preload=()):
+        self.preload = list(preload)
+        self.idle: List[Tuple[Any, Any]] = []
+        self.lock = threading.Lock()
+
+    def _spawn(self):
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(self.preload)
+        parent, child = ctx.Pipe()
+        p = ctx.Process(target=_serve, args=(child,), daemon=True)
+        p.start()
+        child.close()
+        return p, parent
+
+    def _acquire(self):
+        with self.lock:
+            while self.idle:
+                p, conn = self.idle.pop()
+                if p.is_alive():
+                    return p, conn
+                self._kill(p, conn)
+        return self._spawn()
+
+    @staticmethod
+    def _kill(p, conn):
+        if p.is_alive():
+            p.kill()
+        p.join()
+        conn.close()
+
+    def run(self, fn, args, cancel, poll=0.5):
+        """Run `fn(*args)` in a worker, raising SamplingCancelled (and killing the
+        worker) if `cancel` is set before it returns"""
+        from .sampler import SamplingCancelled
+
+        p, conn = self._acquire()
+        try:
+            conn.send((fn, args))
+            while not conn.poll(poll):
+                if cancel.is_set():
+                    raise SamplingCancelled()
+                if not p.is_alive() and not conn.poll(0):
+                    raise Exception(f"Sampling process died with code {p.exitcode}")
+            ok, r = conn.recv()
+        except BaseException:
+            self._kill(p, conn)
+            raise
+
+        with self.lock:
+            self.idle.append((p, conn))
+        if not ok:
+            raise Exception(f"Sampling process failed: {r}")
+        return r
+
+    def close(self):
+        """Stop the idle workers"""
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for p, conn in idle:
+            self._kill(p, conn)
@@ -13,10 +13,10 @@
 # limitations under the License.
 
 import json
-import random
 import sys
+import threading
 import time
-import traceback
+from typing import Dict, Set
 
 from requests.exceptions import ReadTimeout
 
@@ -28,14 +28,67 @@ from .blockchain import (
     to_near,
 )
 from .cli import default_parser
-from .sampler import SAMPLERS
+from .jobfile import job_circuits, loads_circuits, pack
+from .jobpool import JobPool
+from .jobsync import JobSync
+from .pipeline import Pipeline
+from .q import parse_qasm
+from .q.passes.analysis import non_clifford_mask
+from .sampler import (
+    SAMPLERS,
+    AerSimulatorSampler,
+    FactorizedSampler,
+    ProbabilityCache,
+    SamplerDispatcher,
+    SamplingCancelled,
+    build_sampler,
+)
+from .sampler.calibration import SamplerProfile, calibrate, profile_path, save_profile
+from .sampler.utils import physical_memory
+from .scheduler import SCHEDULERS, statevector_estimate
+from .txbatcher import TxBatcher, applied
 from .utils import create_dqpu_dirs
+from .watcher import JobWatcher
+
+# Jobs already rejected by the sampler after downloading them (ie: non Clifford
+# circuits for a clifford_only sampler)
+unsupported_jobs: Set[str] = set()
+
+# Jobs run concurrently, while blockchain transactions are sent one at a time
+nb_lock = threading.Lock()
+
+
+def estimate_job(j, args, profile):
+    """Predicted seconds of the job from the calibration profile, or None if it
+    can't be estimated (the scheduler then falls back to its own estimate)"""
+    try:
+        return profile.estimate(
+            int(j["qubits"]),
+            int(j["depth"]),
+            int(j["shots"]) * job_circuits(j),
+            None if args.sampler == "auto" else args.sampler,
+        )
+    except (ArithmeticError, ValueError) as e:
+        print(f"Unable to estimate the runtime of job {j['id']}: {e}")
+        return None
 
 
-def filter_jobs(jobs, args):
+def filter_jobs(jobs, args, profile=None, dispatcher=None, account_id=None):
     filtered = []
+
+    # Clifford samplers run in polynomial time, so with one of them (selected, or
+    # available to the dispatcher) jobs above max_qubits are fetched, and the non
+    # Clifford ones rejected by simulate_job
+    if dispatcher is not None:
+        clifford_only = any(s.clifford_only for s in dispatcher.samplers.values())
+    else:
+        clifford_only = SAMPLERS[args.sampler].clifford_only
     for j in jobs:
-        if j["status"] != "waiting":
+        if j["status"] != "waiting" or j["id"] in unsupported_jobs:
+            continue
+
+        # The contract skips the results of jobs we own or verified
+        if account_id is not None and account_id in (j["owner_id"], j["verifier_id"]):
             continue
 
         # Check if reward/10 is < of max_deposit
@@ -44,7 +97,7 @@ def filter_jobs(jobs, args):
             continue
 
         # Check for max qubits
-        if int(j["qubits"]) > int(args.max_qubits):
+        if not clifford_only and int(j["qubits"]) > int(args.max_qubits):
             print(
                 f"qubits {j['qubits']} is greater than max_qubits {args.max_qubits}"
                 + ", skipping"
@@ -59,29 +112,90 @@ def filter_jobs(jobs, args):
             )
             continue
 
+        # Estimate the runtime from the calibration profile
+        if profile is not None:
+            j["est_seconds"] = estimate_job(j, args, profile)
+
         filtered.append(j)
 
     return filtered
 
 
-def handle_job(j, ipfs, nb, sampler_name, base_dir):
-    # Get the qasm file
+def fetch_job(j, ipfs):
+    """Get the qasm file of the job, or None if it is not available"""
     try:
         jf = ipfs.get(j["job_file"], timeout=10)
     except ReadTimeout:  # TODO: move on ipfs.get raising a new exception
-        print(f"\tTimeout getting file {j['job_file']}, skipping for now")
-        return False
-
-    print(f"\tGot file {j['job_file']}")
-
-    # Load into a Sampler object (selected by params)
-    # qc = Circuit.fromQasmCircuit(jf)
-    sampler = SAMPLERS[sampler_name](jf)
-
-    # Do the simulation
-    print(f"\tStarting sampler {sampler_name}")
+        print(f"\t[{j['id']}] Timeout getting file {j['job_file']}, skipping for now")
+        return None
+
+    print(f"\t[{j['id']}] Got file {j['job_file']}")
+    return jf
+
+
+def is_clifford(circuit) -> bool:
+    return not non_clifford_mask(parse_qasm(circuit)).any()
+
+
+def build_job_sampler(circuit, sampler_name, cache=None):
+    """Load a job circuit into a `sampler_name` Sampler, or return None if the
+    sampler does not support it"""
+    sampler_cls = SAMPLERS[sampler_name]
+    if sampler_cls.clifford_only:
+        qc = parse_qasm(circuit)
+        if non_clifford_mask(qc).any():
+            return None
+        return build_sampler(sampler_cls, qc)
+
+    # Simulate independent subsystems (ie: trap qubits) separately
+    return FactorizedSampler(circuit, sampler_cls, cache)
+
+
+def simulate_job(
+    j, jf, sampler_name, cache=None, dispatcher=None, cancel=None, max_qubits=None
+):
+    """Sample the job circuits, returning the counts (in the job file format) or
+    None if unsupported or cancelled (when the `cancel` event is set); with the
+    `dispatcher`, jobs above `max_qubits` are accepted only if Clifford"""
+    circuits = loads_circuits(jf)
+    if (
+        dispatcher is not None
+        and max_qubits is not None
+        and int(j["qubits"]) > max_qubits
+        and not all(is_clifford(c) for c in circuits)
+    ):
+        print(f"\t[{j['id']}] Circuit is not a Clifford circuit, skipping")
+        unsupported_jobs.add(j["id"])
+        return None
+
+    n = f" on {len(circuits)} circuits" if len(circuits) > 1 else ""
+    print(f"\t[{j['id']}] Starting sampler {sampler_name}{n}")
     t_start = time.time()
-    counts = sampler.sample(j["shots"])
+
+    # Do the simulation, one circuit after the other
+    all_counts = []
+    try:
+        for circuit in circuits:
+            if dispatcher is not None:
+                all_counts.append(
+                    dispatcher.sample(circuit, j["shots"], j["id"], cancel)
+                )
+                continue
+
+            # Load into a Sampler object (selected by params)
+            sampler = build_job_sampler(circuit, sampler_name, cache)
+            if sampler is None:
+                print(f"\t[{j['id']}] Circuit is not a Clifford circuit, skipping")
+                unsupported_jobs.add(j["id"])
+                return None
+            sampler.cancel = cancel
+            all_counts.append(sampler.sample(j["shots"]))
+    except SamplingCancelled:
+        print(
+            f"\t[{j['id']}] Sampling cancelled after "
+            + f"{int(time.time() - t_start)} seconds"
+        )
+        return None
     t_duration = int(time.time() - t_start)
     if t_duration > 120:
         t_duration_s = (
@@ -90,106 +204,348 @@ def handle_job(j, ipfs, nb, sampler_name, base_dir):
     else:
         t_duration_s = f"{t_duration} seconds"
 
-    # Upload the result
+    print(f"\t[{j['id']}] Sampling done in {t_duration_s}")
+    if cache is not None:
+        print(f"\tProbability cache: {cache.stats()}")
+    return pack(all_counts)
+
+
+def upload_result(j, counts, ipfs, base_dir):
+    """Write the counts to the result file and upload it, returning its cid"""
     result_f = f"{base_dir}/sampler/cache/{j['id']}_result.json"
     with open(result_f, "w") as cf:
         cf.write(json.dumps(counts))
 
-    print(f"\tSampling done in {t_duration_s}, uploading {result_f}")
+    print(f"\t[{j['id']}] Uploading {result_f}")
     jf_result = ipfs.upload(result_f)
-    print(f"\tResult file uploaded {jf_result}")
+    print(f"\t[{j['id']}] Result file uploaded {jf_result}")
+    return jf_result
 
-    # Submit the result with the deposit
-    try:
-        sub_res = nb.submit_job_result(
-            j["id"],
-            jf_result,
-            deposit=from_near(j["reward_amount"]) / 10 + 0.00001,
+
+def job_deposit(j):
+    return from_near(j["reward_amount"]) / 10 + 0.00001
+
+
+def submit_results(nb, items):
+    """Submit the (job, result file) pairs in a single transaction, with the sum
+    of their deposits; return the ids of the jobs the contract updated"""
+    with nb_lock:
+        return nb.submit_job_result_batch(
+            [{"id": j["id"], "result_file": jf_result} for j, jf_result in items],
+            deposit=sum(job_deposit(j) for j, _ in items),
         )
-        print(f"\t{sub_res}")
-        return True
-    except Exception as e:
-        print("Failed to submit:", e)
+
+
+def result_submitted(j, f):
+    """Print the outcome of the future of a result queued in the submit_results
+    TxBatcher, returning True if the job was updated"""
+    if f.exception() is not None:
+        print(f"\t[{j['id']}] Failed to submit:", f.exception())
+        return False
+    if not f.result():
+        print(f"\t[{j['id']}] Result skipped, the job is no longer waiting")
         return False
 
+    print(f"\t[{j['id']}] Result submitted")
+    return True
+
 
 def sampler_node():  # noqa: C901
     parser = default_parser()
 
     parser.add_argument("-d", "--max-deposit", help="maximum deposit", default=0.1)
     parser.add_argument(
-        "-q", "--max-qubits", help="maximum number of simulable qubits", default=21
+        "-q",
+        "--max-qubits",
+        help="maximum number of simulable qubits (default: from the calibration "
+        + "profile, or 21)",
+        default=None,
+    )
+    parser.add_argument(
+        "--scheduler",
+        help="job scheduling policy",
+        default="profit",
+        choices=SCHEDULERS.keys(),
+    )
+    parser.add_argument(
+        "--workers",
+        help="number of worker threads running jobs concurrently",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--memory-budget",
+        help="memory in GB for the running jobs (default: 80%% of the RAM)",
+        type=float,
+        default=None,
+    )
+    parser.add_argument(
+        "--calibrate",
+        help="benchmark the sampler (all the samplers if auto), save the "
+        + "calibration profile and exit",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--calibrate-timeout",
+        help="maximum seconds of a calibration run",
+        type=float,
+        default=60,
+    )
+    parser.add_argument(
+        "--watch-interval",
+        help="seconds between status checks of the running jobs, 0 to disable",
+        type=float,
+        default=10,
+    )
+    parser.add_argument(
+        "--tx-batch-size",
+        help="maximum number of results submitted by a single transaction (at "
+        + "most 32)",
+        type=int,
+        default=16,
+    )
+    parser.add_argument(
+        "--tx-batch-delay",
+        help="maximum seconds a result waits for its batch transaction",
+        type=float,
+        default=1.0,
     )
     parser.add_argument("--min-qubits", help="minimum number of qubits", default=1)
+    parser.add_argument(
+        "--cache-size",
+        help="size in MB of the probability cache, 0 to disable it",
+        default=1024,
+    )
     parser.add_argument(
         "-s",
         "--sampler",
-        help="sampler to use",
+        help="sampler to use; auto selects the fastest one for every job",
         default="aersimulator",
-        choices=SAMPLERS.keys(),
+        choices=list(SAMPLERS.keys()) + ["auto"],
+    )
+    parser.add_argument(
+        "--native-max-qubits",
+        help="subsystems of a split circuit (ie: trap qubits) up to this many qubits "
+        + "are simulated with numpy instead of the sampler, 0 to disable",
+        type=int,
+        default=FactorizedSampler.NATIVE_MAX_QUBITS,
+    )
+
+    parser.add_argument(
+        "--aer-max-parallel-threads",
+        help="maximum number of threads used by aersimulator (0 for all the cores)",
+        type=int,
+    )
+    parser.add_argument(
+        "--aer-fusion-enable",
+        help="enable the aersimulator gate fusion",
+        choices=["true", "false"],
+    )
+    parser.add_argument(
+        "--aer-precision",
+        help="aersimulator floating point precision",
+        choices=["single", "double"],
+    )
+    parser.add_argument(
+        "--aer-method",
+        help="aersimulator simulation method",
+        choices=[
+            "automatic",
+            "statevector",
+            "density_matrix",
+            "stabilizer",
+            "matrix_product_state",
+            "extended_stabilizer",
+            "tensor_network",
+        ],
     )
 
     args = parser.parse_args()  # noqa: F841
     base_dir = create_dqpu_dirs()
 
+    FactorizedSampler.NATIVE_MAX_QUBITS = args.native_max_qubits
+    AerSimulatorSampler.configure(
+        max_parallel_threads=args.aer_max_parallel_threads,
+        fusion_enable=(
+            None if args.aer_fusion_enable is None else args.aer_fusion_enable == "true"
+        ),
+        precision=args.aer_precision,
+        method=args.aer_method,
+    )
+
+    if args.calibrate:
+        samplers = SAMPLERS
+        if args.sampler != "auto":
+            samplers = {args.sampler: SAMPLERS[args.sampler]}
+
+        profile_data = calibrate(samplers, timeout=args.calibrate_timeout)
+
+        # Keep the results of the samplers not calibrated now
+        old = SamplerProfile.load()
+        if old is not None:
+            profile_data["samplers"] = {
+                **old.profile["samplers"],
+                **profile_data["samplers"],
+            }
+        save_profile(profile_data)
+        print(f"Calibration profile saved to {profile_path()}")
+        return
+
+    profile = SamplerProfile.load()
+    profile_sampler = None if args.sampler == "auto" else args.sampler
+    if args.max_qubits is None:
+        max_qubits = profile.max_qubits(profile_sampler) if profile else None
+        if max_qubits is None:
+            print("Sampler not calibrated (run with --calibrate), max qubits is 21")
+            max_qubits = 21
+        else:
+            print(f"Max qubits from the calibration profile: {max_qubits}")
+        args.max_qubits = max_qubits
+
+    memory_budget = int(0.8 * physical_memory())
+    if args.memory_budget is not None:
+        memory_budget = int(args.memory_budget * 1024**3)
+
+    # Estimated runtime from the calibration profile, if available
+    scheduler = SCHEDULERS[args.scheduler](
+        estimate=lambda j: j.get("est_seconds") or statevector_estimate(j)
+    )
+
     nb = NearBlockchain(args.account, args.network)
     ipfs = IPFSGateway(gateway="http://" + args.ipfs_gateway)  # noqa: F841
+    cache = None
+    if int(args.cache_size) > 0:
+        cache = ProbabilityCache(max_size=int(args.cache_size) * 1024 * 1024)
+
+    dispatcher = None
+    if args.sampler == "auto":
+        print("Testing available samplers")
+        available = SamplerDispatcher.available(SAMPLERS)
+        print(f"Samplers working correctly: {', '.join(available.keys())}")
+        sampler_ok = len(available) > 0
+        dispatcher = SamplerDispatcher(available, cache)
+    else:
+        print(f"Testing selected sampler: {args.sampler}")
+        sampler_ok = SAMPLERS[args.sampler].test()
 
-    # Start contract polling for new jobs
-    running = True
-    n_sampled = 0
-    first_run = True
-
-    print(f"Testing selected sampler: {args.sampler}")
-    sampler_ok = SAMPLERS[args.sampler].test()
     if sampler_ok:
         print(f"Sampler {args.sampler} is working correctly.")
     else:
         print(f"Sampler {args.sampler} is not working correctly, exiting.")
         sys.exit()
 
+    # Jobs are admitted by the memory estimate of their sampler
+    if dispatcher is not None:
+        pool = JobPool(args.workers, memory_budget, dispatcher.memory)
+    else:
+        pool = JobPool(args.workers, memory_budget, SAMPLERS[args.sampler].memory)
+
+    # Staged pipeline: the next jobs are fetched while the current ones simulate,
+    # and the results are uploaded and submitted while the next ones start
+    stats = {"sampled": 0}
+    in_flight: Dict[str, dict] = {}
+
+    def fetch(_, j):
+        jf = fetch_job(j, ipfs)
+        return None if jf is None else (j, jf)
+
+    # Running simulations are aborted when another sampler takes their job
+    watcher = None
+    if args.watch_interval > 0:
+        watcher = JobWatcher(nb, args.watch_interval).start()
+
+    def simulate(_, item):
+        j, jf = item
+        with pool.admit(int(j["qubits"])):
+            cancel = watcher.watch(j["id"]) if watcher else None
+            try:
+                counts = simulate_job(
+                    j,
+                    jf,
+                    args.sampler,
+                    cache,
+                    dispatcher,
+                    cancel,
+                    int(args.max_qubits),
+                )
+            finally:
+                if watcher:
+                    watcher.unwatch(j["id"])
+        return None if counts is None else (j, counts)
+
+    def upload(_, item):
+        j, counts = item
+        return (j, upload_result(j, counts, ipfs, base_dir))
+
+    # Results completed together are submitted in a single transaction; every
+    # result is resolved by whether the contract updated its job
+    results = TxBatcher(
+        lambda items: submit_results(nb, items),
+        args.tx_batch_size,
+        args.tx_batch_delay,
+        applied(lambda item: item[0]["id"]),
+    )
+
+    def submitted(j, f):
+        if result_submitted(j, f):
+            stats["sampled"] += 1
+        in_flight.pop(j["id"], None)
+
+    def submit(_, item):
+        # Queue the result without waiting for its transaction, so the results
+        # of the next jobs join the same batch
+        results.add(item).add_done_callback(lambda f: submitted(item[0], f))
+        return item
+
+    def on_exit(job_id, ok):
+        # Submitted jobs stay in flight until their transaction is done
+        if not ok:
+            in_flight.pop(job_id, None)
+
+    pipeline = Pipeline(
+        [
+            ("fetch", fetch, 2),
+            ("simulate", simulate, args.workers),
+            ("upload", upload, 2),
+            ("submit", submit, 1),
+        ],
+        maxsize=max(2, args.workers),
+        on_exit=on_exit,
+    )
+
     print("Sampler node started.")
-    waiting_jobs = 0
 
-    while running:
-        if first_run:
-            first_run = False
-            latest_jobs = repeat_until_done(lambda: nb.get_all_jobs(True))
-        else:
-            i = 0
-            while (
-                repeat_until_done(lambda: nb.get_jobs_stats())["waiting"]
-                == waiting_jobs
-            ) and i < 5:
-                time.sleep(random.randint(0, 5))
-                i += 1
-            latest_jobs = repeat_until_done(lambda: nb.get_latest_jobs())
-
-        waiting_jobs = repeat_until_done(lambda: nb.get_jobs_stats()["waiting"])
-
-        filtered_jobs = filter_jobs(latest_jobs, args)
-        random.shuffle(filtered_jobs)
+    # Start contract polling for new and changed jobs; the heartbeat retries the
+    # jobs left out of a full pipeline
+    sync = JobSync(nb, statuses=["waiting"])
+    for _ in sync.deltas(heartbeat=15):
+        latest_jobs = sync.active()
+        filtered_jobs = scheduler.order(
+            filter_jobs(latest_jobs, args, profile, dispatcher, nb.account.account_id)
+        )
         fj_s = ", ".join(map(lambda j: j["id"], filtered_jobs))
         print(f"Found {len(filtered_jobs)} jobs matching sampler criteria: {fj_s}")
-        i = 0
 
-        # If there is a new job that needs execution, process it
+        # Queue the new jobs in the pipeline, as long as there is room for them
         for j in filtered_jobs:
-            i += 1
+            if j["id"] in in_flight:
+                continue
+            if not pipeline.offer(j["id"], j):
+                break
+            in_flight[j["id"]] = j
+            est = ""
+            if j.get("est_seconds") is not None:
+                est = f" (estimated {j['est_seconds']:.1f} seconds)"
             print(
-                f"[{i}/{len(filtered_jobs)}] Processing job {j['id']} with {j['qubits']} "
-                + f"qubits for {j['shots']} shots"
+                f"Queued job {j['id']} with {j['qubits']} qubits for {j['shots']} "
+                + f"shots{est}"
             )
-            try:
-                if handle_job(j, ipfs, nb, args.sampler, base_dir):
-                    n_sampled += 1
-                    waiting_jobs -= 1
-            except Exception as e:
-                print("Failed to handle job:", e)
-                traceback.print_exc()
+
+        print(f"Pipeline queues (queued+running): {pipeline.report()}")
 
         repeat_until_done(
             lambda: print(
-                f"Account balance is {nb.balance():0.5f} N, sampled jobs {n_sampled}"
+                f"Account balance is {nb.balance():0.5f} N, "
+                + f"sampled jobs {stats['sampled']}"
             )
         )
@@ -0,0 +1,114 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .jobfile import job_circuits
+
+# Job schedulers of the nodes: they order the jobs the node is going to handle.
+
+# Largest exponent of 2**qubits in the estimates: the contract doesn't bound the
+# qubits, and 2.0**1024 overflows (larger jobs are then estimated as infinite)
+MAX_EXPONENT = 1000
+
+
+def statevector_estimate(j) -> float:
+    """Rough seconds to simulate a job with a statevector sampler, used when the
+    node has no calibration profile (see dqpu-sampler --calibrate)"""
+    q = int(j["qubits"])
+    shots = int(j["shots"]) * job_circuits(j)
+    return (
+        0.05 + int(j["depth"]) * q * 2.0 ** min(q, MAX_EXPONENT) * 6e-9 + shots * 1e-7
+    )
+
+
+class Scheduler:
+    """Base class of the schedulers: `estimate(job)` gives the predicted compute
+    seconds of a job"""
+
+    def __init__(self, estimate: Optional[Callable[[dict], float]] = None):
+        if estimate is None:
+            estimate = statevector_estimate
+        self.estimate = estimate
+
+    def order(self, jobs: List[dict]) -> List[dict]:
+        raise Exception("Not implemented")
+
+
+class RandomScheduler(Scheduler):
+    """Random order, so that nodes don't compete for the same jobs"""
+
+    def order(self, jobs):
+        jobs = list(jobs)
+        random.shuffle(jobs)
+        return jobs
+
+
+class ProfitScheduler(Scheduler):
+    """Order jobs by expected reward per estimated compute second. The score of
+    a job doubles every `aging` seconds since the scheduler first saw it, and a
+    job waiting for more than `max_wait` seconds goes before every other job
+    (the oldest first), so unprofitable jobs are handled within a bounded time"""
+
+    # Jobs not seen for this long are forgotten
+    FORGET_AFTER = 24 * 3600
+
+    def __init__(
+        self,
+        estimate: Optional[Callable[[dict], float]] = None,
+        aging: float = 600,
+        max_wait: float = 3600,
+        clock: Callable[[], float] = time.time,
+    ):
+        super().__init__(estimate)
+        self.aging = aging
+        self.max_wait = max_wait
+        self.clock = clock
+        self.first_seen: Dict[str, float] = {}
+        self.last_seen: Dict[str, float] = {}
+
+    def score(self, j, now) -> float:
+        reward = int(j["reward_amount"])
+        try:
+            seconds = max(self.estimate(j), 0.01)
+        except (ArithmeticError, ValueError) as e:
+            print(f"Unable to estimate the runtime of job {j['id']}: {e}")
+            seconds = math.inf
+        age = min(now - self.first_seen.get(j["id"], now), self.max_wait)
+        return reward / seconds * 2.0 ** (age / self.aging)
+
+    def priority(self, j, now) -> Tuple[int, float]:
+        first_seen = self.first_seen.get(j["id"], now)
+        if now - first_seen >= self.max_wait:
+            return (1, -first_seen)
+        return (0, self.score(j, now))
+
+    def order(self, jobs):
+        now = self.clock()
+        for j in jobs:
+            self.first_seen.setdefault(j["id"], now)
+            self.last_seen[j["id"]] = now
+
+        for jid, t in list(self.last_seen.items()):
+            if now - t > self.FORGET_AFTER:
+                del self.last_seen[jid]
+                del self.first_seen[jid]
+
+        return sorted(jobs, key=lambda j: self.priority(j, now), reverse=True)
+
+
+SCHEDULERS = {"random": RandomScheduler, "profit": ProfitScheduler}
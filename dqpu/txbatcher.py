@@ -0,0 +1,123 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class TxBatcher:
+    """Collect the items of a batch transaction: `send(items)` is called from a
+    background thread once `max_items` items are queued, or `max_delay` seconds
+    after the first one. Every `add` returns a future resolved with
+    `resolve(item, result)` of the transaction that carried its item (the result
+    itself by default), or its exception."""
+
+    def __init__(
+        self,
+        send: Callable[[List[Any]], Any],
+        max_items: int = 16,
+        max_delay: float = 2.0,
+        resolve: Optional[Callable[[Any, Any], Any]] = None,
+    ):
+        self.send = send
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self.resolve = resolve
+
+        self.items: List[Tuple[Any, Future]] = []
+        # Time the oldest queued item was added
+        self.first = 0.0
+        self.closed = False
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def add(self, item) -> Future:
+        f: Future = Future()
+        with self.cond:
+            if self.closed:
+                raise RuntimeError("TxBatcher is closed")
+            if not self.items:
+                self.first = time.monotonic()
+            self.items.append((item, f))
+            self.cond.notify()
+        return f
+
+    def pending(self) -> int:
+        with self.cond:
+            return len(self.items)
+
+    def flush(self):
+        """Send the queued items now"""
+        with self.cond:
+            if self.items:
+                self.first = float("-inf")
+                self.cond.notify()
+
+    def close(self):
+        """Send the queued items and stop"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        self.thread.join()
+
+    def _ready(self) -> bool:
+        return bool(self.items) and (
+            self.closed
+            or len(self.items) >= self.max_items
+            or time.monotonic() - self.first >= self.max_delay
+        )
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self._ready():
+                    if self.closed and not self.items:
+                        return
+                    timeout = None
+                    if self.items:
+                        timeout = self.first + self.max_delay - time.monotonic()
+                    self.cond.wait(timeout)
+
+                batch = self.items[: self.max_items]
+                self.items = self.items[self.max_items :]
+                self.first = time.monotonic()
+
+            self._send(batch)
+
+    def _send(self, batch):
+        try:
+            r = self.send([item for item, _ in batch])
+        except Exception as e:
+            for _, f in batch:
+                f.set_exception(e)
+            return
+
+        for item, f in batch:
+            try:
+                v = r if self.resolve is None else self.resolve(item, r)
+            except Exception as e:
+                f.set_exception(e)
+            else:
+                f.set_result(v)
+
+
+def applied(item_id: Callable[[Any], str]) -> Callable[[Any, Any], bool]:
+    """TxBatcher resolve function of the contract batch methods, returning the
+    ids of the jobs they updated: an item resolves to True if its job (whose id
+    is `item_id(item)`) was updated, False if the contract skipped it"""
+    return lambda item, ids: item_id(item) in (ids or [])
@@ -12,11 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import copy
 import random
-from typing import Optional, Sequence, Tuple, cast
+from typing import List, Optional, Sequence, Tuple, Union, cast
 
-from ..q import Circuit, ExperimentResult, Gates
+from ..q import Circuit, CompactCircuit, ExperimentResult, Gates
 from .trapper import TrapInfo, Trapper
 
 
@@ -57,44 +56,39 @@ class BasicTrapper(Trapper):
         pass
 
     def trap(
-        self, qc: Circuit, level: Optional[int] = None
-    ) -> Tuple[Circuit, Sequence[BasicTrapInfo]]:
-        """Add traps to the quantum circuit"""
+        self, qc: Union[Circuit, CompactCircuit], level: Optional[int] = None
+    ) -> Tuple[Union[Circuit, CompactCircuit], Sequence[BasicTrapInfo]]:
+        """Add traps to the quantum circuit; a CompactCircuit is trapped working
+        directly on its arrays, and the result has the same type of `qc`"""
         if level is None:
             level = 1
 
-        qc = copy.deepcopy(qc)
+        compact = isinstance(qc, CompactCircuit)
+        cc = qc.copy() if isinstance(qc, CompactCircuit) else qc.toCompact()
+        x_op = cc.opcode(Gates.X)
 
-        traps: Sequence[BasicTrapInfo] = []
-        gates = qc.gates
+        traps: List[BasicTrapInfo] = []
         for i in range(level):
-            qc.n_qbits += 1
-            i_r = random.randint(0, qc.n_qbits - 1)
+            cc.n_qbits += 1
+            i_r = random.randint(0, cc.n_qbits - 1)
 
-            def remap_qbit(q_idx):
-                return q_idx + 1 if q_idx >= i_r else q_idx
+            # Make room for the trap qubit
+            _, q0s, q1s, _ = cc.arrays()
+            q0s[q0s >= i_r] += 1
+            q1s[q1s >= i_r] += 1
 
-            def remap_gate(gq):
-                a, p, args = gq
-                p = list(map(remap_qbit, p))
-                return (a, p, args)
-
-            def remap_trap(t):
-                t.qubit = remap_qbit(t.qubit)
-                return t
-
-            gates = list(map(remap_gate, gates))
-            traps = list(map(remap_trap, traps))
+            for t in traps:
+                if t.qubit >= i_r:
+                    t.qubit += 1
 
             v_e = False
             if not random.choice([True, False]):
                 v_e = True
-                gates.insert(random.randint(0, len(gates) - 1), (Gates.X, [i_r]))
+                cc.insert(random.randint(0, max(len(cc) - 1, 0)), x_op, i_r)
 
             traps.append(BasicTrapInfo(i_r, v_e))
 
-        qc.gates = gates
-        return (qc, traps)
+        return (cc if compact else cc.toCircuit(), traps)
 
     def untrap(self, trapped_qc, traps: Sequence[TrapInfo]) -> Circuit:
         """Remove traps from the quantum circuits `trapped_qc`"""
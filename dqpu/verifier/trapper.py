@@ -12,9 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Optional, Sequence, Tuple
+from typing import Optional, Sequence, Tuple, Union
 
-from ..q import Circuit, ExperimentResult
+from ..q import Circuit, CompactCircuit, ExperimentResult
 
 
 class TrapInfo:
@@ -39,8 +39,8 @@ class Trapper:
         raise Exception("Abstract")
 
     def trap(
-        self, qc: Circuit, level: Optional[int] = None
-    ) -> Tuple[Circuit, Sequence[TrapInfo]]:
+        self, qc: Union[Circuit, CompactCircuit], level: Optional[int] = None
+    ) -> Tuple[Union[Circuit, CompactCircuit], Sequence[TrapInfo]]:
         """Add traps to the quantum circuits `qc`"""
         raise Exception("Abstract")
 
@@ -14,20 +14,52 @@
 
 import json
 import pickle
-import random
-import time
 import traceback
+from typing import Dict, Set, Tuple
 
 from requests.exceptions import ReadTimeout
 
-from .blockchain import IPFSGateway, NearBlockchain, repeat_until_done
+from .blockchain import IPFSGateway, NearBlockchain
 from .cli import default_parser
-from .q import Circuit
+from .jobfile import dumps_circuits, job_circuits, loads_circuits, pack, unpack
+from .jobsync import JobSync
+from .q import parse_qasm
+from .scheduler import SCHEDULERS
+from .txbatcher import TxBatcher, applied
 from .utils import create_dqpu_dirs
 from .verifier import BasicTrapper  # BasicTrapInfo,
 
+# Job states already handled, whose validity is queued in a batch transaction
+# or sent (the job list may still show them until the next sync)
+handled_jobs: Set[Tuple[str, str, str]] = set()
 
-def handle_pending_validation_job(j, ipfs, nb, base_dir):
+# Validities applied by the contract, by the status of their jobs
+applied_validities: Dict[str, int] = {"pending-validation": 0, "validating-result": 0}
+
+
+def job_state(j):
+    return (j["id"], j["status"], j["result_file"])
+
+
+def send_validity(batcher, j, item):
+    """Queue the validity of job `j` in a batch transaction, printing the outcome
+    once the transaction is sent; failed ones are handled again"""
+
+    def done(f):
+        if f.exception() is not None:
+            handled_jobs.discard(job_state(j))
+            print(f"\t[{j['id']}] Failed to set the validity:", f.exception())
+        elif not f.result():
+            print(f"\t[{j['id']}] Validity skipped, the job changed status")
+        else:
+            applied_validities[j["status"]] += 1
+            print(f"\t[{j['id']}] Validity set")
+
+    handled_jobs.add(job_state(j))
+    batcher.add({"id": j["id"], **item}).add_done_callback(done)
+
+
+def handle_pending_validation_job(j, ipfs, job_validity, base_dir, limits):
     print(f"Processing pending-validation job {j['id']} from {j['owner_id']}")
 
     try:
@@ -36,38 +68,50 @@ def handle_pending_validation_job(j, ipfs, nb, base_dir):
         print(f"\tTimeout getting file {j['job_file']}, skipping for now")
         return False
 
-    # Parse the file using q.Circuit.fromQasm
+    # Parse the circuits, rejecting the file as soon as it exceeds the limits (the
+    # gates of all the circuits count towards max_gates)
     try:
-        qc = Circuit.fromQasmCircuit(jf.decode("ascii"))
+        if len(jf) > limits["max_size"]:
+            raise Exception(f"File too big: {len(jf)} > {limits['max_size']} bytes")
+
+        circuits = loads_circuits(jf)
+        if len(circuits) != job_circuits(j):
+            raise Exception(f"Expected {job_circuits(j)} circuits, got {len(circuits)}")
+
+        qcs = []
+        max_gates = limits["max_gates"]
+        for c in circuits:
+            qcs.append(parse_qasm(c, None, limits["max_qubits"], max_gates))
+            max_gates -= len(qcs[-1])
     except Exception as e:
         print("\t", "Failed to parse", j["id"], e)
-        nb.set_job_validity(j["id"], False)
+        send_validity(job_validity, j, {"valid": False})
         return True
 
-    # Add a trap
+    # Add a trap to every circuit
     trapper = BasicTrapper()
-    (qc2, trap_list) = trapper.trap(qc)
+    trapped = [trapper.trap(qc) for qc in qcs]
 
     # Save trap info to a file
     with open(f"{base_dir}/{j['id']}_qc_traps.pickle", "wb") as outp:
-        pickle.dump(trap_list, outp, pickle.HIGHEST_PROTOCOL)
+        pickle.dump(pack([t for _, t in trapped]), outp, pickle.HIGHEST_PROTOCOL)
 
     # Save qasm to file
     trapped_qasm_file = f"{base_dir}/{j['id']}_qc_trapped.qasm"
 
     with open(trapped_qasm_file, "w") as f:
-        f.write(qc2.toQasmCircuit())
+        f.write(dumps_circuits([qc2.toQasmCircuit() for qc2, _ in trapped]))
 
     # Upload the file
     jf_trapped = ipfs.upload(trapped_qasm_file)
     print("\tTrapped file uploaded", jf_trapped)
 
     # Send the set_validity
-    print("\t", nb.set_job_validity(j["id"], True, jf_trapped))
+    send_validity(job_validity, j, {"valid": True, "trapped_file": jf_trapped})
     return True
 
 
-def handle_validating_result_job(j, ipfs, nb, base_dir):  # noqa: C901
+def handle_validating_result_job(j, ipfs, result_validity, base_dir):  # noqa: C901
     print(
         f"Processing validating-result job {j['id']} from {j['owner_id']} "
         + f"sampled by {j['sampler_id']}"
@@ -81,32 +125,35 @@ def handle_validating_result_job(j, ipfs, nb, base_dir):  # noqa: C901
         return False
 
     try:
-        counts = json.loads(rf)
+        counts_list = unpack(json.loads(rf), job_circuits(j))
+        ctots = [sum(counts.values()) for counts in counts_list]
     except:
         print("\tInvalid result data")
-        print(nb.set_result_validity(j["id"], False))
+        send_validity(result_validity, j, {"valid": False})
         return True
 
-    # Check if shots match
-    ctot = sum(counts.values())
-    if j["shots"] > ctot:
+    # Check if shots match, for every circuit
+    if j["shots"] > min(ctots):
         print("\t", "Invalid number of shots")
-        print(nb.set_result_validity(j["id"], False))
+        send_validity(result_validity, j, {"valid": False})
         return True
 
     # Load the trap from file
     trap_fp = f"{base_dir}/{j['id']}_qc_traps.pickle"
     try:
         with open(trap_fp, "rb") as inp:
-            trap_list = pickle.load(inp)
+            trap_lists = unpack(pickle.load(inp), job_circuits(j))
     except:
         print(f'Unable to load {trap_fp}, skipping job {j["id"]}')
         return False
 
-    # Check trap validity
+    # Check trap validity; a single failed circuit invalidates the job
     try:
         trapper = BasicTrapper()
-        validity = trapper.verify(trap_list, counts)
+        validity = all(
+            trapper.verify(trap_list, counts)
+            for trap_list, counts in zip(trap_lists, counts_list)
+        )
     except Exception as e:
         print("Got exception while verifying, contact dakk")
         print(e)
@@ -114,7 +161,7 @@ def handle_validating_result_job(j, ipfs, nb, base_dir):  # noqa: C901
 
     # Send the set_result_validity
     if validity:
-        trap_j = list(map(lambda t: t.dump(), trap_list))
+        trap_j = pack([[t.dump() for t in trap_list] for trap_list in trap_lists])
         trap_file = f"{base_dir}/{j['id']}_traps.json"
 
         with open(trap_file, "w") as inp:
@@ -122,58 +169,95 @@ def handle_validating_result_job(j, ipfs, nb, base_dir):  # noqa: C901
 
         trap_file_i = ipfs.upload(trap_file)
 
-        print("\t", nb.set_result_validity(j["id"], True, trap_file_i))
+        send_validity(result_validity, j, {"valid": True, "trap_file": trap_file_i})
     else:
-        print("\t", nb.set_result_validity(j["id"], False))
+        send_validity(result_validity, j, {"valid": False})
 
     return True
 
 
 def verifier_node():  # noqa: C901
     parser = default_parser()
+    parser.add_argument(
+        "--max-job-size",
+        help="maximum size in bytes of a job file",
+        type=int,
+        default=4 * 1024 * 1024,
+    )
+    parser.add_argument(
+        "-q", "--max-qubits", help="maximum number of qubits", type=int, default=1000
+    )
+    parser.add_argument(
+        "--max-gates", help="maximum number of gates", type=int, default=1000000
+    )
+    parser.add_argument(
+        "--scheduler",
+        help="job scheduling policy",
+        default="profit",
+        choices=SCHEDULERS.keys(),
+    )
+    parser.add_argument(
+        "--tx-batch-size",
+        help="maximum number of jobs settled by a single transaction (at most 32)",
+        type=int,
+        default=16,
+    )
+    parser.add_argument(
+        "--tx-batch-delay",
+        help="maximum seconds a validity waits for its batch transaction",
+        type=float,
+        default=2.0,
+    )
     args = parser.parse_args()  # noqa: F841
+    limits = {
+        "max_size": args.max_job_size,
+        "max_qubits": args.max_qubits,
+        "max_gates": args.max_gates,
+    }
 
     base_dir = create_dqpu_dirs()
 
+    # Verification cost grows with the circuit size, not exponentially
+    scheduler = SCHEDULERS[args.scheduler](
+        estimate=lambda j: 0.1 + int(j["qubits"]) * int(j["depth"]) * 1e-5
+    )
+
     nb = NearBlockchain(args.account, args.network)
     ipfs = IPFSGateway(gateway="http://" + args.ipfs_gateway)  # noqa: F841
 
-    # Start contract polling for new jobs
-    running = True
-    first_run = True
-    n_vresult = 0
-    n_verified = 0
+    # Validities are sent in batches, a transaction settling many jobs; every
+    # validity is resolved by whether the contract updated its job
+    job_validity = TxBatcher(
+        nb.set_job_validity_batch,
+        args.tx_batch_size,
+        args.tx_batch_delay,
+        applied(lambda item: item["id"]),
+    )
+    result_validity = TxBatcher(
+        nb.set_result_validity_batch,
+        args.tx_batch_size,
+        args.tx_batch_delay,
+        applied(lambda item: item["id"]),
+    )
 
     print("Verifier node started.")
-    stats = repeat_until_done(lambda: nb.get_jobs_stats())
-
-    while running:
-        if first_run:
-            first_run = False
-            latest_jobs = repeat_until_done(lambda: nb.get_all_jobs())
-        else:
-            i = 0
-            while (
-                repeat_until_done(lambda: nb.get_jobs_stats())["validating-result"]
-                == stats["validating-result"]
-                and repeat_until_done(lambda: nb.get_jobs_stats())["pending-validation"]
-                == stats["pending-validation"]
-            ) and i < 5:
-                time.sleep(random.randint(0, 5))
-                i += 1
-
-            latest_jobs = repeat_until_done(lambda: nb.get_latest_jobs())
 
-        stats = repeat_until_done(lambda: nb.get_jobs_stats())
-        random.shuffle(latest_jobs)
+    # Start contract polling for new and changed jobs; the heartbeat retries the
+    # jobs that failed
+    sync = JobSync(nb, statuses=["pending-validation", "validating-result"])
+    for _ in sync.deltas(heartbeat=30):
+        latest_jobs = scheduler.order(sync.active())
 
         # If there is a new job that needs validation, process it
         for j in latest_jobs:
+            if job_state(j) in handled_jobs:
+                continue
+
             if j["status"] == "pending-validation":
                 try:
-                    if handle_pending_validation_job(j, ipfs, nb, base_dir):
-                        n_verified += 1
-                        stats["pending-validation"] -= 1
+                    handle_pending_validation_job(
+                        j, ipfs, job_validity, base_dir, limits
+                    )
                 except Exception as e:
                     print("\tFailed to handle pending-validation job:", e)
                     traceback.print_exc()
@@ -183,14 +267,13 @@ def verifier_node():  # noqa: C901
                 and j["verifier_id"] == nb.account.account_id
             ):
                 try:
-                    if handle_validating_result_job(j, ipfs, nb, base_dir):
-                        n_vresult += 1
-                        stats["validating-result"] -= 1
+                    handle_validating_result_job(j, ipfs, result_validity, base_dir)
                 except Exception as e:
                     print("\tFailed to handle validating-result job:", e)
                     traceback.print_exc()
 
         print(
-            f"Account balance is {nb.balance():0.5f} N, job verified {n_verified}, "
-            + f"result verified {n_vresult}"
+            f"Account balance is {nb.balance():0.5f} N, job verified "
+            + f"{applied_validities['pending-validation']}, result verified "
+            + f"{applied_validities['validating-result']}"
         )
@@ -0,0 +1,70 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import threading
+from typing import Dict
+
+
+class JobWatcher:
+    """Poll the status of the jobs being simulated, setting their cancel event
+    as soon as they leave the `waiting` status (ie: another sampler submitted
+    a result first), so the simulation is aborted and the cores move on"""
+
+    def __init__(self, nb, interval: float = 10.0):
+        self.nb = nb
+        self.interval = interval
+        self.jobs: Dict[str, threading.Event] = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def watch(self, job_id: str) -> threading.Event:
+        """Start watching `job_id`, returning the event set when it is taken"""
+        with self.lock:
+            return self.jobs.setdefault(job_id, threading.Event())
+
+    def unwatch(self, job_id: str):
+        with self.lock:
+            self.jobs.pop(job_id, None)
+
+    def poll(self):
+        """Check the status of every watched job once"""
+        with self.lock:
+            jobs = list(self.jobs.items())
+
+        for job_id, cancel in jobs:
+            if cancel.is_set():
+                continue
+            try:
+                status = self.nb.get_job_status(job_id)
+            except Exception as e:
+                print(f"\t[{job_id}] Unable to get the job status:", e)
+                continue
+            if status != "waiting":
+                print(f"\t[{job_id}] Job is now {status}, aborting the simulation")
+                cancel.set()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.poll()
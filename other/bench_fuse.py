@@ -0,0 +1,56 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Benchmark of the gate fusion pass: number of full statevector sweeps and
+# simulation time of the numpy sampler, with and without fusion.
+#
+#   python other/bench_fuse.py [max_qubits] [depth]
+
+import sys
+import time
+
+from dqpu.q import Circuit
+from dqpu.q.passes import fuse
+from dqpu.sampler import NumpySimulatorSampler
+
+
+def bench(qc, fused):
+    NumpySimulatorSampler.FUSE_MIN_QUBITS = 0
+    s = NumpySimulatorSampler(qc, fuse=fused)
+    t = time.time()
+    s.compute()
+    return time.time() - t
+
+
+def main():
+    max_qubits = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+    print(
+        f"{'qubits':>6} {'sweeps':>8} {'fused':>8} {'time':>9} {'fused':>9} {'speedup':>8}"
+    )
+    for n in range(10, max_qubits + 1, 2):
+        qc = Circuit.random(n, depth)
+        sweeps = len(qc.gates)
+        sweeps_f = len(fuse(qc))
+
+        t = bench(qc, False)
+        t_f = bench(qc, True)
+        print(
+            f"{n:>6} {sweeps:>8} {sweeps_f:>8} {t:>8.3f}s {t_f:>8.3f}s {t / t_f:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
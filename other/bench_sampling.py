@@ -0,0 +1,61 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Benchmark of shot sampling from a final probability vector: the previous
+# `Generator.choice` + `np.unique` + `format` loop against the vectorized
+# `dqpu.sampler.utils.sample_counts` (multinomial or inverse cdf draw).
+#
+#   python other/bench_sampling.py [min_qubits] [max_qubits]
+
+import sys
+import time
+
+import numpy as np
+
+from dqpu.sampler.utils import sample_counts
+
+
+def sample_choice(probs, shots, rng):
+    n = max(len(probs) - 1, 0).bit_length()
+    outcomes, counts = np.unique(
+        rng.choice(len(probs), size=shots, p=probs), return_counts=True
+    )
+    return {format(int(o), f"0{n}b"): int(c) for o, c in zip(outcomes, counts)}
+
+
+def timed(f, *args):
+    t = time.time()
+    f(*args)
+    return time.time() - t
+
+
+def main():
+    min_qubits = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    max_qubits = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    rng = np.random.default_rng()
+
+    print(f"{'qubits':>6} {'shots':>8} {'choice':>9} {'vector':>9} {'speedup':>8}")
+    for n in range(min_qubits, max_qubits + 1, 2):
+        # Random state, with a spread out distribution
+        probs = rng.exponential(size=1 << n)
+        probs /= probs.sum()
+
+        for shots in [8192, 65536, 1 << 20]:
+            t_c = timed(sample_choice, probs, shots, rng)
+            t_m = timed(sample_counts, probs, shots, rng)
+            print(f"{n:>6} {shots:>8} {t_c:>8.3f}s {t_m:>8.3f}s {t_c / t_m:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
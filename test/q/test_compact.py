@@ -0,0 +1,87 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+import unittest
+
+from dqpu.q import Circuit, CompactCircuit, Gates, parse_qasm
+from dqpu.verifier import BasicTrapper
+
+
+class TestQ_CompactCircuit(unittest.TestCase):
+    def test_qasm_roundtrip(self):
+        original = (
+            "OPENQASM 2.0;\n"
+            'include "qelib1.inc";\n'
+            "qreg q[3];\n"
+            "creg c[3];\n"
+            "p(pi/32) q[0];\n"
+            "cx q[0], q[1];\n"
+            "p(pi/32) q[2];\n"
+            "h q[1];\n"
+            "measure q -> c;"
+        )
+
+        cc = Circuit.fromQasmCircuit(original).toCompact()
+        self.assertEqual(len(cc), 4)
+        self.assertEqual(len(cc.params), 1)
+        self.assertEqual(cc.toQasmCircuit(), original)
+        self.assertEqual(Circuit.fromCompact(cc).toQasmCircuit(), original)
+
+    def test_random_roundtrip(self):
+        qc = Circuit.random(8, 200)
+        cc = qc.toCompact()
+        self.assertEqual(len(cc), len(qc.gates))
+        self.assertEqual(cc.toQasmCircuit(), qc.toQasmCircuit())
+
+    def test_insert(self):
+        cc = CompactCircuit(2, 2, capacity=1)
+        cc.apply(Gates.H, 0)
+        cc.apply(Gates.CX, (0, 1))
+        cc.insert(1, cc.opcode(Gates.X), 1)
+        self.assertEqual([g.iden for g, _, _ in cc], ["H", "X", "CX"])
+        self.assertEqual([p for _, p, _ in cc], [[0], [1], [0, 1]])
+
+    def test_trap(self):
+        qc = Circuit.random(6, 30)
+        trapper = BasicTrapper()
+
+        for level in range(1, 4):
+            random.seed(level)
+            qc_t, traps = trapper.trap(qc, level)
+            random.seed(level)
+            cc_t, cc_traps = trapper.trap(qc.toCompact(), level)
+
+            self.assertIsInstance(qc_t, Circuit)
+            self.assertIsInstance(cc_t, CompactCircuit)
+            self.assertEqual(qc_t.n_qbits, 6 + level)
+            self.assertEqual(qc_t.toQasmCircuit(), cc_t.toQasmCircuit())
+            self.assertEqual([t.qubit for t in traps], [t.qubit for t in cc_traps])
+
+    def test_fingerprint(self):
+        a = parse_qasm(
+            "OPENQASM 2.0;\nqreg q[2];\ncreg c[2];\n"
+            "h q[0];\np(pi/2) q[1];\ncx q[0],q[1];\nmeasure q -> c;"
+        )
+        b = parse_qasm(
+            'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[2];\ncreg c[2];\n'
+            "h  q[ 0 ]; // comment\np( 1.5707963267948966 ) q[1];\ncx q[0],\n q[1];"
+        )
+        self.assertEqual(a.fingerprint(), b.fingerprint())
+        self.assertEqual(a.fingerprint(), a.toCircuit().fingerprint())
+
+        c = a.copy()
+        c.apply(Gates.P, [1], ["pi/3"])
+        self.assertNotEqual(a.fingerprint(), c.fingerprint())
+        self.assertNotEqual(c.fingerprint(), a.copy().fingerprint())
@@ -0,0 +1,67 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import cmath
+import math
+import unittest
+
+import numpy as np
+
+from dqpu.q import Gates
+
+
+def controlled(u):
+    """Reference controlled gate, the control being the first (most significant)
+    qubit"""
+    return np.block([[np.eye(2), np.zeros((2, 2))], [np.zeros((2, 2)), u]])
+
+
+# Hand written matrices of the standard gates
+REFERENCE = {
+    "I": [[1, 0], [0, 1]],
+    "X": [[0, 1], [1, 0]],
+    "Y": [[0, -1j], [1j, 0]],
+    "Z": [[1, 0], [0, -1]],
+    "H": np.array([[1, 1], [1, -1]]) / math.sqrt(2),
+    "S": [[1, 0], [0, 1j]],
+    "SDG": [[1, 0], [0, -1j]],
+    "T": [[1, 0], [0, cmath.exp(1j * math.pi / 4)]],
+    "CX": controlled(np.array([[0, 1], [1, 0]])),
+    "CY": controlled(np.array([[0, -1j], [1j, 0]])),
+    "CZ": controlled(np.array([[1, 0], [0, -1]])),
+    "SWAP": [[1, 0, 0, 0], [0, 0, 1, 0], [0, 1, 0, 0], [0, 0, 0, 1]],
+}
+
+PARAMETRIZED_REFERENCE = {
+    "P": lambda k: np.diag([1, cmath.exp(1j * k)]),
+    "R": lambda k: np.diag([1, cmath.exp(2j * math.pi / 2**k)]),
+    "CR": lambda k: controlled(np.diag([1, cmath.exp(2j * math.pi / 2**k)])),
+}
+
+
+class TestGates(unittest.TestCase):
+    def test_matrices(self):
+        for name, m in REFERENCE.items():
+            g = getattr(Gates, name)
+            self.assertTrue(np.allclose(g.matrix, m), name)
+            self.assertTrue(
+                np.allclose(g.matrix @ np.conj(g.matrix).T, np.eye(2**g.nq)), name
+            )
+
+    def test_parametrized(self):
+        for name, f in PARAMETRIZED_REFERENCE.items():
+            for k in (0.3, 1, 2, math.pi):
+                g = getattr(Gates, name).parametrized(k)
+                self.assertTrue(np.allclose(g.matrix, f(k)), f"{name}({k})")
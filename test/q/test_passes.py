@@ -0,0 +1,121 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from dqpu.q import Circuit, Gates
+from dqpu.q.passes import analyze, factorize, fuse
+from dqpu.sampler import NumpySimulatorSampler
+
+
+class TestQ_Passes_Fuse(unittest.TestCase):
+    def test_fuse_1q_runs(self):
+        qc = Circuit(2, 2)
+        for g in [Gates.H, Gates.T, Gates.H, Gates.S]:
+            qc.apply(g, [0])
+        qc.apply(Gates.H, [1])
+        qc.apply(Gates.H, [1])
+
+        fused = fuse(qc)
+        # H H on qubit 1 is the identity and is dropped
+        self.assertEqual(len(fused), 1)
+
+    def test_fuse_2q_blocks(self):
+        qc = Circuit(3, 3)
+        qc.apply(Gates.H, [0])
+        qc.apply(Gates.CX, [0, 1])
+        qc.apply(Gates.T, [1])
+        qc.apply(Gates.CZ, [1, 0])
+        qc.apply(Gates.H, [2])
+        qc.apply(Gates.CX, [1, 2])
+
+        # H on qubit 2 and the last CX are cheaper unfused than as a 4x4 block
+        self.assertEqual(len(fuse(qc)), 3)
+
+    def test_fuse_random(self):
+        for n in [1, 2, 5, 8]:
+            qc = Circuit.random(n, 30)
+            qc.apply(Gates.P, [0], ["pi/7"])
+            if n > 1:
+                qc.apply(Gates.SWAP, [n - 1, 0])
+
+            fused = fuse(qc)
+            self.assertLessEqual(len(fused), len(qc.gates))
+            self.assertTrue(
+                np.allclose(
+                    NumpySimulatorSampler(fused).compute(),
+                    NumpySimulatorSampler(qc, fuse=False).compute(),
+                )
+            )
+
+
+class TestQ_Passes_Factorize(unittest.TestCase):
+    def test_factorize_components(self):
+        qc = Circuit(5, 5)
+        qc.apply(Gates.H, [0])
+        qc.apply(Gates.CX, [0, 3])
+        qc.apply(Gates.X, [2])
+        qc.apply(Gates.CZ, [4, 2])
+        qc.apply(Gates.P, [3], ["pi/3"])
+
+        parts = factorize(qc)
+        self.assertEqual([q for q, _ in parts], [[0, 3], [1], [2, 4]])
+        self.assertEqual(
+            [[(g.iden, q) for g, q, _ in c] for _, c in parts],
+            [
+                [("H", [0]), ("CX", [0, 1]), ("P", [1])],
+                [],
+                [("X", [0]), ("CZ", [1, 0])],
+            ],
+        )
+
+    def test_factorize_statevector(self):
+        qc = Circuit.random(6, 8)
+        parts = factorize(qc)
+
+        # The statevector is the tensor product of the subsystems ones
+        state = np.zeros(2**6, dtype=complex)
+        for i in range(2**6):
+            state[i] = np.prod(
+                [
+                    NumpySimulatorSampler(c).compute()[
+                        sum(((i >> q) & 1) << j for j, q in enumerate(qubits))
+                    ]
+                    for qubits, c in parts
+                ]
+            )
+        self.assertTrue(np.allclose(state, NumpySimulatorSampler(qc).compute()))
+
+
+class TestQ_Passes_Analysis(unittest.TestCase):
+    def test_analyze(self):
+        qc = Circuit(5, 5)
+        qc.apply(Gates.H, [0])
+        qc.apply(Gates.CX, [0, 1])
+        qc.apply(Gates.CX, [0, 2])
+        qc.apply(Gates.CX, [1, 0])
+        qc.apply(Gates.T, [2])
+        qc.apply(Gates.P, [3], ["pi/2"])
+        qc.measure(0, 0)
+
+        f = analyze(qc)
+        self.assertEqual((f.n_qubits, f.n_gates, f.n_2q_gates), (5, 6, 3))
+        self.assertEqual((f.clifford, f.t_count, f.max_degree), (False, 1, 2))
+        self.assertEqual(f.cut_width, 1)
+        self.assertEqual(f.components, [(3, 5, 3), (1, 1, 0), (1, 0, 0)])
+        self.assertEqual(f.largest, 3)
+
+        self.assertTrue(analyze(Circuit(2, 2)).clifford)
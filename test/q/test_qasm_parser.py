@@ -0,0 +1,119 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import unittest
+
+from dqpu.q import Circuit, QasmParseError, parse_qasm
+from dqpu.q.utils import eval_param
+
+HEADER = 'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[2];\ncreg c[2];\n'
+
+
+class TestQ_QasmParser(unittest.TestCase):
+    def test_roundtrip(self):
+        for body in ["h q[0];\ncx q[0], q[1];\n", "p(pi/32) q[0];\ncx q[0], q[1];\n"]:
+            original = HEADER + body + "measure q -> c;"
+            self.assertEqual(parse_qasm(original).toQasmCircuit(), original)
+            self.assertEqual(parse_qasm(original.encode()).toQasmCircuit(), original)
+
+    def test_same_as_openqasm3(self):
+        for n in [1, 3, 7]:
+            qasm = Circuit.random(n, 50).toQasmCircuit()
+            ref = Circuit.fromQasmCircuit(qasm)
+            cc = parse_qasm(qasm)
+
+            self.assertEqual((cc.n_qbits, cc.n_cbits), (ref.n_qbits, ref.n_cbits))
+            self.assertEqual(
+                [(g.iden, list(p)) for g, p, _ in cc],
+                [(g.iden, list(p)) for g, p, _ in ref],
+            )
+
+    def test_nested_parentheses_as_openqasm3(self):
+        qasm = HEADER + (
+            "p(-(pi/2)) q[0];\np(2*(pi/4)) q[1];\np((pi)/2) q[0];\n"
+            "r(-((pi)) / (2*(1+1))) q[1];\ncr((pi/4)) q[0], q[1];\nmeasure q -> c;"
+        )
+        ref = Circuit.fromQasmCircuit(qasm)
+        cc = parse_qasm(qasm)
+        self.assertEqual(
+            [(g.iden, list(q), [eval_param(a) for a in p]) for g, q, p in cc],
+            [(g.iden, list(q), [eval_param(a) for a in p]) for g, q, p in ref],
+        )
+
+        for body in ["p((pi/2) q[0];\n", "p(pi/2)) q[0];\n"]:
+            with self.assertRaises(QasmParseError):
+                parse_qasm(HEADER + body)
+
+    def test_formatting(self):
+        qasm = (
+            'OPENQASM 2.0; include "qelib1.inc";  // header\n'
+            "qreg q [2]; creg c[2];\n"
+            "p( pi / 32 ) q[0]\n;  cx q[0],\n q[1]; // comment; with semicolon\n"
+            "measure q[0] -> c[0];\n"
+        )
+        cc = parse_qasm(qasm)
+        self.assertEqual(
+            cc.toQasmCircuit(),
+            parse_qasm(
+                HEADER + ("p(pi/32) q[0];\ncx q[0], q[1];\nmeasure q -> c;")
+            ).toQasmCircuit(),
+        )
+
+    def test_invalid(self):
+        for body in [
+            "foo q[0];\n",
+            "h q[2];\n",
+            "h r[0];\n",
+            "cx q[0];\n",
+            "cx q[1], q[1];\n",
+            "p(import) q[0];\n",
+            "p q[0];\n",
+            "qreg r[2];\n",
+            "measure q -> c;\nh q[0];\n",
+            "h q[0]\n",
+        ]:
+            with self.assertRaises(QasmParseError):
+                parse_qasm(HEADER + body)
+
+    def test_limits(self):
+        qasm = HEADER + "h q[0];\n" * 10 + "measure q -> c;"
+
+        parse_qasm(qasm, max_size=len(qasm), max_qubits=2, max_gates=10)
+        with self.assertRaises(QasmParseError):
+            parse_qasm(qasm, max_size=len(qasm) - 1)
+        with self.assertRaises(QasmParseError):
+            parse_qasm(qasm, max_qubits=1)
+        with self.assertRaises(QasmParseError):
+            parse_qasm(qasm, max_gates=9)
+
+    def test_params(self):
+        for arg in ["9**9**8", "9**9**9**9", "1e308*10", "(-8)**(1/3)", "1/0"]:
+            t = time.time()
+            with self.assertRaises(QasmParseError):
+                parse_qasm(HEADER + f"p({arg}) q[0];\nmeasure q -> c;")
+            self.assertLess(time.time() - t, 1)
+
+        parse_qasm(HEADER + "p(2**-3*pi) q[0];\nmeasure q -> c;")
+
+    def test_long_statements(self):
+        # Statements split over many lines are parsed in linear time
+        t = time.time()
+        cc = parse_qasm(HEADER + "h" + "\n" * 1000000 + "q[0];\nmeasure q -> c;")
+        self.assertEqual(len(cc), 1)
+        self.assertLess(time.time() - t, 5)
+
+        for body in ["cx" + " q[0],\n" * 20000 + "q[1];", "h" + " " * 70000 + "q[0];"]:
+            with self.assertRaises(QasmParseError):
+                parse_qasm(HEADER + body + "\nmeasure q -> c;")
@@ -0,0 +1,50 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from dqpu.sampler import AerSimulatorSampler
+from dqpu.sampler.backendcache import LRUCache, get_backend
+
+
+class TestBackendCache(unittest.TestCase):
+    def test_lru(self):
+        c = LRUCache(2)
+        c.put("a", 1)
+        c.put("b", 2)
+        self.assertEqual(c.get("a"), 1)
+        c.put("c", 3)
+
+        # "b" is the least recently used one
+        self.assertIsNone(c.get("b"))
+        self.assertEqual((c.get("a"), c.get("c")), (1, 3))
+        self.assertEqual(len(c), 2)
+
+    def test_get_backend(self):
+        built = []
+
+        def factory():
+            built.append(object())
+            return built[-1]
+
+        b = get_backend(("test",), factory)
+        self.assertIs(get_backend(("test",), factory), b)
+        self.assertEqual(len(built), 1)
+
+    def test_configure(self):
+        AerSimulatorSampler.configure(precision="single", method=None)
+        try:
+            self.assertEqual(AerSimulatorSampler.options, {"precision": "single"})
+        finally:
+            AerSimulatorSampler.configure()
@@ -0,0 +1,81 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from dqpu.q import Circuit
+from dqpu.sampler import FactorizedSampler, NumpySimulatorSampler, ProbabilityCache
+from dqpu.verifier import BasicTrapper
+
+
+class TestProbabilityCache(unittest.TestCase):
+    def test_lru(self):
+        with tempfile.TemporaryDirectory() as d:
+            cache = ProbabilityCache(d, max_size=1 << 30)
+            for i in range(3):
+                cache.put(f"k{i}", np.random.random(4096))
+                os.utime(os.path.join(d, f"probs_k{i}.npz"), (i, i))
+
+            self.assertIsNotNone(cache.get("k0"))
+            self.assertIsNone(cache.get("missing"))
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+            # k0 was just used, so k1 is the least recently used entry
+            size = os.path.getsize(os.path.join(d, "probs_k0.npz"))
+            cache.max_size = 2 * size + size // 2
+            cache.evict()
+            self.assertIsNone(cache.get("k1"))
+            self.assertIsNotNone(cache.get("k0"))
+            self.assertIsNotNone(cache.get("k2"))
+
+    def test_evicted_on_get(self):
+        with tempfile.TemporaryDirectory() as d:
+            cache = ProbabilityCache(d)
+            cache.put("k", np.ones(4))
+
+            # Another process evicts the entry right after it is loaded
+            with mock.patch("os.utime", side_effect=FileNotFoundError):
+                np.testing.assert_allclose(cache.get("k"), np.ones(4))
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_sampler(self):
+        qc = Circuit.random(12, 6)
+        with tempfile.TemporaryDirectory() as d:
+            cache = ProbabilityCache(d)
+            p = NumpySimulatorSampler(qc, cache=cache).probabilities()
+            self.assertEqual(cache.misses, 1)
+
+            p2 = NumpySimulatorSampler(qc.toQasmCircuit(), cache=cache).probabilities()
+            self.assertEqual(cache.hits, 1)
+            self.assertTrue(np.allclose(p, p2, atol=1e-6))
+
+    def test_factorized_trapped(self):
+        qc = Circuit.random(12, 6)
+        with tempfile.TemporaryDirectory() as d:
+            cache = ProbabilityCache(d)
+
+            # Traps differ at every submission, the original subsystems don't
+            for _ in range(2):
+                t_qc, _ = BasicTrapper().trap(qc, 1)
+                FactorizedSampler.NATIVE_MAX_QUBITS = 0
+                try:
+                    FactorizedSampler(t_qc, NumpySimulatorSampler, cache).sample(64)
+                finally:
+                    FactorizedSampler.NATIVE_MAX_QUBITS = 10
+            self.assertGreater(cache.hits, 0)
@@ -0,0 +1,80 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import time
+import unittest
+
+from dqpu.q import Circuit
+from dqpu.sampler import NumpySimulatorSampler, Sampler
+from dqpu.sampler.calibration import SamplerProfile, calibrate, measure, save_profile
+
+
+class SlowSampler(Sampler):
+    def sample(self, shots):
+        time.sleep(10)
+
+
+class ScratchSampler(SlowSampler):
+    scratch_files = True
+
+    def __init__(self, circuit, cache_dir):
+        super().__init__(circuit)
+        self.cache_dir = cache_dir
+
+    def sample(self, shots):
+        with open(os.path.join(self.cache_dir, "statevector_0.bin"), "wb") as f:
+            f.write(bytes(1024))
+        super().sample(shots)
+
+
+class TestCalibration(unittest.TestCase):
+    def test_calibrate(self):
+        profile = calibrate(
+            {"numpy": NumpySimulatorSampler, "slow": SlowSampler},
+            qubits=[2, 4, 6],
+            depths=[2, 6],
+            shots=[64, 512],
+            timeout=1,
+            verbose=False,
+        )
+
+        numpy_runs = profile["samplers"]["numpy"]["runs"]
+        self.assertEqual(len(numpy_runs), 9)
+        self.assertTrue(all(r["seconds"] > 0 and r["peak_rss"] > 0 for r in numpy_runs))
+        self.assertEqual(profile["samplers"]["numpy"]["max_qubits"], 6)
+        self.assertIsNone(profile["samplers"]["slow"]["max_qubits"])
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "profile.json")
+            save_profile(profile, path)
+            sp = SamplerProfile.load(path)
+
+        self.assertEqual(sp.max_qubits(), 6)
+        self.assertEqual(sp.samplers(), ["numpy"])
+        self.assertGreater(sp.estimate(6, 6, 512, "numpy"), 0)
+        self.assertIsNone(sp.estimate(6, 6, 512, "slow"))
+        self.assertIsNone(SamplerProfile.load(os.path.join(d, "missing.json")))
+
+        # Jobs of any size get a finite estimate
+        huge = sp.estimate(5000, 10**6, 512, "numpy")
+        self.assertGreaterEqual(huge, sp.estimate(6, 6, 512, "numpy"))
+        self.assertLess(huge, float("inf"))
+
+    def test_killed_scratch_files(self):
+        cache_dir = os.path.expanduser("~/.dqpu/sampler/cache")
+        before = set(os.listdir(cache_dir)) if os.path.isdir(cache_dir) else set()
+        self.assertIsNone(measure(ScratchSampler, Circuit(2, 2), 16, 0.5))
+        self.assertEqual(set(os.listdir(cache_dir)), before)
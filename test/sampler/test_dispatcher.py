@@ -0,0 +1,80 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import tempfile
+import unittest
+
+from dqpu.q import Circuit, Gates
+from dqpu.q.passes import analyze
+from dqpu.sampler import SAMPLERS, NumpySimulatorSampler, SamplerDispatcher
+from dqpu.sampler.stabilizersampler import StabilizerSampler
+
+
+def ghz(n):
+    qc = Circuit(n, n)
+    qc.apply(Gates.H, [0])
+    for i in range(n - 1):
+        qc.apply(Gates.CX, [i, i + 1])
+    return qc
+
+
+class TestSamplerDispatcher(unittest.TestCase):
+    def test_available(self):
+        available = SamplerDispatcher.available(SAMPLERS)
+        self.assertIn("numpy", available)
+        self.assertIn("stabilizer", available)
+
+    def test_rank(self):
+        d = SamplerDispatcher(SAMPLERS, log_file=os.devnull, verbose=False)
+
+        # Large Clifford circuits only fit the stabilizer samplers
+        names = [n for _, n in d.rank(analyze(ghz(100)), 1024)]
+        self.assertEqual(set(names), {"stabilizer", "aer-stabilizer", "aer-mps"})
+
+        qc = ghz(4)
+        qc.apply(Gates.T, [0])
+        f = analyze(qc)
+        self.assertFalse(StabilizerSampler.supports(f))
+        self.assertTrue(NumpySimulatorSampler.supports(f))
+        self.assertNotIn("stabilizer", [n for _, n in d.rank(f, 1024)])
+
+    def test_memory(self):
+        d = SamplerDispatcher(
+            {"numpy": NumpySimulatorSampler, "stabilizer": StabilizerSampler},
+            log_file=os.devnull,
+            verbose=False,
+        )
+        # Small jobs may go to either sampler, large ones only fit the stabilizer
+        self.assertEqual(d.memory(10), NumpySimulatorSampler.memory(10))
+        self.assertEqual(d.memory(200), StabilizerSampler.memory(200))
+        self.assertEqual(NumpySimulatorSampler.memory(5000), float("inf"))
+
+    def test_sample_log(self):
+        with tempfile.TemporaryDirectory() as td:
+            log_file = os.path.join(td, "dispatch.jsonl")
+            d = SamplerDispatcher(
+                {"numpy": NumpySimulatorSampler, "stabilizer": StabilizerSampler},
+                log_file=log_file,
+                verbose=False,
+            )
+            counts = d.sample(ghz(30).toQasmCircuit(), 256, job_id="1")
+            self.assertEqual(set(counts.keys()), {"0" * 30, "1" * 30})
+
+            with open(log_file) as f:
+                record = json.loads(f.readline())
+            self.assertEqual(record["sampler"], "stabilizer")
+            self.assertEqual(record["job"], "1")
+            self.assertEqual(record["features"]["n_qubits"], 30)
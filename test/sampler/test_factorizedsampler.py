@@ -0,0 +1,85 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import numpy as np
+
+from dqpu.q import Circuit, Gates
+from dqpu.sampler import FactorizedSampler, NumpySimulatorSampler
+from dqpu.sampler.utils import join_counts
+from dqpu.verifier import BasicTrapper
+
+
+class TestFactorizedSampler(unittest.TestCase):
+    def test_join_counts(self):
+        counts = join_counts(3, [([0, 2], {"00": 300, "11": 700}), ([1], {"1": 1000})])
+        self.assertEqual(counts, {"010": 300, "111": 700})
+
+    def test_trapped(self):
+        qc = Circuit(4, 4)
+        qc.apply(Gates.H, [0])
+        qc.apply(Gates.CX, [0, 1])
+        t_qc, traps = BasicTrapper().trap(qc, 2)
+
+        counts = FactorizedSampler(t_qc.toQasmCircuit()).sample(1024)
+        self.assertEqual(sum(counts.values()), 1024)
+        self.assertTrue(BasicTrapper().verify(traps, counts))
+        self.assertEqual(len(set(counts.keys())), 2)
+
+    def test_distribution(self):
+        qc = Circuit(5, 5)
+        qc.apply(Gates.H, [0])
+        qc.apply(Gates.R, [0], ["3"])
+        qc.apply(Gates.CX, [0, 3])
+        qc.apply(Gates.H, [2])
+        qc.apply(Gates.T, [2])
+        qc.apply(Gates.H, [2])
+        qc.apply(Gates.X, [4])
+
+        probs = np.abs(NumpySimulatorSampler(qc).compute()) ** 2
+        counts = FactorizedSampler(qc).sample(20000)
+        for k, v in counts.items():
+            self.assertAlmostEqual(v / 20000, probs[int(k, 2)], delta=0.02)
+        for i in np.flatnonzero(probs > 0.01):
+            self.assertIn(format(int(i), "05b"), counts)
+
+    def test_native_only_when_split(self):
+        built = []
+
+        class Probe(NumpySimulatorSampler):
+            def __init__(self, circuit, **kwargs):
+                built.append(circuit.n_qbits)
+                super().__init__(circuit, **kwargs)
+
+        # A circuit that doesn't split runs on the sampler, whatever its size
+        qc = Circuit(2, 2)
+        qc.apply(Gates.H, [0])
+        qc.apply(Gates.CX, [0, 1])
+        FactorizedSampler(qc, Probe).sample(16)
+        self.assertEqual(built, [2])
+
+        # Small subsystems of a split circuit run natively
+        qc = Circuit(3, 3)
+        qc.apply(Gates.H, [0])
+        qc.apply(Gates.CX, [0, 1])
+        qc.apply(Gates.X, [2])
+        built.clear()
+        FactorizedSampler(qc, Probe).sample(16)
+        self.assertEqual(built, [])
+
+        sampler = FactorizedSampler(qc, Probe)
+        sampler.NATIVE_MAX_QUBITS = 1
+        sampler.sample(16)
+        self.assertEqual(built, [2])
@@ -0,0 +1,198 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import tempfile
+import threading
+import unittest
+from functools import reduce
+from unittest import mock
+
+import numpy as np
+
+from dqpu.q import Circuit, Gate, Gates
+from dqpu.sampler import (
+    MemmapSimulatorSampler,
+    NumpySimulatorSampler,
+    SamplingCancelled,
+    StabilizerSampler,
+)
+
+from ..q.test_gates import PARAMETRIZED_REFERENCE, REFERENCE
+
+# Prepares a state with all the amplitudes non zero and distinct phases
+PREPARE = (
+    "OPENQASM 2.0;\n"
+    'include "qelib1.inc";\n'
+    "qreg q[2];\n"
+    "creg c[2];\n"
+    "h q[0];\n"
+    "t q[0];\n"
+    "h q[1];\n"
+    "s q[1];\n"
+    "h q[1];\n"
+)
+
+
+def reference_statevector(name, m, qubits):
+    """Apply the gate matrix `m` to `qubits` of the PREPARE state, using kron
+    products (qubit 0 is the least significant one)"""
+    h, t, s = REFERENCE["H"], REFERENCE["T"], REFERENCE["S"]
+    state = np.kron(
+        np.array(h) @ np.array(s) @ np.array(h) @ [1, 0], np.array(t) @ h @ [1, 0]
+    )
+    m = np.array(m)
+    if len(qubits) == 1:
+        op = np.kron(m, np.eye(2)) if qubits[0] == 1 else np.kron(np.eye(2), m)
+    else:
+        swap = np.array(REFERENCE["SWAP"])
+        op = m if qubits[0] == 1 else swap @ m @ swap
+    return op @ state
+
+
+def dense_statevector(qc):
+    """Reference simulation building the full 2^n x 2^n operator of every gate"""
+    n = qc.n_qbits
+    state = np.zeros(2**n, dtype=complex)
+    state[0] = 1
+
+    for x in qc:
+        g, p = x[0], x[1]
+        if not isinstance(g, Gate):
+            continue
+        op = np.zeros((2**n, 2**n), dtype=complex)
+        m = g.matrix.reshape(2**g.nq, 2**g.nq)
+        for col in range(2**n):
+            bits = [(col >> q) & 1 for q in p]
+            i = reduce(lambda a, b: a * 2 + b, bits)
+            for o in range(2**g.nq):
+                row = col
+                for k, q in enumerate(p):
+                    b = (o >> (g.nq - 1 - k)) & 1
+                    row = (row & ~(1 << q)) | (b << q)
+                op[row, col] += m[o, i]
+        state = op @ state
+    return state
+
+
+class TestNumpySimulatorSampler(unittest.TestCase):
+    def test_bell(self):
+        self.assertTrue(NumpySimulatorSampler.test())
+
+    def test_qubit_ordering(self):
+        qasm = (
+            "OPENQASM 2.0;\n"
+            'include "qelib1.inc";\n'
+            "qreg q[3];\n"
+            "creg c[3];\n"
+            "x q[0];\n"
+            "cx q[0], q[2];\n"
+            "measure q -> c;"
+        )
+        self.assertEqual(NumpySimulatorSampler(qasm).sample(64), {"101": 64})
+
+    def test_parametrized(self):
+        qasm = (
+            "OPENQASM 2.0;\n"
+            'include "qelib1.inc";\n'
+            "qreg q[1];\n"
+            "creg c[1];\n"
+            "h q[0];\n"
+            "p(pi) q[0];\n"
+            "h q[0];\n"
+            "measure q -> c;"
+        )
+        self.assertEqual(NumpySimulatorSampler(qasm).sample(64), {"1": 64})
+
+    def test_gates_against_reference(self):
+        cases = [(name, None, m) for name, m in REFERENCE.items()] + [
+            (name, k, f(k))
+            for name, f in PARAMETRIZED_REFERENCE.items()
+            for k in (1, 3)
+        ]
+        for name, k, m in cases:
+            nq = np.array(m).shape[0] // 2
+            for qubits in [(0,), (1,)] if nq == 1 else [(0, 1), (1, 0)]:
+                arg = "" if k is None else f"({k})"
+                qs = ", ".join(f"q[{q}]" for q in qubits)
+                qasm = PREPARE + f"{name.lower()}{arg} {qs};\nmeasure q -> c;"
+                expected = reference_statevector(name, m, qubits)
+
+                for sampler in (NumpySimulatorSampler, MemmapSimulatorSampler):
+                    sv = np.asarray(sampler(qasm).compute())
+                    self.assertTrue(np.allclose(sv, expected), f"{name} {qubits}")
+
+    def test_cy_against_stabilizer(self):
+        qasm = (
+            "OPENQASM 2.0;\n"
+            'include "qelib1.inc";\n'
+            "qreg q[2];\n"
+            "creg c[2];\n"
+            "h q[0];\n"
+            "cy q[0], q[1];\n"
+            "h q[1];\n"
+            "cy q[0], q[1];\n"
+            "h q[0];\n"
+            "measure q -> c;"
+        )
+        probs = np.abs(NumpySimulatorSampler(qasm).compute()) ** 2
+        self.assertTrue(np.allclose(probs, [0, 0.5, 0, 0.5]))
+        self.assertEqual(set(StabilizerSampler(qasm).sample(256)), {"01", "11"})
+
+    def test_random_against_dense(self):
+        for n in range(1, 6):
+            qc = Circuit.random(n, 12)
+            if n > 1:
+                qc.apply(Gates.SWAP, (0, n - 1))
+                qc.apply(Gates.CY, (n - 1, 0))
+            sv = NumpySimulatorSampler(qc).compute()
+            self.assertTrue(np.allclose(sv, dense_statevector(qc)))
+
+    def test_chunked_kernels(self):
+        # Slices of 4 amplitudes split every axis of the kernels views
+        qc = Circuit.random(6, 12)
+        qc.apply(Gates.SWAP, (0, 5))
+        qc.apply(Gates.CY, (5, 1))
+        with mock.patch("dqpu.sampler.numpysampler.CHUNK_SIZE", 4):
+            sv = NumpySimulatorSampler(qc, fuse=False).compute()
+            fused = NumpySimulatorSampler(qc)
+            fused.FUSE_MIN_QUBITS = 0
+            sv_fused = fused.compute()
+        self.assertTrue(np.allclose(sv, dense_statevector(qc)))
+        self.assertTrue(np.allclose(sv_fused, dense_statevector(qc)))
+
+    def test_cancel(self):
+        s = NumpySimulatorSampler(Circuit.random(4, 12))
+        s.cancel = threading.Event()
+        s.sample(16)
+
+        s.cancel.set()
+        self.assertRaises(SamplingCancelled, s.sample, 16)
+
+
+class TestMemmapSimulatorSampler(unittest.TestCase):
+    def test_bell(self):
+        self.assertTrue(MemmapSimulatorSampler.test())
+
+    def test_chunked_against_numpy(self):
+        with tempfile.TemporaryDirectory() as d:
+            for n in range(2, 9):
+                qc = Circuit.random(n, 20)
+                sampler = MemmapSimulatorSampler(
+                    qc, dtype=np.complex128, chunk_qubits=2, cache_dir=d, verbose=False
+                )
+                sv = sampler.compute()
+                self.assertTrue(np.allclose(sv, NumpySimulatorSampler(qc).compute()))
+                self.assertEqual(sum(sampler.sample(100).values()), 100)
+                self.assertEqual(os.listdir(d), [])
@@ -0,0 +1,86 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+import unittest
+
+import numpy as np
+
+from dqpu.q import Circuit, Gates
+from dqpu.sampler import NumpySimulatorSampler, StabilizerSampler
+from dqpu.verifier import BasicTrapper
+
+CLIFFORD_1Q = [Gates.I, Gates.X, Gates.Y, Gates.Z, Gates.H, Gates.S, Gates.SDG]
+CLIFFORD_2Q = [Gates.CX, Gates.CY, Gates.CZ, Gates.SWAP]
+
+
+def random_clifford(n, depth):
+    qc = Circuit(n, n)
+    for _ in range(depth):
+        if n == 1 or random.random() < 0.5:
+            qc.apply(random.choice(CLIFFORD_1Q), [random.randrange(n)])
+        else:
+            qc.apply(random.choice(CLIFFORD_2Q), random.sample(range(n), 2))
+    for i in range(n):
+        qc.measure(i, i)
+    return qc
+
+
+class TestStabilizerSampler(unittest.TestCase):
+    def test_is_clifford(self):
+        qc = Circuit(2, 2)
+        qc.apply(Gates.H, [0])
+        qc.apply(Gates.P, [1], ["pi/2"])
+        qc.apply(Gates.CZ, [0, 1])
+        self.assertTrue(StabilizerSampler(qc).is_clifford())
+
+        qc.apply(Gates.T, [1])
+        self.assertFalse(StabilizerSampler(qc).is_clifford())
+
+    def test_ghz_200(self):
+        n = 200
+        qc = Circuit(n, n)
+        qc.apply(Gates.H, [0])
+        for i in range(n - 1):
+            qc.apply(Gates.CX, [i, i + 1])
+        for i in range(n):
+            qc.measure(i, i)
+
+        counts = StabilizerSampler(qc.toQasmCircuit()).sample(1024)
+        self.assertEqual(set(counts.keys()), {"0" * n, "1" * n})
+        self.assertEqual(sum(counts.values()), 1024)
+
+    def test_support_matches_statevector(self):
+        random.seed(1)
+        for _ in range(30):
+            n = random.randint(1, 5)
+            qc = random_clifford(n, random.randint(1, 30))
+
+            probs = np.abs(NumpySimulatorSampler(qc).compute()) ** 2
+            support = {format(i, f"0{n}b") for i in np.flatnonzero(probs > 1e-9)}
+
+            counts = StabilizerSampler(qc).sample(4096)
+            self.assertEqual(set(counts.keys()), support)
+
+            # Stabilizer states are uniform over their support
+            for v in counts.values():
+                self.assertAlmostEqual(v / 4096, 1 / len(support), delta=0.08)
+
+    def test_trapped(self):
+        qc = random_clifford(6, 20)
+        t_qc, t_qubits = BasicTrapper().trap(qc, 2)
+        self.assertTrue(StabilizerSampler(t_qc).is_clifford())
+
+        counts = StabilizerSampler(t_qc.toQasmCircuit()).sample(512)
+        self.assertTrue(BasicTrapper().verify(t_qubits, counts))
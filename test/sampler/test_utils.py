@@ -0,0 +1,67 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+import os
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from dqpu.sampler import SamplingCancelled
+from dqpu.sampler.utils import KillablePool, indices_to_bitstrings, sample_counts
+
+
+class TestSamplerUtils(unittest.TestCase):
+    def test_indices_to_bitstrings(self):
+        self.assertEqual(
+            indices_to_bitstrings(np.array([0, 5, 6]), 3), ["000", "101", "110"]
+        )
+
+    def test_sample_counts(self):
+        probs = np.zeros(2**10)
+        probs[[0, 3, 1023]] = [0.25, 0.25, 0.5]
+
+        # Many shots use the multinomial draw, few shots the inverse cdf one
+        for shots in [20000, 100]:
+            counts = sample_counts(probs, shots)
+            self.assertEqual(sum(counts.values()), shots)
+            self.assertTrue(
+                set(counts.keys()) <= {"0000000000", "0000000011", "1111111111"}
+            )
+            self.assertAlmostEqual(counts["1111111111"] / shots, 0.5, delta=0.15)
+
+    def test_killable_pool(self):
+        pool = KillablePool()
+        cancel = threading.Event()
+        self.assertEqual(pool.run(math.factorial, (5,), cancel, poll=0.05), 120)
+        self.assertRaises(Exception, pool.run, math.factorial, (-1,), cancel)
+
+        # The worker is kept across calls, failed ones included
+        pid = pool.run(os.getpid, (), cancel)
+        self.assertNotEqual(pid, os.getpid())
+        self.assertEqual(pool.run(os.getpid, (), cancel), pid)
+
+        threading.Timer(0.2, cancel.set).start()
+        t = time.time()
+        self.assertRaises(
+            SamplingCancelled, pool.run, time.sleep, (30,), cancel, poll=0.05
+        )
+        self.assertLess(time.time() - t, 10)
+
+        # The cancelled worker is killed, a new one takes its place
+        cancel.clear()
+        self.assertNotEqual(pool.run(os.getpid, (), cancel), pid)
+        pool.close()
@@ -0,0 +1,85 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import unittest
+
+from dqpu.jobfile import dumps_circuits, job_circuits, loads_circuits, pack, unpack
+from dqpu.q import parse_qasm
+from dqpu.sampler import NumpySimulatorSampler
+from dqpu.verifier import BasicTrapInfo, BasicTrapper
+
+BELL = (
+    'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[2];\ncreg c[2];\n'
+    "h q[0];\ncx q[0], q[1];\nmeasure q -> c;\n"
+)
+X = (
+    'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[3];\ncreg c[3];\n'
+    "x q[1];\nmeasure q -> c;\n"
+)
+
+
+class TestJobFile(unittest.TestCase):
+    def test_circuits(self):
+        self.assertEqual(dumps_circuits([BELL]), BELL)
+        self.assertEqual(loads_circuits(BELL), [BELL])
+        self.assertEqual(loads_circuits(BELL.encode("ascii")), [BELL])
+
+        data = dumps_circuits([BELL, X])
+        self.assertEqual(json.loads(data), [BELL, X])
+        self.assertEqual(loads_circuits(data.encode("ascii")), [BELL, X])
+
+        self.assertRaises(ValueError, loads_circuits, "[]")
+        self.assertRaises(ValueError, loads_circuits, "[1, 2]")
+
+    def test_pack(self):
+        self.assertEqual(pack([{"00": 1}]), {"00": 1})
+        self.assertEqual(unpack({"00": 1}, 1), [{"00": 1}])
+        self.assertEqual(unpack(pack([1, 2]), 2), [1, 2])
+        self.assertRaises(ValueError, unpack, [1, 2], 3)
+        self.assertRaises(ValueError, unpack, {"00": 1}, 2)
+
+        self.assertEqual(job_circuits({"id": "1"}), 1)
+        self.assertEqual(job_circuits({"id": "1", "circuits": 3}), 3)
+
+    def test_workflow(self):
+        circuits = loads_circuits(dumps_circuits([BELL, X]))
+
+        # Verifier
+        trapper = BasicTrapper()
+        trapped = [trapper.trap(parse_qasm(c)) for c in circuits]
+        job_file = dumps_circuits([qc.toQasmCircuit() for qc, _ in trapped])
+        trap_lists = [t for _, t in trapped]
+
+        # Sampler
+        result_file = json.dumps(
+            pack(
+                [NumpySimulatorSampler(c).sample(256) for c in loads_circuits(job_file)]
+            )
+        )
+
+        # Verifier
+        counts_list = unpack(json.loads(result_file), 2)
+        for trap_list, counts in zip(trap_lists, counts_list):
+            self.assertTrue(trapper.verify(trap_list, counts))
+        trap_file = json.dumps(pack([[t.dump() for t in tl] for tl in trap_lists]))
+
+        # Client
+        results = [
+            trapper.untrap_results(list(map(BasicTrapInfo.loads, tl)), counts)
+            for counts, tl in zip(counts_list, unpack(json.loads(trap_file), 2))
+        ]
+        self.assertEqual(sorted(results[0].keys()), ["00", "11"])
+        self.assertEqual(results[1], {"010": 256})
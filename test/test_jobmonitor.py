@@ -0,0 +1,105 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import unittest
+
+from dqpu.backends import JobMonitor
+
+
+class FakeContract:
+    def __init__(self):
+        self.jobs = {}
+        self.calls = []
+
+    def get_jobs_by_ids(self, ids):
+        self.calls.append(list(ids))
+        return [
+            (
+                {"id": i, "status": self.jobs[i], "result_file": "", "trap_file": ""}
+                if i in self.jobs
+                else None
+            )
+            for i in ids
+        ]
+
+
+class TestJobMonitor(unittest.TestCase):
+    def test_poll(self):
+        nb = FakeContract()
+        nb.jobs = {"1": "waiting", "2": "waiting"}
+        m = JobMonitor(nb)
+        m.stopped = True  # drive it by hand
+        f1 = m.watch("1")
+        f2 = m.watch("2")
+        f3 = m.watch("3")
+        self.assertIs(m.watch("1"), f1)
+
+        self.assertTrue(m.poll())
+        self.assertEqual(nb.calls, [["1", "2", "3"]])
+        self.assertFalse(f1.done())
+        self.assertRaises(KeyError, f3.result, 0)
+        self.assertEqual(m.state("1")["status"], "waiting")
+        self.assertNotIn("3", m.futures)
+
+        self.assertFalse(m.poll())
+        nb.jobs["1"] = "executed"
+        nb.jobs["2"] = "invalid"
+        self.assertTrue(m.poll())
+        self.assertEqual(f1.result(0)["status"], "executed")
+        self.assertEqual(f2.result(0)["status"], "invalid")
+
+        # Finished jobs are forgotten
+        self.assertEqual(m.pending(), [])
+        self.assertEqual((m.futures, m.states), ({}, {}))
+        self.assertFalse(m.poll())
+        self.assertEqual(len(nb.calls), 3)
+
+    def test_cancelled(self):
+        nb = FakeContract()
+        nb.jobs = {"1": "waiting", "2": "waiting"}
+        m = JobMonitor(nb)
+        m.stopped = True
+        m.watch("1").cancel()
+        m.watch("2")
+
+        m.poll()
+        self.assertEqual(nb.calls, [["2"]])
+        self.assertEqual(list(m.states), ["2"])
+
+    def test_backoff(self):
+        m = JobMonitor(FakeContract(), 2, 10, 2, 0.5, rand=lambda: 0.5)
+        self.assertEqual([m._next_interval(False) for _ in range(4)], [4, 8, 10, 10])
+        self.assertEqual(m._next_interval(True), 2)
+
+        m.rand = lambda: 1.0
+        self.assertEqual(m._next_interval(True), 3)
+        m.rand = lambda: 0.0
+        self.assertEqual(m._next_interval(True), 1)
+
+    def test_thread(self):
+        nb = FakeContract()
+        nb.jobs = {"1": "waiting"}
+        m = JobMonitor(nb, 0.01, 0.05)
+        f = m.watch("1")
+        self.assertFalse(f.done())
+
+        nb.jobs["1"] = "executed"
+        self.assertEqual(f.result(5)["status"], "executed")
+        m.stop()
+
+    def test_shared(self):
+        nb = FakeContract()
+        self.assertIs(JobMonitor.shared(nb), JobMonitor.shared(nb))
+        self.assertIsNot(JobMonitor.shared(nb), JobMonitor.shared(FakeContract()))
@@ -0,0 +1,103 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+import unittest
+
+from dqpu.jobpool import JobPool, job_memory
+from dqpu.sampler import NumpySimulatorSampler, StabilizerSampler
+
+
+class TestJobPool(unittest.TestCase):
+    def run_jobs(self, pool, jobs):
+        """Run every job in its own thread under pool.admit, as the sampler node
+        workers do, returning the peak of running jobs (large, all)"""
+        lock = threading.Lock()
+        running = []
+        peak = {"large": 0, "all": 0}
+
+        def fn(j):
+            with pool.admit(j):
+                with lock:
+                    running.append(j)
+                    peak["large"] = max(peak["large"], running.count(17))
+                    peak["all"] = max(peak["all"], len(running))
+                time.sleep(0.05)
+                with lock:
+                    running.remove(j)
+
+        threads = []
+        for j in jobs:
+            threads.append(threading.Thread(target=fn, args=(j,)))
+            threads[-1].start()
+            # Start the jobs in order
+            time.sleep(0.005)
+        for t in threads:
+            t.join()
+        return peak
+
+    def test_admission(self):
+        # Room for a single 17 qubits job (2 threads), plus some small ones
+        pool = JobPool(5, job_memory(17) + 3 * job_memory(10))
+        peak = self.run_jobs(pool, [17, 17, 10, 10, 10])
+
+        self.assertEqual(peak["large"], 1)
+        # The small jobs are packed alongside the first large one
+        self.assertEqual(peak["all"], 4)
+        self.assertEqual((pool.memory_used, pool.threads_used), (0, 0))
+
+    def test_oversized(self):
+        pool = JobPool(2, 1024)
+        peak = self.run_jobs(pool, [30, 1])
+        # A job larger than the budget runs alone
+        self.assertEqual(peak["all"], 1)
+        self.assertEqual((pool.memory_used, pool.threads_used), (0, 0))
+
+    def test_threads(self):
+        pool = JobPool(8, 1 << 40)
+        self.assertEqual(pool.job_threads(10), 1)
+        self.assertEqual(pool.job_threads(18), 4)
+        self.assertEqual(pool.job_threads(30), 8)
+
+    def test_sampler_memory(self):
+        # Stabilizer jobs of hundreds of qubits are small, they run together
+        pool = JobPool(4, job_memory(20), StabilizerSampler.memory)
+        lock = threading.Lock()
+        running = []
+        peak = [0]
+
+        def fn(j):
+            with pool.admit(j):
+                with lock:
+                    running.append(j)
+                    peak[0] = max(peak[0], len(running))
+                time.sleep(0.05)
+                with lock:
+                    running.remove(j)
+
+        threads = [threading.Thread(target=fn, args=(200,)) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(peak[0], 4)
+
+        # Numpy jobs hold the probabilities too, huge jobs the whole budget
+        pool = JobPool(4, 1 << 40, NumpySimulatorSampler.memory)
+        self.assertEqual(pool.job_memory(20), int(1.5 * job_memory(20)))
+        self.assertEqual(pool.job_memory(5000), 1 << 40)
+        with pool.admit(5000):
+            self.assertEqual(pool.threads_used, 4)
+        self.assertEqual((pool.memory_used, pool.threads_used), (0, 0))
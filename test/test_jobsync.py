@@ -0,0 +1,169 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import unittest
+
+from dqpu.jobsync import JobSync
+
+
+class FakeContract:
+    """In memory jobs, with the contract get_jobs and get_jobs_stats views and
+    the client get_jobs_paginated"""
+
+    def __init__(self):
+        self.jobs = {}
+        self.latest_jid = 0
+        self.calls = 0
+
+    def submit(self, status="pending-validation"):
+        self.latest_jid += 1
+        jid = str(self.latest_jid)
+        self.jobs[jid] = {"id": jid, "status": status}
+        return jid
+
+    def get_jobs(self, from_index=0, limit=50):
+        self.calls += 1
+        r = []
+        for i in range(from_index, from_index + limit + 1):
+            if str(i) in self.jobs:
+                r.append(dict(self.jobs[str(i)]))
+        return r
+
+    def get_jobs_paginated(self, from_index=0, to_index=None, limit=50, concurrency=8):
+        # Pages of the range, as Blockchain.get_jobs_paginated
+        end = self.latest_jid + 1 if to_index is None else to_index
+        jobs = []
+        for start in range(from_index, end, limit):
+            page = self.get_jobs(start, min(limit, end - start))
+            jobs += [j for j in page if start <= int(j["id"]) < start + limit]
+        return [j for j in jobs if int(j["id"]) < end]
+
+    def get_jobs_by_status(self, status, from_index=0, limit=50):
+        self.calls += 1
+        jobs = [dict(j) for j in self.jobs.values() if j["status"] == status]
+        return jobs[from_index : from_index + limit]
+
+    def get_jobs_stats(self):
+        stats = {}
+        for j in self.jobs.values():
+            stats[j["status"]] = stats.get(j["status"], 0) + 1
+        return stats
+
+
+class TestJobSync(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.nb = FakeContract()
+        self.sync = JobSync(self.nb, page=10, clock=lambda: self.now)
+
+    def poll(self, dt=1.0):
+        self.now += dt
+        return [(j["id"], j["status"]) for j in self.sync.poll()]
+
+    def test_sync(self):
+        for _ in range(25):
+            self.nb.submit("executed")
+        a = self.nb.submit()
+
+        # Final jobs are skipped, more than a page of new jobs is not missed
+        self.assertEqual(self.poll(), [(a, "pending-validation")])
+        ids = [self.nb.submit() for _ in range(120)]
+        self.assertEqual([i for i, _ in self.poll()], ids)
+
+        # Nothing is fetched if the stats didn't change
+        calls = self.nb.calls
+        self.assertEqual(self.poll(), [])
+        self.assertEqual(self.nb.calls, calls)
+
+        # Status changes of known jobs
+        self.nb.jobs[a]["status"] = "waiting"
+        self.nb.jobs[ids[5]]["status"] = "invalid"
+        self.assertEqual(self.poll(), [(a, "waiting"), (ids[5], "invalid")])
+        self.assertNotIn(ids[5], [j["id"] for j in self.sync.active()])
+
+        # The low watermark moves past the final jobs
+        for jid in [a] + ids:
+            self.nb.jobs[jid]["status"] = "executed"
+        b = self.nb.submit()
+        self.assertEqual(self.poll()[-1], (b, "pending-validation"))
+        self.assertEqual(self.sync.low_watermark(), int(b))
+
+        # Removed jobs are dropped
+        del self.nb.jobs[b]
+        self.nb.submit("executed")
+        self.assertEqual(self.poll(), [])
+        self.assertEqual(self.sync.active(), [])
+
+    def test_adaptive_interval(self):
+        self.poll()
+        self.assertEqual(self.sync.interval, self.sync.max_interval)
+
+        for _ in range(20):
+            self.nb.submit()
+            self.poll(0.5)
+        self.assertLess(self.sync.interval, 3)
+
+        for _ in range(20):
+            self.poll(self.sync.interval)
+        self.assertGreater(self.sync.interval, 10)
+
+    def test_deltas(self):
+        sleeps = []
+
+        def sleep(t):
+            sleeps.append(t)
+            self.now += t
+
+        sync = JobSync(self.nb, clock=lambda: self.now, sleep=sleep)
+        a = self.nb.submit()
+        deltas = sync.deltas(heartbeat=60)
+        self.assertEqual([j["id"] for j in next(deltas)], [a])
+
+        # Without changes, an empty delta after the heartbeat
+        self.assertEqual(next(deltas), [])
+        self.assertGreaterEqual(sum(sleeps), 60)
+
+    def test_statuses(self):
+        sync = JobSync(self.nb, page=10, clock=lambda: self.now, statuses=["waiting"])
+        ids = [self.nb.submit() for _ in range(30)]
+        for jid in ids[:25]:
+            self.nb.jobs[jid]["status"] = "waiting"
+
+        self.assertEqual([j["id"] for j in sync.poll()], ids[:25])
+        self.assertEqual(self.nb.calls, 3)
+
+        self.nb.jobs[ids[0]]["status"] = "validating-result"
+        self.nb.jobs[ids[29]]["status"] = "waiting"
+        self.assertEqual([j["id"] for j in sync.poll()], [ids[29]])
+        self.assertEqual([j["id"] for j in sync.active()], ids[1:25] + [ids[29]])
+
+    def test_statuses_scan(self):
+        sync = JobSync(self.nb, page=10, clock=lambda: self.now, statuses=["waiting"])
+        ids = [self.nb.submit("waiting") for _ in range(25)]
+
+        # The first job leaves the index while the first scan reads its pages,
+        # shifting the next ones: the 11th job is missed
+        get_jobs_by_status = self.nb.get_jobs_by_status
+
+        def leave_during_scan(status, from_index=0, limit=50):
+            page = get_jobs_by_status(status, from_index, limit)
+            if self.nb.calls == 1:
+                self.nb.jobs[ids[0]]["status"] = "validating-result"
+            return page
+
+        self.nb.get_jobs_by_status = leave_during_scan
+        sync.poll()
+        self.assertEqual([j["id"] for j in sync.active()], ids[1:])
+        self.assertEqual(self.nb.calls, 9)
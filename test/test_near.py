@@ -0,0 +1,57 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import importlib.util
+import unittest
+
+
+class ChunkedView:
+    """A get_jobs_by_ids view returning the jobs of each chunk, the first chunks
+    completing last"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, view_name, params):
+        self.calls.append(params["ids"])
+        await asyncio.sleep(0.01 / len(self.calls))
+        return [{"id": jid} for jid in params["ids"]]
+
+
+@unittest.skipUnless(importlib.util.find_spec("py_near"), "py_near is not installed")
+class TestGetJobsByIds(unittest.TestCase):
+    ids = [str(i) for i in range(250)]
+
+    def check(self, view, jobs):
+        self.assertEqual([len(c) for c in view.calls], [100, 100, 50])
+        self.assertEqual([j["id"] for j in jobs], self.ids)
+
+    def test_near(self):
+        from dqpu.blockchain.near import EventLoopThread, NearBlockchain
+
+        nb = NearBlockchain.__new__(NearBlockchain)
+        nb.runner = EventLoopThread()
+        nb._view = view = ChunkedView()
+        try:
+            self.check(view, nb.get_jobs_by_ids(self.ids))
+        finally:
+            nb.runner.stop()
+
+    def test_asyncnear(self):
+        from dqpu.blockchain.asyncnear import AsyncNearBlockchain
+
+        nb = AsyncNearBlockchain.__new__(AsyncNearBlockchain)
+        nb.view = view = ChunkedView()
+        self.check(view, asyncio.run(nb.get_jobs_by_ids(self.ids)))
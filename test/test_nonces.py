@@ -0,0 +1,129 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import asyncio
+import base64
+import importlib.util
+import unittest
+from unittest import mock
+
+from dqpu.nonces import NonceManager
+
+
+class InvalidNonce(Exception):
+    pass
+
+
+class FakeProvider:
+    """An access key on chain: transactions must use a nonce above the chain one,
+    that other clients of the key can move with `use_key`"""
+
+    def __init__(self, nonce=100):
+        self.nonce = nonce
+        self.sent = []
+
+    async def get_nonce(self):
+        return self.nonce
+
+    def use_key(self, times=1):
+        self.nonce += times
+
+    async def send_tx_and_wait(self, nonce):
+        await asyncio.sleep(0)
+        self.sent.append(nonce)
+        if nonce <= self.nonce:
+            raise InvalidNonce(nonce)
+        self.nonce = nonce
+        return nonce
+
+
+class TestNonceManager(unittest.TestCase):
+    def test_concurrent(self):
+        provider = FakeProvider()
+        nonces = NonceManager(provider.get_nonce)
+
+        async def run():
+            return await asyncio.gather(
+                *[
+                    nonces.send(provider.send_tx_and_wait, (InvalidNonce,))
+                    for _ in range(5)
+                ]
+            )
+
+        self.assertEqual(sorted(asyncio.run(run())), [101, 102, 103, 104, 105])
+
+    def test_nonce_conflict(self):
+        provider = FakeProvider()
+        nonces = NonceManager(provider.get_nonce)
+
+        async def run():
+            first = await nonces.send(provider.send_tx_and_wait, (InvalidNonce,))
+            # Another client sends 3 transactions with the same key
+            provider.use_key(3)
+            second = await nonces.send(provider.send_tx_and_wait, (InvalidNonce,))
+            return first, second
+
+        self.assertEqual(asyncio.run(run()), (101, 105))
+        self.assertEqual(provider.sent, [101, 102, 105])
+
+    def test_retries_exhausted(self):
+        provider = FakeProvider()
+        nonces = NonceManager(provider.get_nonce)
+
+        async def send(nonce):
+            provider.sent.append(nonce)
+            raise InvalidNonce(nonce)
+
+        with self.assertRaises(InvalidNonce):
+            asyncio.run(nonces.send(send, (InvalidNonce,), attempts=3))
+        self.assertEqual(len(provider.sent), 3)
+
+
+@unittest.skipUnless(importlib.util.find_spec("py_near"), "py_near is not installed")
+class TestAsyncNearNonces(unittest.TestCase):
+    def test_call_retry(self):
+        from nacl import signing
+        from py_near.exceptions.provider import InvalidNonce
+
+        from dqpu.blockchain.asyncnear import AsyncNearBlockchain
+
+        result = mock.Mock(
+            status={"SuccessValue": base64.b64encode(b"[1]").decode()},
+            transaction=mock.Mock(hash="tx"),
+        )
+        provider = mock.Mock(
+            send_tx_and_wait=mock.AsyncMock(side_effect=[InvalidNonce(), result]),
+            get_status=mock.AsyncMock(
+                return_value={"sync_info": {"latest_block_hash": "1" * 32}}
+            ),
+        )
+        # The chain nonce moves from 5 to 9 after the first transaction
+        access_keys = [mock.Mock(nonce=5), mock.Mock(nonce=9)]
+
+        with mock.patch(
+            "dqpu.blockchain.asyncnear.load_credentials",
+            return_value=("alice.testnet", "ed25519:" + "1" * 64),
+        ):
+            nb = AsyncNearBlockchain("alice.testnet")
+        key = signing.SigningKey(bytes(32))
+        nb.account = mock.Mock(
+            signer=bytes(key) + bytes(key.verify_key),
+            provider=provider,
+            get_access_key=mock.AsyncMock(side_effect=access_keys),
+        )
+
+        self.assertEqual(asyncio.run(nb.call_value("submit_job_result_batch", {})), [1])
+        self.assertEqual(provider.send_tx_and_wait.await_count, 2)
+        self.assertEqual(nb.nonces.nonce, 10)
@@ -0,0 +1,72 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+import unittest
+
+from dqpu.pipeline import Pipeline
+
+
+class TestPipeline(unittest.TestCase):
+    def test_stages(self):
+        log = []
+        exits = {}
+        lock = threading.Lock()
+
+        def stage(name, delay):
+            def fn(key, payload):
+                with lock:
+                    log.append((name, key, "start"))
+                time.sleep(delay)
+                if key == 3 and name == "b":
+                    return None
+                if key == 4 and name == "a":
+                    raise Exception("failed")
+                with lock:
+                    log.append((name, key, "end"))
+                return payload + [name]
+
+            return fn
+
+        p = Pipeline(
+            [("a", stage("a", 0.01), 1), ("b", stage("b", 0.05), 1)],
+            maxsize=10,
+            on_exit=lambda k, ok: exits.__setitem__(k, ok),
+        )
+        for k in range(5):
+            self.assertTrue(p.offer(k, []))
+        p.join()
+        p.stop()
+
+        self.assertEqual(exits, {0: True, 1: True, 2: True, 3: False, 4: False})
+
+        # Stage a prefetches the next items while stage b runs the first one
+        self.assertLess(log.index(("a", 1, "end")), log.index(("b", 0, "end")))
+        self.assertEqual(p.depths(), {"a": (0, 0), "b": (0, 0)})
+
+    def test_bounded(self):
+        gate = threading.Event()
+        p = Pipeline([("a", lambda k, x: gate.wait() and x, 1)], maxsize=1)
+
+        # One item running, one queued, then the queue is full
+        self.assertTrue(p.offer(0, 0))
+        time.sleep(0.05)
+        self.assertTrue(p.offer(1, 1))
+        self.assertFalse(p.offer(2, 2))
+        self.assertEqual(p.depths(), {"a": (1, 1)})
+
+        gate.set()
+        p.join()
+        p.stop()
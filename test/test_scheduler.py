@@ -0,0 +1,104 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+from dqpu.scheduler import ProfitScheduler, RandomScheduler, statevector_estimate
+
+
+def job(id, reward, qubits, depth=10, shots=1024):
+    return {
+        "id": id,
+        "reward_amount": str(reward),
+        "qubits": qubits,
+        "depth": depth,
+        "shots": shots,
+    }
+
+
+class TestScheduler(unittest.TestCase):
+    def test_profit(self):
+        cheap_large = job("1", 10**20, 20)
+        rich_small = job("2", 10**22, 5)
+        s = ProfitScheduler()
+        self.assertEqual(
+            [j["id"] for j in s.order([cheap_large, rich_small])], ["2", "1"]
+        )
+
+    def test_custom_estimate(self):
+        s = ProfitScheduler(estimate=lambda j: 100 if j["id"] == "2" else 1)
+        jobs = [job("1", 10, 20), job("2", 20, 5)]
+        self.assertEqual([j["id"] for j in s.order(jobs)], ["1", "2"])
+
+    def test_aging(self):
+        now = [0.0]
+        s = ProfitScheduler(estimate=lambda j: 1, aging=10, clock=lambda: now[0])
+        old = job("1", 10, 5)
+        s.order([old])
+
+        # Fresh jobs 4 times more profitable go first, until the old job waited
+        # long enough (its score doubles every 10 seconds)
+        now[0] = 15.0
+        self.assertEqual(s.order([job("2", 40, 5), old])[0]["id"], "2")
+        now[0] = 25.0
+        self.assertEqual(s.order([job("3", 40, 5), old])[0]["id"], "1")
+
+        # Jobs not seen for a long time are forgotten
+        now[0] = 40.0 + ProfitScheduler.FORGET_AFTER + 1
+        s.order([])
+        self.assertEqual(s.first_seen, {})
+
+    def test_max_wait(self):
+        now = [0.0]
+        s = ProfitScheduler(
+            estimate=lambda j: 1, aging=600, max_wait=100, clock=lambda: now[0]
+        )
+        poor = job("1", 1, 5)
+        s.order([poor])
+
+        # However unprofitable, a job waits at most max_wait seconds
+        now[0] = 99.0
+        rich = job("2", 10**30, 5)
+        self.assertEqual(s.order([rich, poor])[0]["id"], "2")
+        now[0] = 100.0
+        self.assertEqual(s.order([rich, poor])[0]["id"], "1")
+
+        # Jobs over max_wait go first, the oldest first
+        now[0] = 150.0
+        self.assertEqual(
+            [j["id"] for j in s.order([job("3", 10**30, 5), rich, poor])],
+            ["1", "2", "3"],
+        )
+
+    def test_huge_jobs(self):
+        # The contract doesn't bound the qubits (ie: Clifford jobs)
+        huge = job("1", 10**24, 5000, depth=10**6)
+        self.assertEqual(statevector_estimate(huge), float("inf"))
+        self.assertEqual(
+            [j["id"] for j in ProfitScheduler().order([huge, job("2", 10, 5)])],
+            ["2", "1"],
+        )
+
+        def failing(j):
+            raise OverflowError("too large")
+
+        s = ProfitScheduler(estimate=failing)
+        self.assertEqual(len(s.order([job("1", 10, 5)])), 1)
+
+    def test_random(self):
+        jobs = [job(str(i), 1, 5) for i in range(10)]
+        self.assertEqual(
+            sorted(j["id"] for j in RandomScheduler().order(jobs)),
+            sorted(j["id"] for j in jobs),
+        )
@@ -0,0 +1,95 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import threading
+import time
+import unittest
+
+from dqpu.txbatcher import TxBatcher, applied
+
+
+class TestTxBatcher(unittest.TestCase):
+    def test_max_items(self):
+        batches = []
+        b = TxBatcher(lambda items: batches.append(items) or len(batches), 3, 60)
+        fs = [b.add(i) for i in range(7)]
+
+        self.assertEqual([f.result(5) for f in fs[:6]], [1, 1, 1, 2, 2, 2])
+        self.assertFalse(fs[6].done())
+        self.assertEqual(b.pending(), 1)
+
+        b.close()
+        self.assertEqual(fs[6].result(5), 3)
+        self.assertEqual(batches, [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertRaises(RuntimeError, b.add, 7)
+
+    def test_max_delay(self):
+        batches = []
+        b = TxBatcher(lambda items: batches.append(items), 10, 0.1)
+        t = time.monotonic()
+        b.add("a")
+        b.add("b").result(5)
+        self.assertGreaterEqual(time.monotonic() - t, 0.1)
+        self.assertEqual(batches, [["a", "b"]])
+
+        b.add("c")
+        b.flush()
+        b.close()
+        self.assertEqual(batches, [["a", "b"], ["c"]])
+
+    def test_failure(self):
+        def send(items):
+            raise Exception("Deposit should be greater")
+
+        b = TxBatcher(send, 2, 60)
+        fs = [b.add(i) for i in range(2)]
+        for f in fs:
+            self.assertRaises(Exception, f.result, 5)
+        b.close()
+
+    def test_concurrent(self):
+        lock = threading.Lock()
+        sent = []
+
+        def send(items):
+            with lock:
+                sent.extend(items)
+            return len(items)
+
+        b = TxBatcher(send, 8, 0.05)
+        results = []
+
+        def worker(k):
+            results.append(b.add(k).result(5))
+
+        threads = [threading.Thread(target=worker, args=(k,)) for k in range(40)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        b.close()
+
+        self.assertEqual(sorted(sent), list(range(40)))
+        self.assertTrue(all(1 <= r <= 8 for r in results))
+
+    def test_applied(self):
+        # The contract skips the jobs no longer in the expected status
+        def send(items):
+            return [item["id"] for item in items if item["id"] != "2"]
+
+        b = TxBatcher(send, 3, 60, applied(lambda item: item["id"]))
+        fs = [b.add({"id": str(i)}) for i in range(1, 4)]
+        self.assertEqual([f.result(5) for f in fs], [True, False, True])
+        b.close()
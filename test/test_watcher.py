@@ -0,0 +1,60 @@
+# Copyright 2024 Davide Gessa
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+# http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import unittest
+
+from dqpu.watcher import JobWatcher
+
+
+class FakeBlockchain:
+    def __init__(self):
+        self.status = {}
+
+    def get_job_status(self, id):
+        if id not in self.status:
+            raise Exception("Job not found")
+        return self.status[id]
+
+
+class TestJobWatcher(unittest.TestCase):
+    def test_poll(self):
+        nb = FakeBlockchain()
+        nb.status = {"a": "waiting", "b": "waiting"}
+        watcher = JobWatcher(nb)
+        a, b = watcher.watch("a"), watcher.watch("b")
+        self.assertIs(watcher.watch("a"), a)
+        c = watcher.watch("c")
+
+        watcher.poll()
+        self.assertFalse(a.is_set() or b.is_set() or c.is_set())
+
+        nb.status["b"] = "validating-result"
+        watcher.poll()
+        self.assertFalse(a.is_set())
+        self.assertTrue(b.is_set())
+
+        watcher.unwatch("a")
+        nb.status["a"] = "executed"
+        watcher.poll()
+        self.assertFalse(a.is_set())
+
+    def test_thread(self):
+        nb = FakeBlockchain()
+        nb.status = {"a": "waiting"}
+        watcher = JobWatcher(nb, interval=0.01).start()
+        a = watcher.watch("a")
+        nb.status["a"] = "executed"
+        self.assertTrue(a.wait(5))
+        watcher.stop()